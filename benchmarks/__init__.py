@@ -0,0 +1,8 @@
+"""
+Performance benchmarks for the cribbage EU calculator.
+
+Run from the repository root with:
+    python -m benchmarks
+
+See benchmarks/__main__.py for the options.
+"""
@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+"""
+Run the benchmarks, save the results, and compare against the baseline.
+
+    python -m benchmarks [--quick] [--filter NAME] [--output PATH]
+                         [--baseline PATH] [--threshold FRACTION] [--update-baseline]
+
+Exits with 1 if any benchmark is slower than the baseline by more than the threshold, or if
+a startup benchmark is over its budget (see suite.STARTUP_BUDGETS).
+The baseline is machine specific; update it (--update-baseline) when moving machine.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+
+from .harness import check_budgets, compare_results, load_results, save_results
+from .suite import STARTUP_BUDGETS, run_suite
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+
+def main() -> None:
+    """Parse the command line and run the benchmarks."""
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description=__doc__)
+    parser.add_argument("--quick", action="store_true", help="less work for slow benchmarks")
+    parser.add_argument("--filter", default="", help="only benchmarks containing this")
+    parser.add_argument("--output", default="bench_results.json", help="where to save")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="baseline to compare to")
+    parser.add_argument(
+        "--threshold", type=float, default=0.25, help="allowed slow down, as a fraction"
+    )
+    parser.add_argument(
+        "--update-baseline", action="store_true", help="save these results as the baseline"
+    )
+    args = parser.parse_args()
+
+    results = run_suite(args.quick, args.filter)
+    save_results(results, args.output)
+    print(f"Saved results to {args.output}")
+
+    over_budget = check_budgets(results, STARTUP_BUDGETS)
+    for violation in over_budget:
+        print(f"OVER BUDGET {violation}")
+    if over_budget:
+        sys.exit(1)
+
+    if args.update_baseline:
+        save_results(results, args.baseline)
+        print(f"Saved baseline to {args.baseline}")
+        return
+
+    if not os.path.exists(args.baseline):
+        print("No baseline to compare against")
+        return
+
+    regressions = compare_results(results, load_results(args.baseline), args.threshold)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    if regressions:
+        sys.exit(1)
+    print("No regressions")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+"""
+Fixed hands to benchmark against, so results are comparable between runs.
+
+A spread of hands; lots of 15s, runs, pairs, flushes and nothing at all.
+"""
+
+from __future__ import annotations
+
+from cribbage.card import Card
+
+# Six card hands, as dealt
+DEALT_HANDS: list[tuple[str, ...]] = [
+    ("5H", "5S", "JD", "XC", "2C", "9D"),
+    ("AH", "2H", "3H", "4H", "KS", "QD"),
+    ("7C", "8C", "8D", "9S", "XH", "KC"),
+    ("3S", "6D", "9H", "QC", "KD", "AS"),
+    ("5C", "5D", "5H", "JS", "4C", "6S"),
+]
+
+# Four card hands with a starter, to score
+SCORED_HANDS: list[tuple[tuple[str, ...], str]] = [
+    (("5H", "5S", "JD", "XC"), "5C"),
+    (("AH", "2H", "3H", "4H"), "5H"),
+    (("7C", "8C", "8D", "9S"), "7D"),
+    (("3S", "6D", "9H", "QC"), "KD"),
+    (("5C", "5D", "5H", "JS"), "5S"),
+    (("4C", "6S", "JH", "QH"), "2D"),
+    (("2C", "3D", "4S", "4H"), "4C"),
+    (("XS", "JS", "QS", "KS"), "AC"),
+]
+
+
+def to_cards(names: tuple[str, ...]) -> set[Card]:
+    """
+    Turn card strings into a set of cards
+    """
+    return set(map(Card.from_str, names))
+
+
+def dealt_hands() -> list[set[Card]]:
+    """
+    The six card hands, as cards
+    """
+    return [to_cards(hand) for hand in DEALT_HANDS]
+
+
+def scored_hands() -> list[tuple[set[Card], Card]]:
+    """
+    The four card hands and starters, as cards
+    """
+    return [(to_cards(hand), Card.from_str(starter)) for hand, starter in SCORED_HANDS]
+
+
+def options() -> list[tuple[set[Card], set[Card]]]:
+    """
+    One (keep, discard) option from each dealt hand; the first 4 cards are kept
+    """
+    return [(to_cards(hand[:4]), to_cards(hand[4:])) for hand in DEALT_HANDS]
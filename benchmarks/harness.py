@@ -0,0 +1,153 @@
+# -*- coding: utf-8 -*-
+"""
+Timing, memory measurement and comparison against a baseline.
+
+Each benchmark is a function taking no arguments, and the number of operations it does (so
+results can be given as operations per second). It's timed over a number of rounds, and the
+best round is kept; the least disturbed by anything else on the machine.
+Peak memory is measured in a separate run with tracemalloc, as tracing slows things down.
+Only memory allocated in this process is seen; not in any worker processes.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Callable
+
+import json
+import platform
+import sys
+import tracemalloc
+from time import perf_counter
+
+
+class BenchmarkResult:
+    """
+    Results of a single benchmark
+    """
+
+    name: str
+    ops: int
+    rounds: int
+    best_seconds: float
+    peak_bytes: int
+
+    def __init__(
+        self, name: str, ops: int, rounds: int, best_seconds: float, peak_bytes: int
+    ) -> None:
+        self.name = name
+        self.ops = ops
+        self.rounds = rounds
+        self.best_seconds = best_seconds
+        self.peak_bytes = peak_bytes
+
+    @property
+    def ops_per_sec(self) -> float:
+        """
+        Operations per second, from the best round
+        """
+        return self.ops / self.best_seconds if self.best_seconds else float("inf")
+
+    def to_dict(self) -> dict[str, Any]:
+        """
+        For saving as JSON
+        """
+        return {
+            "name": self.name,
+            "ops": self.ops,
+            "rounds": self.rounds,
+            "best_seconds": self.best_seconds,
+            "ops_per_sec": self.ops_per_sec,
+            "peak_bytes": self.peak_bytes,
+        }
+
+    def __str__(self) -> str:
+        return (
+            f"{self.name:<40} {self.ops_per_sec:>12.1f} ops/s "
+            f"{self.best_seconds:>9.4f}s {self.peak_bytes / 1024:>10.1f} KiB"
+        )
+
+
+def run_benchmark(
+    name: str, func: Callable[[], int], rounds: int = 3, measure_memory: bool = True
+) -> BenchmarkResult:
+    """
+    Time func over a number of rounds, and (optionally) measure its peak memory.
+    func returns the number of operations it did.
+    """
+    best = float("inf")
+    ops = 0
+    for _ in range(rounds):
+        start = perf_counter()
+        ops = func()
+        best = min(best, perf_counter() - start)
+
+    peak = 0
+    if measure_memory:
+        tracemalloc.start()
+        try:
+            func()
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+    return BenchmarkResult(name, ops, rounds, best, peak)
+
+
+def save_results(results: list[BenchmarkResult], path: str) -> None:
+    """
+    Save the results as JSON, with some details of the machine
+    """
+    with open(path, "w", encoding="utf-8") as results_file:
+        json.dump(
+            {
+                "python": sys.version,
+                "platform": platform.platform(),
+                "results": [result.to_dict() for result in results],
+            },
+            results_file,
+            indent=2,
+        )
+
+
+def load_results(path: str) -> dict[str, dict[str, Any]]:
+    """
+    Load saved results, by benchmark name
+    """
+    with open(path, encoding="utf-8") as results_file:
+        return {result["name"]: result for result in json.load(results_file)["results"]}
+
+
+def compare_results(
+    results: list[BenchmarkResult],
+    baseline: dict[str, dict[str, Any]],
+    threshold: float = 0.25,
+) -> list[str]:
+    """
+    Compare against the baseline.
+    Returns a description of each regression; a benchmark that's more than threshold
+    (as a fraction) slower than the baseline.
+    Benchmarks not in the baseline are skipped.
+    """
+    regressions = []
+    for result in results:
+        if result.name not in baseline:
+            continue
+        baseline_rate = baseline[result.name]["ops_per_sec"]
+        if result.ops_per_sec < baseline_rate * (1 - threshold):
+            regressions.append(
+                f"{result.name}: {result.ops_per_sec:.1f} ops/s vs baseline "
+                f"{baseline_rate:.1f} ops/s ({result.ops_per_sec / baseline_rate - 1:+.0%})"
+            )
+    return regressions
+
+
+def check_budgets(results: list[BenchmarkResult], budgets: dict[str, float]) -> list[str]:
+    """
+    Check the benchmarks with a budget (the most seconds they may take) are within it.
+    Returns a description of each that isn't.
+    """
+    return [
+        f"{result.name}: {result.best_seconds:.3f}s vs budget {budgets[result.name]:.3f}s"
+        for result in results
+        if result.name in budgets and result.best_seconds > budgets[result.name]
+    ]
@@ -0,0 +1,204 @@
+# -*- coding: utf-8 -*-
+"""
+The benchmarks themselves.
+
+    score/*: a single call of the scoring function
+    enumerate/*: scoring every starter (hand) or crib deal for one discard option
+    stats/*: building the stats from a list of scores
+    analysis/*: a full analysis of a dealt hand, for each backend
+    present/*: presenting the results of a full analysis
+    startup/*: one-off runs of the CLI, in a fresh interpreter; these also have a budget
+        (STARTUP_BUDGETS) that they must be within, whatever the baseline
+
+Backends are the ways calculate_cribbage_eu can score each option:
+    separate: the hand and crib scored separately (the default)
+    joint: the hand and crib scored together, sharing the starter
+"""
+
+from __future__ import annotations
+
+from typing import Callable
+
+import contextlib
+import io
+import subprocess  # nosec B404 - runs this Python, with fixed arguments
+import sys
+from functools import partial
+
+from cribbage.cribbage_eu import (
+    calculate_cribbage_eu,
+    calculate_joint_scores,
+    calculate_scores_from_crib,
+    calculate_scores_from_hand,
+    present_results,
+)
+from cribbage.scorecalc import calculate_score
+from cribbage.stats import DiscardOption, ScoringStats
+
+from .corpus import dealt_hands, options, scored_hands
+from .harness import BenchmarkResult, run_benchmark
+
+BACKENDS = {"separate": False, "joint": True}
+
+# The most seconds each startup benchmark may take; a one-off run shouldn't be kept waiting
+STARTUP_BUDGETS = {
+    "startup/import_cli": 0.15,
+    "startup/cli_four_player": 1.5,
+}
+STARTUP_COMMANDS = {
+    "startup/import_cli": ["-c", "import cribbage.__main__"],
+    # Small enough to be worked out without starting any workers
+    "startup/cli_four_player": ["-m", "cribbage", "--players=4", "AH", "5S", "JD", "XC", "2C"],
+}
+
+
+def bench_calculate_score(repeats: int) -> Callable[[], int]:
+    """
+    Score each of the fixed hands, repeats times
+    """
+    hands = scored_hands()
+
+    def run() -> int:
+        for _ in range(repeats):
+            for hand, starter in hands:
+                calculate_score(hand, starter)
+        return repeats * len(hands)
+
+    return run
+
+
+def bench_enumerate(
+    func: Callable[..., object], num_options: int
+) -> Callable[[], int]:
+    """
+    Enumerate the scores for each option
+    """
+    i_options = options()[:num_options]
+
+    def run() -> int:
+        for hand, discard in i_options:
+            func(hand, discard)
+        return len(i_options)
+
+    return run
+
+
+def bench_scoring_stats(repeats: int) -> Callable[[], int]:
+    """
+    Build stats from a full crib's worth of scores
+    """
+    hand, discard = options()[0]
+    scores = calculate_scores_from_crib(hand, discard)
+
+    def run() -> int:
+        for _ in range(repeats):
+            ScoringStats(scores)
+        return repeats
+
+    return run
+
+
+def bench_analysis(
+    joint: bool, num_hands: int, results_out: list[DiscardOption]
+) -> Callable[[], int]:
+    """
+    Full analysis of each dealt hand; keeps the results of the last for present_results
+    """
+    hands = dealt_hands()[:num_hands]
+
+    def run() -> int:
+        for hand in hands:
+            results_out[:] = list(calculate_cribbage_eu(hand, joint=joint))
+        return len(hands)
+
+    return run
+
+
+def bench_present_results(results: list[DiscardOption], repeats: int) -> Callable[[], int]:
+    """
+    Present the results of an analysis; the text is thrown away
+    """
+
+    def run() -> int:
+        with contextlib.redirect_stdout(io.StringIO()):
+            for _ in range(repeats):
+                present_results(list(results), 4)
+        return repeats
+
+    return run
+
+
+def bench_startup(args: list[str]) -> Callable[[], int]:
+    """
+    Run Python with args, in a new process; the output is thrown away
+    """
+
+    def run() -> int:
+        subprocess.run(  # nosec B603
+            [sys.executable, *args], check=True, stdout=subprocess.DEVNULL
+        )
+        return 1
+
+    return run
+
+
+def run_suite(quick: bool = False, name_filter: str = "") -> list[BenchmarkResult]:
+    """
+    Run all the benchmarks (whose name contains name_filter), printing each as it finishes.
+    Quick runs do less work, and fewer rounds, for the slow benchmarks.
+    """
+    num_options = 1 if quick else len(options())
+    num_hands = 1
+    slow_rounds = 1 if quick else 3
+
+    analysed: list[DiscardOption] = []
+    benchmarks: list[tuple[str, Callable[[], Callable[[], int]], int, bool]] = [
+        ("score/calculate_score", lambda: bench_calculate_score(200), 5, True),
+        (
+            "enumerate/calculate_scores_from_hand",
+            lambda: bench_enumerate(calculate_scores_from_hand, len(options())),
+            5,
+            True,
+        ),
+        (
+            "enumerate/calculate_scores_from_crib",
+            lambda: bench_enumerate(calculate_scores_from_crib, num_options),
+            slow_rounds,
+            True,
+        ),
+        (
+            "enumerate/calculate_joint_scores",
+            lambda: bench_enumerate(calculate_joint_scores, num_options),
+            slow_rounds,
+            True,
+        ),
+        ("stats/ScoringStats", lambda: bench_scoring_stats(5), slow_rounds, True),
+    ]
+    for backend, joint in BACKENDS.items():
+        benchmarks.append(
+            (
+                f"analysis/calculate_cribbage_eu[{backend}]",
+                partial(bench_analysis, joint, num_hands, analysed),
+                slow_rounds,
+                # The work is done in worker processes, which tracemalloc can't see
+                False,
+            )
+        )
+    benchmarks.append(
+        ("present/present_results", lambda: bench_present_results(analysed, 20), 5, True)
+    )
+    for name, args in STARTUP_COMMANDS.items():
+        # Memory is in the other process, which tracemalloc can't see
+        benchmarks.append((name, partial(bench_startup, args), 5, False))
+
+    results = []
+    for name, setup, rounds, measure_memory in benchmarks:
+        if name_filter not in name:
+            continue
+        if name.startswith("present/") and not analysed:
+            # Needs the results of an analysis
+            bench_analysis(True, 1, analysed)()
+        result = run_benchmark(name, setup(), rounds, measure_memory)
+        print(result, flush=True)
+        results.append(result)
+    return results
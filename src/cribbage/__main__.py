@@ -1,27 +1,284 @@
 # -*- coding: utf-8 -*-
 """
 Created on Sat Mar 18 16:40:49 2023
+
+Usage:
+    cribbage [--profile] [--output=FILE] [--players=N | --variant=NAME] [cards]
+    cribbage serve [--host=HOST] [--port=PORT] [--workers=N]
+    cribbage replay [--workers=N] [--worst=N] LOG
+    cribbage simulate [--deals=N] [--seed=N] [--workers=N] [--policies=A,B] [--output=FILE]
+    cribbage queue create DIR --job=NAME [--units=N]
+    cribbage queue work DIR [--worker=ID] [--max-units=N]
+    cribbage queue status DIR [--requeue-after=SECONDS]
+    cribbage queue merge DIR OUTPUT
+    cribbage verify [--workers=N] [--chunks=N] [--paths=A,B]
+    cribbage query [--discard=RANKS] [--keep=RANKS] [--best=OBJECTIVE] [--min=OBJECTIVE:VALUE]
+        [--max=OBJECTIVE:VALUE] [--limit=N] RESULTS
+
+    --profile: print the time spent in each phase of the analysis
+    --output=FILE: also write the stats of every option to FILE, as they're made;
+        the format is picked by the extension, .jsonl, .csv or .npy (see output.py)
+    --players=N: the number of players, 2 (the default), 3 or 4; see variants.py
+    --variant=NAME: the rules to use; two_player (the default), three_player, four_player or
+        five_card
+
+    serve: run a local HTTP service for analysis, see server.py
+    replay: review the discards in a log of played games, see replay.py for the format;
+        --worst=N lists the N discards that lost the most EV (default 5)
+    simulate: compare discard policies by self-play, see simulate.py; --deals (default
+        100000), --seed (default 0), --policies (default all, the first is the reference);
+        --output=FILE writes the totals so far after each shard, as JSON lines
+    queue: build a table of every canonical hand on several machines, through a shared
+        directory, see workqueue.py; --job is keep_scores or discard_eus, --units (default
+        1000); run work on each machine, status --requeue-after=SECONDS to hand out the units
+        of workers that died, and merge when every unit is done
+    verify: check the fast scoring paths agree with the per-combination scorers for every
+        hand and starter, and the score frequencies, see verify.py; --chunks (default 64),
+        --paths (default calculate_score,shared_table,variant_table,variant_hand); exits with
+        1 if anything differs
+    query: find options in a file written with --output, from indexes over it, see
+        resultindex.py; --discard / --keep: has these ranks, e.g. 5 or 5X; --best: is the best
+        of its hand for the objective, e.g. hand_minus_crib (as the pone); --min / --max: the
+        objective's value is at least / at most VALUE, comma separated for several;
+        --limit (default 20) options are printed
+
+For quick one-off runs, only what's needed is imported; the analysis, output and server
+modules are imported when they're used. Small jobs (e.g. the table scored variants) are worked
+out in this process, without starting any workers; see calculate_cribbage_eu.
 """
 
+# pylint: disable=import-outside-toplevel
+
+import os
 import sys
 from time import time
 
 from cribbage import card
-from cribbage.cribbage_eu import calculate_cribbage_eu, present_results
+from cribbage.profiling import PhaseProfile, timed
+from cribbage.variants import VARIANTS, GameVariant
 
 
 def main() -> None:
     """Get cards from command line and run the analysis."""
     start_time = time()
 
-    print(sys.argv[1:])
-    cards = set(map(card.Card.from_str, sys.argv[1:]))
+    args = sys.argv[1:]
+    if args[:1] == ["serve"]:
+        run_server(args[1:])
+        return
+    if args[:1] == ["replay"]:
+        run_replay(args[1:])
+        return
+    if args[:1] == ["simulate"]:
+        run_simulation(args[1:])
+        return
+    if args[:1] == ["queue"]:
+        run_queue(args[1:])
+        return
+    if args[:1] == ["verify"]:
+        run_verify(args[1:])
+        return
+    if args[:1] == ["query"]:
+        run_query(args[1:])
+        return
+
+    profile = PhaseProfile() if "--profile" in args else None
+    output_path = get_option(args, "output")
+    variant = get_variant(args)
+    card_args = [arg for arg in args if not arg.startswith("--")]
+
+    print(card_args)
+    cards = set(map(card.Card.from_str, card_args))
 
     print(f"{time()-start_time:.0f}: Analysing " + card.convert_cardlist_to_str(cards))
-    results_out = calculate_cribbage_eu(cards)
-    present_results(list(results_out), 4)
+    from cribbage.cribbage_eu import calculate_cribbage_eu, present_results
+
+    results_out = calculate_cribbage_eu(cards, profile=profile, variant=variant)
+    if output_path is not None:
+        from cribbage.output import open_writer
+
+        with open_writer(output_path) as writer:
+            results = []
+            for result in results_out:
+                writer.write(result)
+                results.append(result)
+    else:
+        results = list(results_out)
+    with timed(profile, "presentation"):
+        present_results(results, 4)
     print(f"{time()-start_time:.0f}: finished in {time() - start_time}")
 
+    if profile is not None:
+        print()
+        print("Profile (time in worker processes is summed):")
+        print(profile)
+
+
+def get_option(args: list[str], name: str, default: str | None = None) -> str | None:
+    """Get the value of a --name=value option; the last given."""
+    values = [arg.split("=", 1)[1] for arg in args if arg.startswith(f"--{name}=")]
+    return values[-1] if values else default
+
+
+def get_variant(args: list[str]) -> GameVariant:
+    """The variant given by --variant, or the first for --players; exits if there's none."""
+    name = get_option(args, "variant")
+    if name is None:
+        by_players: dict[str, str] = {}
+        for variant_name, variant in VARIANTS.items():
+            by_players.setdefault(str(variant.num_players), variant_name)
+        players = get_option(args, "players", "2")
+        if players not in by_players:
+            sys.exit(f"--players must be one of {', '.join(by_players)}, not {players}")
+        name = by_players[players]
+    if name not in VARIANTS:
+        sys.exit(f"--variant must be one of {', '.join(VARIANTS)}, not {name}")
+    return VARIANTS[name]
+
+
+def run_server(args: list[str]) -> None:
+    """Run the HTTP service, see server.py."""
+    from cribbage.server import DEFAULT_HOST, DEFAULT_PORT, serve
+
+    workers = get_option(args, "workers")
+    serve(
+        get_option(args, "host", DEFAULT_HOST) or DEFAULT_HOST,
+        int(get_option(args, "port", str(DEFAULT_PORT)) or DEFAULT_PORT),
+        None if workers is None else int(workers),
+    )
+
+
+def run_replay(args: list[str]) -> None:
+    """Review the discards in a game log, see replay.py."""
+    from cribbage.replay import replay
+
+    paths = [arg for arg in args if not arg.startswith("--")]
+    if len(paths) != 1:
+        sys.exit("Usage: cribbage replay [--workers=N] [--worst=N] LOG")
+    workers = get_option(args, "workers")
+    replay(
+        paths[0],
+        None if workers is None else int(workers),
+        int(get_option(args, "worst", "5") or 5),
+    )
+
+
+def run_simulation(args: list[str]) -> None:
+    """Compare discard policies by self-play, see simulate.py."""
+    import json
+
+    from cribbage.simulate import render_comparison, simulate
+
+    workers = get_option(args, "workers")
+    policies = get_option(args, "policies")
+    output_path = get_option(args, "output")
+    results = simulate(
+        int(get_option(args, "deals", "100000") or 100000),
+        None if policies is None else policies.split(","),
+        int(get_option(args, "seed", "0") or 0),
+        max_workers=None if workers is None else int(workers),
+    )
+
+    totals = None
+    with open(output_path or os.devnull, "w", encoding="utf-8") as output_file:
+        for totals in results:
+            output_file.write(json.dumps(totals.to_dict()) + "\n")
+            output_file.flush()
+            print(f"{totals.shards} shards done", file=sys.stderr)
+    if totals is not None:
+        print(render_comparison(totals))
+
+
+def run_queue(args: list[str]) -> None:
+    """Build a table through a work queue on a shared directory, see workqueue.py."""
+    from cribbage import workqueue
+
+    positional = [arg for arg in args if not arg.startswith("--")]
+    command, paths = (positional[0], positional[1:]) if positional else (None, [])
+    if command == "create" and len(paths) == 1 and get_option(args, "job"):
+        num_units = workqueue.create_queue(
+            paths[0],
+            get_option(args, "job") or "",
+            int(get_option(args, "units", "1000") or 1000),
+        )
+        print(f"Created {num_units} units in {paths[0]}")
+    elif command == "work" and len(paths) == 1:
+        max_units = get_option(args, "max-units")
+        done = workqueue.run_worker(
+            paths[0],
+            get_option(args, "worker"),
+            None if max_units is None else int(max_units),
+        )
+        print(f"Worked {done} units")
+    elif command == "status" and len(paths) == 1:
+        requeue_after = get_option(args, "requeue-after")
+        status = workqueue.queue_status(
+            paths[0], None if requeue_after is None else float(requeue_after)
+        )
+        print(", ".join(f"{name}: {count}" for name, count in status.items()))
+    elif command == "merge" and len(paths) == 2:
+        num_hands = workqueue.merge_results(paths[0], paths[1])
+        print(f"Wrote {num_hands} hands to {paths[1]}")
+    else:
+        sys.exit(
+            "Usage: cribbage queue create DIR --job=NAME [--units=N]\n"
+            "       cribbage queue work DIR [--worker=ID] [--max-units=N]\n"
+            "       cribbage queue status DIR [--requeue-after=SECONDS]\n"
+            "       cribbage queue merge DIR OUTPUT"
+        )
+
+
+def run_verify(args: list[str]) -> None:
+    """Check the fast scoring paths against the per-combination scorers, see verify.py."""
+    from cribbage.verify import DEFAULT_CHUNKS, render_report, verify
+
+    workers = get_option(args, "workers")
+    paths = get_option(args, "paths")
+    totals = None
+    for totals in verify(
+        None if paths is None else paths.split(","),
+        int(get_option(args, "chunks", str(DEFAULT_CHUNKS)) or DEFAULT_CHUNKS),
+        None if workers is None else int(workers),
+    ):
+        print(f"{totals.chunks} chunks done", file=sys.stderr)
+    if totals is not None:
+        print(render_report(totals))
+        if not totals.passed:
+            sys.exit(1)
+
+
+def run_query(args: list[str]) -> None:
+    """Find options in a results file, see resultindex.py."""
+    from cribbage.cardenums import CardVal
+    from cribbage.resultindex import ResultIndex
+
+    paths = [arg for arg in args if not arg.startswith("--")]
+    if len(paths) != 1:
+        sys.exit(
+            "Usage: cribbage query [--discard=RANKS] [--keep=RANKS] [--best=OBJECTIVE] "
+            "[--min=OBJECTIVE:VALUE] [--max=OBJECTIVE:VALUE] [--limit=N] RESULTS"
+        )
+    ranges: dict[str, tuple[float | None, float | None]] = {}
+    for limit_name in ("min", "max"):
+        for limit in filter(None, (get_option(args, limit_name) or "").split(",")):
+            name, _, value = limit.partition(":")
+            low, high = ranges.get(name, (None, None))
+            ranges[name] = (float(value), high) if limit_name == "min" else (low, float(value))
+
+    index = ResultIndex.from_file(paths[0])
+    matches = index.query(
+        [CardVal.from_str(x) for x in get_option(args, "discard", "") or ""],
+        [CardVal.from_str(x) for x in get_option(args, "keep", "") or ""],
+        best_for=get_option(args, "best"),
+        ranges=ranges,
+    )
+    shown = list(dict.fromkeys(filter(None, [get_option(args, "best"), *ranges])))
+    limit = int(get_option(args, "limit", "20") or 20)
+    print(f"{len(matches)} of {len(index.options)} options match, from {index.num_hands} hands")
+    for stored in matches[:limit]:
+        values = ", ".join(f"{name} {stored.value(name):.2f}" for name in shown)
+        print(f"    hand {stored.hand_idx}: {stored}" + (f" ({values})" if values else ""))
+
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+"""
+Analysis for asyncio programs (e.g. bots), without blocking the event loop.
+
+The work is done on an AnalysisEngine's pool of workers (see engine.py); by default, the
+process's shared engine. The event loop only waits on the results.
+
+If the task waiting on an analysis is cancelled, the options not yet started on the workers
+are cancelled too; so a bot that's moved on doesn't leave the pool busy. Options already being
+worked out finish, but are thrown away.
+
+    options = await analyse_hand(cards)
+
+    async with contextlib.aclosing(iter_analysis(cards)) as results:
+        async for option in results:
+            ...
+"""
+
+from __future__ import annotations
+
+from typing import AsyncIterator
+
+import asyncio
+import contextlib
+from functools import partial
+
+from .card import Card
+from .engine import AnalysisEngine, default_engine
+from .stats import DiscardOption
+
+
+async def iter_analysis(  # pylint: disable=too-many-arguments
+    initial_hand: set[Card],
+    engine: AnalysisEngine | None = None,
+    joint: bool = False,
+    opponent_ev: bool = False,
+    pegging: bool = False,
+    breakdown: bool = False,
+) -> AsyncIterator[DiscardOption]:
+    """
+    Each discard option of the hand, as it's worked out; as calculate_cribbage_eu.
+    Options that haven't started are cancelled if the iteration stops early (on cancellation,
+    or when the iterator is closed; use contextlib.aclosing to close it straight away).
+    """
+    engine = engine or default_engine()
+    loop = asyncio.get_running_loop()
+    # Submitting can estimate the opponent's hand, which takes a while the first time
+    futures, opponent_hand_ev = await loop.run_in_executor(
+        None, partial(engine.submit, initial_hand, joint, opponent_ev, pegging, breakdown)
+    )
+
+    try:
+        for next_done in asyncio.as_completed([asyncio.wrap_future(x) for x in futures]):
+            option = await next_done
+            option.opponent_hand_ev = opponent_hand_ev
+            yield option
+    finally:
+        for future in futures:
+            future.cancel()
+
+
+async def analyse_hand(  # pylint: disable=too-many-arguments
+    initial_hand: set[Card],
+    engine: AnalysisEngine | None = None,
+    joint: bool = False,
+    opponent_ev: bool = False,
+    pegging: bool = False,
+    breakdown: bool = False,
+) -> list[DiscardOption]:
+    """
+    Every discard option of the hand, in the order they finished.
+    If cancelled, the options not yet started are cancelled.
+    """
+    async with contextlib.aclosing(
+        iter_analysis(initial_hand, engine, joint, opponent_ev, pegging, breakdown)
+    ) as results:
+        return [option async for option in results]
@@ -0,0 +1,311 @@
+# -*- coding: utf-8 -*-
+"""
+In-process caches of analyses, for long running processes that see the same hands again.
+
+LRUCache is a thread safe least-recently-used cache, bounded by the number of entries and/or
+the approximate size of the values in bytes; it counts its hits, misses and evictions.
+
+AnalysisCache sits in front of calculate_cribbage_eu and calculate_score_for_option. Hands are
+keyed by their canonical card IDs (see canonical.py), so hands that only differ by suit share
+an entry, and the results are relabelled to the suits asked for. Optionally, each
+(keep, discard) option is cached too; options don't depend on everything a hand's analysis
+does (e.g. the opponent's hand), so they can be reused by analyses that differ in that.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Callable, Generic, Hashable, TypeVar
+
+import pickle  # nosec B403 - only used to measure the size of our own results
+import threading
+from collections import OrderedDict
+from itertools import combinations
+
+from .canonical import canonical_groups, card_from_id, relabel_cards, relabel_option
+from .card import Card
+from .cardenums import CardSuit
+from .cribbage_eu import (
+    calculate_cribbage_eu,
+    calculate_joint_score_for_option,
+    calculate_score_for_option,
+)
+from .opponent import OpponentDiscardModel, estimate_opponent_hand_ev
+from .stats import DiscardOption
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+def pickled_size(value: Any) -> int:
+    """
+    Approximate size of a value in bytes; how big it is pickled
+    """
+    return len(pickle.dumps(value, pickle.HIGHEST_PROTOCOL))
+
+
+class LRUCache(Generic[K, V]):
+    """
+    A cache keeping the most recently used values.
+    Bounded by max_entries and/or max_bytes (None for no limit); the size of each value is
+    given by sizeof, which is only called if there's a byte limit.
+    A value bigger than max_bytes on its own isn't kept.
+    """
+
+    max_entries: int | None
+    max_bytes: int | None
+    hits: int
+    misses: int
+    evictions: int
+    current_bytes: int
+    _sizeof: Callable[[V], int]
+    _entries: OrderedDict[K, tuple[V, int]]
+    _lock: threading.Lock
+
+    def __init__(
+        self,
+        max_entries: int | None = 256,
+        max_bytes: int | None = None,
+        sizeof: Callable[[V], int] = pickled_size,
+    ) -> None:
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.current_bytes = 0
+        self._sizeof = sizeof
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: K, default: V | None = None) -> V | None:
+        """
+        The value for key, or default; counts as a hit or a miss
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key: K, value: V) -> None:
+        """
+        Add (or replace) the value for key, evicting the least recently used to make room
+        """
+        size = 0 if self.max_bytes is None else self._sizeof(value)
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.current_bytes -= old[1]
+            if self.max_bytes is not None and size > self.max_bytes:
+                return
+            self._entries[key] = (value, size)
+            self.current_bytes += size
+            while (self.max_entries is not None and len(self._entries) > self.max_entries) or (
+                self.max_bytes is not None and self.current_bytes > self.max_bytes
+            ):
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self.current_bytes -= evicted_size
+                self.evictions += 1
+
+    def clear(self) -> None:
+        """
+        Remove everything; the counts are kept
+        """
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def __contains__(self, key: Any) -> bool:
+        with self._lock:
+            return key in self._entries
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def stats(self) -> dict[str, int]:
+        """
+        The counts, and how full the cache is
+        """
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "bytes": self.current_bytes,
+            }
+
+
+class AnalysisCache:
+    """
+    Caches of whole hands, and (if option_cache is set) of single options.
+    Each cache is bounded by its own max_entries/max_bytes.
+    The options given back are copies, stats and all; changing them doesn't change the cache.
+    Discard models are keyed by what they are (see OpponentDiscardModel.cache_key), so an
+    equal model made again still finds the results.
+    """
+
+    hands: LRUCache[tuple, list[DiscardOption]]
+    options: LRUCache[tuple, DiscardOption] | None
+
+    def __init__(  # pylint: disable=too-many-arguments
+        self,
+        max_entries: int | None = 256,
+        max_bytes: int | None = None,
+        option_cache: bool = False,
+        option_max_entries: int | None = 4096,
+        option_max_bytes: int | None = None,
+    ) -> None:
+        self.hands = LRUCache(max_entries, max_bytes)
+        self.options = LRUCache(option_max_entries, option_max_bytes) if option_cache else None
+
+    def calculate_cribbage_eu(  # pylint: disable=too-many-arguments
+        self,
+        initial_hand: set[Card],
+        num_discard: int = 2,
+        joint: bool = False,
+        opponent_ev: bool = False,
+        discard_model: OpponentDiscardModel | None = None,
+        pegging: bool = False,
+        breakdown: bool = False,
+    ) -> list[DiscardOption]:
+        """
+        As calculate_cribbage_eu, but from the cache if it's been worked out before.
+        With the option cache, if only some options are cached, the rest are worked out in
+        this process; if none are, the whole hand is worked out as usual.
+        """
+        (key,), suit_map = canonical_groups([initial_hand])
+        settings = (num_discard, joint, discard_model, pegging, breakdown)
+        hand_key = (key, opponent_ev, _settings_key(settings))
+
+        cached = self.hands.get(hand_key)
+        if cached is None:
+            cached = self._calculate_canonical(key, opponent_ev, settings)
+            self.hands.put(hand_key, cached)
+
+        return [relabel_option(option, suit_map, copy_stats=True) for option in cached]
+
+    def _calculate_canonical(
+        self, key: tuple[int, ...], opponent_ev: bool, settings: tuple
+    ) -> list[DiscardOption]:
+        """
+        Every option of the canonical hand; from the option cache where possible
+        """
+        num_discard, joint, discard_model, pegging, breakdown = settings
+        settings_key = _settings_key(settings)
+        canonical_cards = {card_from_id(i_card) for i_card in key}
+
+        if self.options is None:
+            return list(
+                calculate_cribbage_eu(
+                    canonical_cards,
+                    num_discard,
+                    joint,
+                    opponent_ev,
+                    discard_model,
+                    pegging,
+                    breakdown=breakdown,
+                )
+            )
+
+        results = []
+        missing = []
+        for discard_tuple in combinations(sorted(canonical_cards), num_discard):
+            discard = set(discard_tuple)
+            keep = canonical_cards - discard
+            option_key, suit_map = canonical_groups([keep, discard])
+            cached = self.options.get((option_key, settings_key))
+            if cached is None:
+                missing.append((keep, discard))
+            else:
+                results.append(relabel_option(cached, suit_map))
+
+        if not results:
+            # Nothing to reuse; use all the workers
+            computed = list(
+                calculate_cribbage_eu(
+                    canonical_cards,
+                    num_discard,
+                    joint,
+                    False,
+                    discard_model,
+                    pegging,
+                    breakdown=breakdown,
+                )
+            )
+        else:
+            option_func = calculate_joint_score_for_option if joint else calculate_score_for_option
+            computed = [
+                option_func(keep, discard, discard_model, pegging, None, breakdown)
+                for keep, discard in missing
+            ]
+
+        for option in computed:
+            option_key, suit_map = canonical_groups([option.hand, option.discard])
+            self.options.put(
+                (option_key, settings_key), relabel_option(option, _inverse(suit_map))
+            )
+        results += computed
+
+        opponent_hand_ev = estimate_opponent_hand_ev(canonical_cards) if opponent_ev else None
+        for option in results:
+            option.opponent_hand_ev = opponent_hand_ev
+        return results
+
+    def calculate_score_for_option(  # pylint: disable=too-many-arguments
+        self,
+        hand: set[Card],
+        discard: set[Card],
+        discard_model: OpponentDiscardModel | None = None,
+        pegging: bool = False,
+        breakdown: bool = False,
+        joint: bool = False,
+    ) -> DiscardOption:
+        """
+        As calculate_score_for_option (or calculate_joint_score_for_option, if joint is set),
+        but from the option cache if it's been worked out before.
+        """
+        if self.options is None:
+            raise ValueError("The option cache isn't enabled")
+
+        option_key, suit_map = canonical_groups([hand, discard])
+        settings_key = _settings_key((len(discard), joint, discard_model, pegging, breakdown))
+        cached = self.options.get((option_key, settings_key))
+        if cached is None:
+            option_func = calculate_joint_score_for_option if joint else calculate_score_for_option
+            cached = option_func(
+                relabel_cards(hand, _inverse(suit_map)),
+                relabel_cards(discard, _inverse(suit_map)),
+                discard_model,
+                pegging,
+                None,
+                breakdown,
+            )
+            self.options.put((option_key, settings_key), cached)
+        return relabel_option(cached, suit_map, copy_stats=True)
+
+    def stats(self) -> dict[str, dict[str, int]]:
+        """
+        The stats of each cache
+        """
+        result = {"hands": self.hands.stats()}
+        if self.options is not None:
+            result["options"] = self.options.stats()
+        return result
+
+
+def _settings_key(settings: tuple) -> tuple:
+    """
+    The settings as part of a key; with the discard model by what it is, not by its identity
+    """
+    num_discard, joint, discard_model, pegging, breakdown = settings
+    model_key = None if discard_model is None else discard_model.cache_key()
+    return num_discard, joint, model_key, pegging, breakdown
+
+
+def _inverse(suit_map: dict[CardSuit, CardSuit]) -> dict[CardSuit, CardSuit]:
+    return {new: old for old, new in suit_map.items()}
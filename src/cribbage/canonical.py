@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+"""
+Canonical forms of hands, so hands that only differ by suit can share results.
+
+Swapping the suits around (e.g. every heart for a spade and every spade for a heart) doesn't
+change any score; the analysis only cares which cards share a suit, not which suit it is.
+So each hand is relabelled to the first of its 24 suit relabellings (comparing card IDs), and
+results for that are relabelled back to the suits of the hand.
+"""
+
+from __future__ import annotations
+
+from typing import Iterable, Sequence
+
+import copy
+from itertools import permutations
+
+from .card import Card
+from .cardenums import CardSuit, CardVal
+from .stats import DiscardOption
+
+SUITS = sorted(CardSuit)
+_SUIT_INDEX = {suit: i_suit for i_suit, suit in enumerate(SUITS)}
+_SUIT_PERMUTATIONS = list(permutations(range(len(SUITS))))
+
+CanonicalKey = tuple[int, ...]
+
+
+def card_id(card: Card) -> int:
+    """
+    A number for each card, 0-51; in the same order as sorting the cards
+    """
+    return (int(card.val) - 1) * len(SUITS) + _SUIT_INDEX[card.suit]
+
+
+def card_from_id(i_card: int) -> Card:
+    """
+    The card with this ID; see card_id
+    """
+    val, i_suit = divmod(i_card, len(SUITS))
+    return Card(CardVal(val + 1), SUITS[i_suit])
+
+
+def canonical_hand(cards: Iterable[Card]) -> tuple[CanonicalKey, dict[CardSuit, CardSuit]]:
+    """
+    The canonical form of the cards, as sorted card IDs, and the relabelling of suits to go from
+    the canonical form back to the cards given (canonical suit: original suit).
+    Hands which only differ by suit have the same canonical form.
+    """
+    keys, suit_map = canonical_groups([cards])
+    return keys[0], suit_map
+
+
+def canonical_groups(
+    groups: Sequence[Iterable[Card]],
+) -> tuple[tuple[CanonicalKey, ...], dict[CardSuit, CardSuit]]:
+    """
+    As canonical_hand, but for several groups of cards relabelled together; e.g. the cards kept
+    and the cards discarded. Gives the canonical form of each group.
+    """
+    ids = [
+        [(int(i_card.val) - 1, _SUIT_INDEX[i_card.suit]) for i_card in group] for group in groups
+    ]
+
+    best_key, best_perm = min(
+        (
+            tuple(
+                tuple(sorted(val * len(SUITS) + perm[i_suit] for val, i_suit in group))
+                for group in ids
+            ),
+            perm,
+        )
+        for perm in _SUIT_PERMUTATIONS
+    )
+    return best_key, {SUITS[new]: SUITS[old] for old, new in enumerate(best_perm)}
+
+
+def relabel_cards(cards: Iterable[Card], suit_map: dict[CardSuit, CardSuit]) -> set[Card]:
+    """
+    Swap the suits of the cards, using suit_map (e.g. from canonical_hand)
+    """
+    return {Card(i_card.val, suit_map[i_card.suit]) for i_card in cards}
+
+
+def relabel_option(
+    option: DiscardOption, suit_map: dict[CardSuit, CardSuit], copy_stats: bool = False
+) -> DiscardOption:
+    """
+    A copy of the option, with the suits of the hand and discard swapped using suit_map.
+    The stats are shared with the original, as they don't depend on the suits; unless
+    copy_stats is set, for when the copy may be changed (e.g. given back from a cache).
+    """
+    relabelled = copy.copy(option)
+    relabelled.hand = relabel_cards(option.hand, suit_map)
+    relabelled.discard = relabel_cards(option.discard, suit_map)
+    if copy_stats:
+        relabelled.hand_scores = option.hand_scores.copy()
+        relabelled.crib_scores = option.crib_scores.copy()
+        if option.joint_scores is not None:
+            relabelled.joint_scores = option.joint_scores.copy()
+    return relabelled
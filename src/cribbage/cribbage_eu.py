@@ -11,7 +11,8 @@ Calculations for EU:
     1. Score from the hand remaining
     2. Score from the crib; either if the crib is yours or the crib is your Opps.
 
-OP's hand's score is not dependant on your actions.
+OP's hand's score is not dependant on your discard, but it does depend on the 6 cards you hold;
+as those are cards OP can't hold. See opponent.py for the estimate of OP's hand.
 
 3 levels of stats outputs:
     Just the Mean
@@ -19,17 +20,52 @@ OP's hand's score is not dependant on your actions.
     Full list of potential values
 """
 
-from typing import Callable, Iterable
+from __future__ import annotations
 
-import concurrent.futures
-from itertools import combinations
-
-from .card import Card, all_possible_cards, convert_cardlist_to_str
-from .scorecalc import calculate_score
-from .stats import DiscardOption, ScoringStats
+from typing import TYPE_CHECKING, Any, Callable, Iterable
 
+import pickle  # nosec B403 - only used to measure the size of our own results
+from functools import partial
+from itertools import combinations
 
-def present_results(results_in: list[DiscardOption], num_make: int = 3) -> None:
+from .card import Card, all_possible_cards
+from .parallel import run_chunks
+from .profiling import PhaseProfile, timed
+from .progress import (
+    ProgressCallback,
+    ProgressTracker,
+    init_worker_progress,
+    option_work_units,
+    report_progress,
+)
+from .ranking import (
+    Objective,
+    default_objectives,
+    format_entry,
+    rank_options,
+    render_text,
+)
+from .scorecalc import (
+    SCORE_CATEGORIES,
+    calculate_score,
+    calculate_score_breakdown,
+    calculate_score_4_flush,
+    calculate_score_5_nobs,
+    calculate_score_shared,
+)
+from .stats import DiscardOption, JointScoringStats, ScoringStats
+from .tables import crib_deal_indices, gather, shared_breakdown_table
+from .variants import GameVariant, crib_score_counts, variant_hand_scores
+
+if TYPE_CHECKING:
+    from .opponent import OpponentDiscardModel
+
+
+def present_results(
+    results_in: list[DiscardOption],
+    num_make: int = 3,
+    game_state: tuple[int, int, bool] | None = None,
+) -> None:
     """
     Describe the results
 
@@ -40,52 +76,19 @@ def present_results(results_in: list[DiscardOption], num_make: int = 3) -> None:
         4. What gives the best overall EU (if own crib)
         5. What gives the best delta EU (if own crib)
         6. What gives LEAST crib EU
+        7. What gives MOST crib EU
+        8. What gives the best net game EU, including the opponent's hand (if own crib)
+        9. What gives the best net game EU, including the opponent's hand (if opponent's crib)
+        10. What gives the best overall EU including pegging (if own crib)
+        11. What gives the best overall EU including pegging (if opponent's crib)
+        12. What gives the best chance of winning the game
+            Only if game_state is given, as (my score, opponent's score, if I'm the dealer)
+
+    8-11 are only given if the options have the results they need.
+    See ranking.py; each objective is only worked out once per option.
     """
 
-    # Limits
-    num_make = min(num_make, len(results_in))
-
-    # 1.
-    print(f"Top {num_make} highest EU options (mean)")
-    provide_results(results_in, lambda x: x.hand_scores.mean, num_make)
-    print()
-
-    # 2.
-    print(f"Top {num_make} highest EU options (median)")
-    provide_results(results_in, lambda x: x.hand_scores.median, num_make)
-    print()
-
-    # 3.
-    print(f"Top {num_make} highest min hand score")
-    provide_results(results_in, lambda x: x.hand_scores.min, num_make)
-    print()
-
-    # 4.
-    print(f"Top {num_make} best overall EU (hand + crib)")
-    provide_results(
-        results_in,
-        lambda x: x.hand_scores.mean + x.crib_scores.mean,
-        num_make,
-    )
-    print()
-
-    # 5.
-    print(f"Top {num_make} best overall EU (hand - crib)")
-    provide_results(
-        results_in,
-        lambda x: x.hand_scores.mean - x.crib_scores.mean,
-        num_make,
-    )
-    print()
-
-    # 6.
-    print(f"Top {num_make} LEAST crib EU")
-    provide_results(results_in, lambda x: -x.crib_scores.mean, num_make)
-    print()
-
-    # 7.
-    print(f"Top {num_make} MOST crib EU (mean)")
-    provide_results(results_in, lambda x: x.crib_scores.mean, num_make)
+    print(render_text(rank_options(results_in, default_objectives(game_state), num_make)))
 
 
 def provide_results(
@@ -95,7 +98,7 @@ def provide_results(
 ) -> None:
     """
     Function taking the card list,
-    sorting,
+    ranking (without reordering the list),
     printing the top n rows
     and any rows matching the last value
     """
@@ -103,33 +106,23 @@ def provide_results(
     if num_make < 1:
         return
 
-    results_in.sort(reverse=True, key=keyfunc)
+    ranking = rank_options(results_in, [Objective("", "", keyfunc)], num_make)[0]
+    for entry in ranking.entries:
+        print(format_entry(entry))
 
-    # Get the value for the nth place,
-    # we will display all records that are at least this value.
-    final_val = keyfunc(results_in[num_make - 1])
-    last_val = -100.123
 
-    for i_row, result in enumerate(results_in):
-        score = keyfunc(results_in[i_row])
-
-        if score < final_val:
-            break
-
-        print(
-            (
-                f"Discard {{{convert_cardlist_to_str(result.discard, True)}}}, "
-                f"keep {{{convert_cardlist_to_str(result.hand, True)}}}: {score:.2f}"
-                f"{'=' if score == last_val else ''}"
-            )
-        )
-
-        last_val = score
-
-
-def calculate_cribbage_eu(
+def calculate_cribbage_eu(  # pylint: disable=too-many-arguments
     initial_hand: set[Card],
     num_discard: int = 2,
+    joint: bool = False,
+    opponent_ev: bool = False,
+    discard_model: OpponentDiscardModel | None = None,
+    pegging: bool = False,
+    profile: PhaseProfile | None = None,
+    progress: ProgressCallback | None = None,
+    breakdown: bool = False,
+    variant: GameVariant | None = None,
+    in_process: bool | None = None,
 ) -> Iterable[DiscardOption]:
     """
     Calculate the EU for each option of discard to crib.
@@ -147,47 +140,327 @@ def calculate_cribbage_eu(
                 c. Score each combinations (Multi) -> store.
         B. Interpret each score
 
+    If joint is set, the hand and crib are scored together in one pass (see
+    calculate_joint_score_for_option), and each option also carries the net score distribution.
+    If opponent_ev is set, each option also carries an estimate of the opponent's hand score,
+    given the cards in initial_hand.
+    If discard_model is given, each crib deal is weighted by how likely the opponent is to throw
+    those two cards; otherwise all crib deals are equally likely.
+    If pegging is set, each option also carries its expected pegging points (see pegging.py);
+    the opponent's kept cards are weighted by discard_model too, if given.
+    If profile is given, the time spent in each phase is added to it (see profiling.py);
+    including the time in the worker processes.
+    If progress is given, it's called with the work done so far (see progress.py).
+    If breakdown is set, the hand and crib stats are also split up by scoring route.
+    If variant is given, the cards are dealt for that many players (see variants.py); this sets
+    num_discard. Other than for the standard game, options are scored with
+    calculate_variant_score_for_option, and joint, opponent_ev, discard_model, pegging and
+    breakdown aren't available.
+    If in_process is set, the options are worked out in this process, one at a time, rather
+    than starting a pool of worker processes. By default, that's only done for small jobs; a
+    single option, or options scored from the tables of a variant.
     """
 
+    for _, option in calculate_cribbage_eu_batch(
+        [initial_hand],
+        num_discard,
+        joint,
+        opponent_ev,
+        discard_model,
+        pegging,
+        profile,
+        progress,
+        breakdown=breakdown,
+        variant=variant,
+        in_process=in_process,
+    ):
+        yield option
+
+
+def calculate_cribbage_eu_batch(  # pylint: disable=too-many-arguments,too-many-locals
+    initial_hands: list[set[Card]],
+    num_discard: int = 2,
+    joint: bool = False,
+    opponent_ev: bool = False,
+    discard_model: OpponentDiscardModel | None = None,
+    pegging: bool = False,
+    profile: PhaseProfile | None = None,
+    progress: ProgressCallback | None = None,
+    progress_interval: float = 0.5,
+    breakdown: bool = False,
+    variant: GameVariant | None = None,
+    in_process: bool | None = None,
+) -> Iterable[tuple[int, DiscardOption]]:
+    """
+    Calculate the EU for each option of discard to crib, for several hands at once.
+    All the options for all the hands share one pool of worker processes (unless in_process).
+    Yields (index of the hand in initial_hands, option), as each option finishes.
+    Otherwise, the same as calculate_cribbage_eu.
+    """
+    # pylint: disable=too-many-branches,too-many-statements
+
     # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
     # Validation
     # assert(len(initial_hand) == 6)
+    option_func: Callable[..., DiscardOption] = (
+        calculate_joint_score_for_option if joint else calculate_score_for_option
+    )
+    if variant is not None:
+        num_discard = variant.num_discard
+        if any(len(initial_hand) != variant.hand_size for initial_hand in initial_hands):
+            raise ValueError(f"Hands must be {variant.hand_size} cards for {variant.name}")
+        if not variant.is_standard:
+            if joint or opponent_ev or discard_model is not None or pegging or breakdown:
+                raise ValueError(
+                    "joint, opponent_ev, discard_model, pegging and breakdown are only "
+                    "available for the standard game"
+                )
+            option_func = partial(calculate_variant_score_for_option, variant=variant)
 
     # Generate each combination of potential cards to discard to crib
     # Use indicies, as this enables
-    discards = [set(discard) for discard in combinations(initial_hand, num_discard)]
-
-    # Iterate over each option
-    with concurrent.futures.ProcessPoolExecutor() as executor:
-        futures = [
-            executor.submit(calculate_score_for_option, initial_hand - discard, discard)
-            for discard in discards
+    with timed(profile, "discard_generation"):
+        jobs = [
+            (i_hand, initial_hand - set(discard), set(discard))
+            for i_hand, initial_hand in enumerate(initial_hands)
+            for discard in combinations(initial_hand, num_discard)
         ]
-        for result in concurrent.futures.as_completed(futures):
-            yield result.result()
 
+    opponent_hand_evs: list[float | None] = [None] * len(initial_hands)
+    if opponent_ev:
+        # Loads its tables from the package data; only when needed, to keep startup quick
+        from .opponent import (  # pylint: disable=import-outside-toplevel
+            estimate_opponent_hand_ev,
+        )
 
-def calculate_score_for_option(hand: set[Card], discard: set[Card]) -> DiscardOption:
-    """Get the hand and crib scores for a given hand/discard"""
+        opponent_hand_evs = [estimate_opponent_hand_ev(x) for x in initial_hands]
+    if discard_model is not None:
+        # Build the weights once, here, so they're sent to each worker with the model
+        discard_model.pair_weights()
+
+    tracker = None
+    executor_args: dict[str, Any] = {}
+    if progress is not None:
+        tracker = ProgressTracker(
+            sum(option_work_units(52 - len(initial_hands[i_hand])) for i_hand, _, _ in jobs),
+            progress,
+            progress_interval,
+        )
+        executor_args = {"initializer": init_worker_progress, "initargs": (tracker.counter,)}
+
+    if in_process is None:
+        # Starting the workers takes longer than these take to work out
+        in_process = len(jobs) <= 1 or (variant is not None and not variant.is_standard)
+    if profile is not None and not in_process:
+        # Each worker sends back a profile of its own
+        func: Callable[..., Any] = partial(_profiled_option, option_func)
+        args_list = [
+            (hand, discard, discard_model, pegging, breakdown) for _, hand, discard in jobs
+        ]
+    else:
+        func = option_func
+        args_list = [
+            (hand, discard, discard_model, pegging, profile, breakdown)
+            for _, hand, discard in jobs
+        ]
+
+    if in_process:
+        init_worker_progress(None if tracker is None else tracker.counter)
+    try:
+        for i_job, result in run_chunks(
+            func,
+            args_list,
+            in_process=in_process,
+            on_progress=None if tracker is None else tracker.update,
+            progress_interval=None if tracker is None else tracker.interval,
+            **executor_args,
+        ):
+            if profile is None:
+                option = result
+            elif in_process:
+                option = result
+                profile.count("options")
+            else:
+                option, option_profile = result
+                profile.merge(option_profile)
+            i_hand = jobs[i_job][0]
+            option.opponent_hand_ev = opponent_hand_evs[i_hand]
+            yield i_hand, option
+    finally:
+        if in_process:
+            init_worker_progress(None)
+
+
+def _profiled_option(
+    option_func: Callable[..., DiscardOption],
+    hand: set[Card],
+    discard: set[Card],
+    discard_model: OpponentDiscardModel | None,
+    pegging: bool,
+    breakdown: bool,
+) -> tuple[DiscardOption, PhaseProfile]:
+    """
+    Run option_func in a worker, with a profile of its own to send back.
+    Also times pickling the option, as that's what sending it back costs.
+    """
+    profile = PhaseProfile()
+    option = option_func(hand, discard, discard_model, pegging, profile, breakdown)
+    with timed(profile, "ipc_pickling"):
+        profile.count("ipc_bytes", len(pickle.dumps(option)))
+    profile.count("options")
+    return option, profile
+
+
+def calculate_score_for_option(
+    hand: set[Card],
+    discard: set[Card],
+    discard_model: OpponentDiscardModel | None = None,
+    pegging: bool = False,
+    profile: PhaseProfile | None = None,
+    breakdown: bool = False,
+) -> DiscardOption:
+    """
+    Get the hand and crib scores (and optionally pegging) for a given hand/discard
+    If breakdown is set, the stats are also split up by scoring route.
+    """
 
     # What cards remain in hand
     i_discard = discard
     i_hand = hand
+    hand_breakdown: dict[str, list[int]] | None = {} if breakdown else None
+    crib_breakdown: dict[str, list[int]] | None = {} if breakdown else None
 
     # Calculate potential scores from hand
-    hand_scores = calculate_scores_from_hand(i_hand, i_discard)
-    crib_scores = calculate_scores_from_crib(i_hand, i_discard)
+    with timed(profile, "hand_scoring"):
+        hand_scores = calculate_scores_from_hand(i_hand, i_discard, hand_breakdown)
+    report_progress(len(hand_scores))
+    with timed(profile, "crib_enumeration"):
+        crib_scores = calculate_scores_from_crib(i_hand, i_discard, crib_breakdown)
+        crib_weights = (
+            None
+            if discard_model is None
+            else calculate_crib_weights(i_hand, i_discard, discard_model)
+        )
+    report_progress(len(crib_scores))
+    pegging_evs = None
+    if pegging:
+        with timed(profile, "pegging"):
+            pegging_evs = _pegging_evs(i_hand, i_hand | i_discard, discard_model)
 
     # Calculate Stats
-    discard_stats = DiscardOption(
-        i_hand, i_discard, ScoringStats(hand_scores), ScoringStats(crib_scores)
-    )
+    with timed(profile, "stats_construction"):
+        discard_stats = DiscardOption(
+            i_hand,
+            i_discard,
+            ScoringStats(hand_scores, breakdown=hand_breakdown),
+            ScoringStats(crib_scores, crib_weights, crib_breakdown),
+            pegging_evs=pegging_evs,
+        )
 
     return discard_stats
 
 
+def calculate_joint_score_for_option(
+    hand: set[Card],
+    discard: set[Card],
+    discard_model: OpponentDiscardModel | None = None,
+    pegging: bool = False,
+    profile: PhaseProfile | None = None,
+    breakdown: bool = False,
+) -> DiscardOption:
+    """
+    Get the hand, crib and net scores (and optionally pegging) for a given hand/discard,
+    in a single pass.
+    The hand and crib stats are the same as calculate_score_for_option.
+    """
+
+    hand_breakdown: dict[str, list[int]] | None = {} if breakdown else None
+    crib_breakdown: dict[str, list[int]] | None = {} if breakdown else None
+    with timed(profile, "joint_enumeration"):
+        hand_scores, joint_scores = calculate_joint_scores(
+            hand, discard, hand_breakdown, crib_breakdown
+        )
+        crib_weights = (
+            None
+            if discard_model is None
+            else calculate_crib_weights(hand, discard, discard_model)
+        )
+    report_progress(len(hand_scores) + len(joint_scores))
+    pegging_evs = None
+    if pegging:
+        with timed(profile, "pegging"):
+            pegging_evs = _pegging_evs(hand, hand | discard, discard_model)
+
+    with timed(profile, "stats_construction"):
+        return DiscardOption(
+            hand,
+            discard,
+            ScoringStats(hand_scores, breakdown=hand_breakdown),
+            ScoringStats([crib for _, crib in joint_scores], crib_weights, crib_breakdown),
+            JointScoringStats(joint_scores, crib_weights),
+            pegging_evs=pegging_evs,
+        )
+
+
+def _pegging_evs(
+    keep: set[Card], known_cards: set[Card], discard_model: OpponentDiscardModel | None
+) -> tuple[float, float]:
+    """
+    calculate_pegging_evs; only imported when pegging is asked for, to keep startup quick
+    """
+    from .pegging import calculate_pegging_evs  # pylint: disable=import-outside-toplevel
+
+    return calculate_pegging_evs(keep, known_cards, discard_model)
+
+
+def calculate_variant_score_for_option(  # pylint: disable=too-many-arguments
+    hand: set[Card],
+    discard: set[Card],
+    discard_model: OpponentDiscardModel | None = None,
+    pegging: bool = False,
+    profile: PhaseProfile | None = None,
+    breakdown: bool = False,
+    variant: GameVariant | None = None,
+) -> DiscardOption:
+    """
+    Get the hand and crib scores for a given hand/discard, under the rules of a variant; e.g.
+    more players, or five-card cribbage.
+    The crib is scored from the values of the cards (see variants.py), as there are too many
+    deals to score one at a time; the crib stats are weighted by the number of ways of getting
+    each score.
+    The same arguments as calculate_score_for_option; but discard_model, pegging and breakdown
+    aren't available.
+    """
+    if variant is None:
+        raise ValueError("A variant is needed")
+    if discard_model is not None or pegging or breakdown:
+        raise ValueError(
+            "discard_model, pegging and breakdown are only available for the standard game"
+        )
+
+    known_cards = hand | discard
+    unseen = [i_card for i_card in all_possible_cards() if i_card not in known_cards]
+    with timed(profile, "hand_scoring"):
+        hand_scores = variant_hand_scores(hand, unseen, variant)
+    report_progress(len(hand_scores))
+
+    with timed(profile, "crib_enumeration"):
+        crib_counts = crib_score_counts(
+            discard, unseen, variant.num_unknown_crib, variant.crib_flush_needs_starter
+        )
+    # Progress is measured in two player crib deals, so the totals still add up
+    report_progress(option_work_units(52 - len(known_cards)) - len(hand_scores))
+
+    with timed(profile, "stats_construction"):
+        return DiscardOption(
+            hand, discard, ScoringStats(hand_scores), ScoringStats.from_counts(crib_counts)
+        )
+
+
 def calculate_scores_from_hand(
-    hand_cards: set[Card], excluded_cards: set[Card]
+    hand_cards: set[Card],
+    excluded_cards: set[Card],
+    breakdown: dict[str, list[int]] | None = None,
 ) -> list[int]:
     """
     Calculate the scores for the hand
@@ -197,12 +470,21 @@ def calculate_scores_from_hand(
         b. Iterate over a list of all potential cards, except the ones in hand or excluded
         c. determine potential handscore from each option (Multi) -> store.
 
-        When providing status, need to inject in the middle of the loop system, so manually define
-        the loop. Otherwise, can just use the map.
+        Progress is reported by the caller once this is done (see progress.py), so the loop
+        doesn't need to know about it.
+
+    If breakdown is given, the points from each scoring route are added to it, in the same pass.
     """
 
     all_excluded_cards = hand_cards.union(excluded_cards)
 
+    if breakdown is not None:
+        return [
+            _score_with_breakdown(hand_cards, starter_card, breakdown)
+            for starter_card in all_possible_cards()
+            if (starter_card not in all_excluded_cards)
+        ]
+
     results_list = [
         calculate_score(hand_cards, starter_card)
         for starter_card in all_possible_cards()
@@ -212,8 +494,22 @@ def calculate_scores_from_hand(
     return results_list
 
 
+def _score_with_breakdown(
+    hand: set[Card], starter: Card, breakdown: dict[str, list[int]]
+) -> int:
+    """
+    Score the hand, adding the points from each scoring route to the breakdown
+    """
+    this_score = calculate_score_breakdown(hand, starter)
+    for category, points in this_score.items():
+        breakdown.setdefault(category, []).append(points)
+    return sum(this_score.values())
+
+
 def calculate_scores_from_crib(
-    hand_cards: set[Card], discarded_cards: set[Card]
+    hand_cards: set[Card],
+    discarded_cards: set[Card],
+    breakdown: dict[str, list[int]] | None = None,
 ) -> list[int]:
     """
     Calculate the scores for the crib
@@ -222,6 +518,8 @@ def calculate_scores_from_crib(
         a. Generate a list of possible cards in hand.
         b. Generate combinations iterator
         c. Score each combination (Multi) -> store.
+
+    If breakdown is given, the points from each scoring route are added to it, in the same pass.
     """
 
     # Possible cards in hand
@@ -237,13 +535,139 @@ def calculate_scores_from_crib(
     # starter once. This covers the entire possibility space.
     # Alternative is to extract one possible card, and then combination across the rest of the space
     # And that seems too complicated.
+    score_func: Callable[[set[Card], Card], int] = calculate_score
+    if breakdown is not None:
+        score_func = partial(_score_with_breakdown, breakdown=breakdown)
+
+    # The deals are the same for every option; only the cards differ
+    starters, firsts, seconds = (
+        gather(possible_cards, column) for column in crib_deal_indices(len(possible_cards))
+    )
+    return [
+        score_func(discarded_cards.union((first, second)), starter)
+        for starter, first, second in zip(starters, firsts, seconds)
+    ]
+
+
+def calculate_crib_weights(
+    hand_cards: set[Card],
+    discarded_cards: set[Card],
+    discard_model: OpponentDiscardModel,
+) -> list[float]:
+    """
+    Calculate how likely each crib deal is, under the model of the opponent's discard.
+    In the same order as calculate_scores_from_crib; for each combination of 3 unseen cards,
+    each is the starter in turn and the other two are the opponent's discard.
+    """
+
+    all_excluded_cards = hand_cards.union(discarded_cards)
+    possible_cards = [
+        starter_card
+        for starter_card in all_possible_cards()
+        if (starter_card not in all_excluded_cards)
+    ]
+
+    weight = discard_model.weight
+    _, firsts, seconds = crib_deal_indices(len(possible_cards))
+    return list(map(weight, gather(possible_cards, firsts), gather(possible_cards, seconds)))
+
+
+def calculate_joint_scores(
+    hand_cards: set[Card],
+    discarded_cards: set[Card],
+    hand_breakdown: dict[str, list[int]] | None = None,
+    crib_breakdown: dict[str, list[int]] | None = None,
+) -> tuple[list[int], list[tuple[int, int]]]:
+    """
+    Calculate the hand and crib scores together, as they share the same starter.
+
+    Every (starter, opponent discard) outcome is enumerated once, in the same order as
+    calculate_scores_from_crib, and gives a (hand score, crib score) pair.
+    Also returns the hand score for each starter; i.e. calculate_scores_from_hand.
+    Two savings over scoring the hand and crib separately:
+        a. The hand only has one score per starter, so it's scored once per starter.
+        b. The 15s, runs and pairs of the crib don't depend on which card is the starter,
+            so are scored once per combination of 3 unseen cards, rather than once per starter.
+
+    If the breakdowns are given, the points from each scoring route are added to them, in the
+    same pass; for the hand, once per starter, and for the crib, once per crib deal.
+    """
+
+    # Possible cards in hand
+    all_excluded_cards = hand_cards.union(discarded_cards)
+    possible_cards = [
+        starter_card
+        for starter_card in all_possible_cards()
+        if (starter_card not in all_excluded_cards)
+    ]
+
+    if hand_breakdown is None:
+        hand_by_starter = {
+            starter_card: calculate_score(hand_cards, starter_card)
+            for starter_card in possible_cards
+        }
+    else:
+        hand_by_starter = {
+            starter_card: _score_with_breakdown(hand_cards, starter_card, hand_breakdown)
+            for starter_card in possible_cards
+        }
+
+    if crib_breakdown is not None:
+        return list(hand_by_starter.values()), _joint_scores_with_breakdown(
+            possible_cards, discarded_cards, hand_by_starter, crib_breakdown
+        )
+
     results_list = []
     for i_cards_tuple in combinations(possible_cards, 3):
-        i_cards = set(i_cards_tuple)
-        for i_starter in i_cards:
-            # Calculate score
+        i_cards = discarded_cards.union(i_cards_tuple)
+        shared_score = calculate_score_shared(i_card.val for i_card in i_cards)
+        for i_starter in i_cards_tuple:
+            i_crib = i_cards - {i_starter}
             results_list.append(
-                calculate_score(discarded_cards.union(i_cards) - {i_starter}, i_starter)
+                (
+                    hand_by_starter[i_starter],
+                    shared_score
+                    + calculate_score_4_flush(i_crib, i_starter)
+                    + calculate_score_5_nobs(i_crib, i_starter),
+                )
             )
 
+    return list(hand_by_starter.values()), results_list
+
+
+def _joint_scores_with_breakdown(
+    possible_cards: list[Card],
+    discarded_cards: set[Card],
+    hand_by_starter: dict[Card, int],
+    crib_breakdown: dict[str, list[int]],
+) -> list[tuple[int, int]]:
+    """
+    The crib part of calculate_joint_scores, also splitting the crib up by scoring route.
+    The 15s, runs and pairs come from the table of every multiset of 5 values.
+    """
+    shared_breakdowns = shared_breakdown_table()
+    for category in SCORE_CATEGORIES:
+        crib_breakdown.setdefault(category, [])
+    fifteens = crib_breakdown["fifteen"]
+    runs = crib_breakdown["runs"]
+    pairs = crib_breakdown["pairs"]
+    flushes = crib_breakdown["flush"]
+    nobs = crib_breakdown["nobs"]
+
+    results_list = []
+    for i_cards_tuple in combinations(possible_cards, 3):
+        i_cards = discarded_cards.union(i_cards_tuple)
+        shared = shared_breakdowns[tuple(sorted(int(i_card.val) for i_card in i_cards))]
+        shared_score = sum(shared)
+        for i_starter in i_cards_tuple:
+            i_crib = i_cards - {i_starter}
+            flush = calculate_score_4_flush(i_crib, i_starter)
+            nob = calculate_score_5_nobs(i_crib, i_starter)
+            fifteens.append(shared[0])
+            runs.append(shared[1])
+            pairs.append(shared[2])
+            flushes.append(flush)
+            nobs.append(nob)
+            results_list.append((hand_by_starter[i_starter], shared_score + flush + nob))
+
     return results_list
@@ -0,0 +1,216 @@
+# -*- coding: utf-8 -*-
+"""
+A long running analysis engine, for services and bots that analyse many hands.
+
+calculate_cribbage_eu starts a new pool of worker processes for every hand; the engine keeps
+one pool for its whole life. On top of that:
+    Hands are put in canonical form first (see canonical.py), so hands that only differ by
+        suit are the same request.
+    The results for the most recently used hands are kept (an LRUCache, see cache.py),
+        bounded by number of hands and/or approximate bytes.
+    If a hand is asked for while it's already being worked out (e.g. by another thread of a
+        server), the request waits for that result instead of working it out again.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Callable
+
+import concurrent.futures
+import threading
+from itertools import combinations
+
+from .cache import LRUCache
+from .canonical import (
+    CanonicalKey,
+    canonical_hand,
+    card_from_id,
+    relabel_option,
+)
+from .card import Card
+from .cribbage_eu import calculate_joint_score_for_option, calculate_score_for_option
+from .opponent import OpponentDiscardModel, estimate_opponent_hand_ev
+from .stats import DiscardOption
+
+# What's asked for, beyond the cards; (joint, opponent_ev, pegging, breakdown)
+AnalysisSettings = tuple[bool, bool, bool, bool]
+
+_DEFAULT_ENGINE: AnalysisEngine | None = None
+_DEFAULT_ENGINE_LOCK = threading.Lock()
+
+
+class AnalysisEngine:
+    """
+    A pool of worker processes, and the results of recent analyses.
+    Every analysis discards num_discard cards, and uses the same discard_model (if any).
+    Use as a context manager, or call close, to stop the workers.
+    """
+
+    num_discard: int
+    discard_model: OpponentDiscardModel | None
+    computed: int
+    coalesced: int
+    _executor: concurrent.futures.Executor
+    _cache: LRUCache[tuple[CanonicalKey, AnalysisSettings], list[DiscardOption]]
+    _in_flight: dict[tuple[CanonicalKey, AnalysisSettings], concurrent.futures.Future]
+    _lock: threading.Lock
+
+    def __init__(  # pylint: disable=too-many-arguments
+        self,
+        max_workers: int | None = None,
+        cache_size: int | None = 256,
+        num_discard: int = 2,
+        discard_model: OpponentDiscardModel | None = None,
+        executor: concurrent.futures.Executor | None = None,
+        cache_bytes: int | None = None,
+    ) -> None:
+        self.num_discard = num_discard
+        self.discard_model = discard_model
+        if discard_model is not None:
+            # Build the weights once, here, so they're sent to each worker with the model
+            discard_model.pair_weights()
+        self.computed = 0
+        self.coalesced = 0
+        self._executor = executor or concurrent.futures.ProcessPoolExecutor(max_workers)
+        self._cache = LRUCache(cache_size, cache_bytes)
+        self._in_flight = {}
+        self._lock = threading.Lock()
+
+    def submit(  # pylint: disable=too-many-arguments
+        self,
+        initial_hand: set[Card],
+        joint: bool = False,
+        opponent_ev: bool = False,
+        pegging: bool = False,
+        breakdown: bool = False,
+    ) -> tuple[list[concurrent.futures.Future], float | None]:
+        """
+        Start working out each discard option of the hand, on the pool.
+        Gives a future for each option; not cached, or shared with any other request.
+        Also gives the estimate of the opponent's hand, if opponent_ev is set; this is the same
+        for every option, so is left for the caller to add to each.
+        """
+        option_func: Callable[..., DiscardOption] = (
+            calculate_joint_score_for_option if joint else calculate_score_for_option
+        )
+        opponent_hand_ev = estimate_opponent_hand_ev(initial_hand) if opponent_ev else None
+
+        futures = []
+        for discard_tuple in combinations(initial_hand, self.num_discard):
+            discard = set(discard_tuple)
+            future = self._executor.submit(
+                option_func,
+                initial_hand - discard,
+                discard,
+                self.discard_model,
+                pegging,
+                None,
+                breakdown,
+            )
+            futures.append(future)
+        return futures, opponent_hand_ev
+
+    def submit_call(self, func: Callable[..., Any], *args: Any) -> concurrent.futures.Future:
+        """
+        Run any function on the pool; e.g. rescoring an option (see whatif.py)
+        """
+        return self._executor.submit(func, *args)
+
+    def analyse(  # pylint: disable=too-many-arguments
+        self,
+        initial_hand: set[Card],
+        joint: bool = False,
+        opponent_ev: bool = False,
+        pegging: bool = False,
+        breakdown: bool = False,
+    ) -> list[DiscardOption]:
+        """
+        Every discard option of the hand; as calculate_cribbage_eu, but shares results with
+        any earlier or concurrent analysis of the same hand (up to suits).
+        """
+        key, suit_map = canonical_hand(initial_hand)
+        cache_key = (key, (joint, opponent_ev, pegging, breakdown))
+
+        with self._lock:
+            cached = self._cache.get(cache_key)
+            if cached is None and cache_key in self._in_flight:
+                leader = False
+                self.coalesced += 1
+                future = self._in_flight[cache_key]
+            elif cached is None:
+                leader = True
+                self.computed += 1
+                future = concurrent.futures.Future()
+                self._in_flight[cache_key] = future
+
+        if cached is None:
+            if leader:
+                self._compute(cache_key, future)
+            cached = future.result()
+
+        return [relabel_option(option, suit_map, copy_stats=True) for option in cached]
+
+    def _compute(
+        self,
+        cache_key: tuple[CanonicalKey, AnalysisSettings],
+        future: concurrent.futures.Future,
+    ) -> None:
+        """
+        Work out the canonical hand, and give the result to everyone waiting on future
+        """
+        key, (joint, opponent_ev, pegging, breakdown) = cache_key
+        canonical_cards = {card_from_id(i_card) for i_card in key}
+        try:
+            futures, opponent_hand_ev = self.submit(
+                canonical_cards, joint, opponent_ev, pegging, breakdown
+            )
+            results = [option_future.result() for option_future in futures]
+            for option in results:
+                option.opponent_hand_ev = opponent_hand_ev
+        except BaseException as exc:
+            with self._lock:
+                del self._in_flight[cache_key]
+            future.set_exception(exc)
+            raise
+
+        with self._lock:
+            del self._in_flight[cache_key]
+            self._cache.put(cache_key, results)
+        future.set_result(results)
+
+    def stats(self) -> dict[str, int]:
+        """
+        How requests have been answered; the cache's stats (see LRUCache.stats), and how many
+        hands have been worked out, or waited on another request for the same hand
+        """
+        with self._lock:
+            return {
+                **self._cache.stats(),
+                "computed": self.computed,
+                "coalesced": self.coalesced,
+                "in_flight": len(self._in_flight),
+            }
+
+    def close(self) -> None:
+        """
+        Stop the worker processes
+        """
+        self._executor.shutdown(cancel_futures=True)
+
+    def __enter__(self) -> AnalysisEngine:
+        return self
+
+    def __exit__(self, *_exc_info) -> None:
+        self.close()
+
+
+def default_engine() -> AnalysisEngine:
+    """
+    An engine shared by everything in this process that doesn't bring its own.
+    Started the first time it's needed; its workers stop when the process exits.
+    """
+    global _DEFAULT_ENGINE  # pylint: disable=global-statement
+    with _DEFAULT_ENGINE_LOCK:
+        if _DEFAULT_ENGINE is None:
+            _DEFAULT_ENGINE = AnalysisEngine()
+        return _DEFAULT_ENGINE
@@ -0,0 +1,281 @@
+# -*- coding: utf-8 -*-
+"""
+Models of the opponent: estimates of their hand, and of what they throw into the crib.
+
+Opponent's hand
+---------------
+Estimates of the opponent's hand, given the cards you can see.
+
+The opponent's hand doesn't depend on what you discard, but it does depend on the six cards you
+were dealt; as those are cards the opponent can't hold.
+Averaging the opponent's best keep over all C(46, 6) hands they could hold is too slow to do
+directly, so this works on multisets of card values instead:
+    1. For each multiset of 6 values the opponent could hold, take the best expected score of
+        the 4 they keep (the keep_value_table). This is built once per process.
+    2. Weight each multiset by how many ways it can be dealt from the 46 unseen cards.
+    3. Add the expected score from nobs, which depends on the suits.
+
+Assumptions:
+    The opponent keeps the 4 cards with the best expected hand score, ignoring the crib.
+    The starter for the opponent's hand is drawn from the deck less their own 4 cards.
+    Flushes are not counted.
+
+Opponent's discard
+------------------
+Models of which two cards the opponent throws into the crib, used to weight each crib deal.
+Each model gives a weight for each pair of card values; how much more (or less) likely the
+opponent is to throw that pair than if they threw two random cards. The table is built once
+per model, so weighting a crib deal is a single lookup.
+    UniformDiscardModel: all pairs are equally likely; the same as not using a model.
+    GreedyDiscardModel: the opponent keeps the 4 cards with the best expected hand score,
+        plus (their crib) or minus (your crib) what the two discarded cards bring to the crib.
+    EmpiricalDiscardModel: observed frequencies of each thrown pair, loaded from a file.
+"""
+
+from __future__ import annotations
+
+from collections import defaultdict
+from functools import cache
+from itertools import combinations
+from math import comb, prod
+
+import abc
+import json
+
+from .card import Card
+from .cardenums import CardSuit, CardVal
+from .tables import (
+    NUM_SUITS,
+    NUM_VALS,
+    keep_value_table,
+    pair_crib_value_table,
+    val_multisets,
+)
+
+ValPair = tuple[int, ...]
+
+
+@cache
+def opponent_keep_table() -> list[tuple[tuple[tuple[int, int], ...], float]]:
+    """
+    For each multiset of 6 values the opponent could be dealt, the best expected score
+    of the 4 they keep.
+    Each multiset is given as (value, count) pairs, ready to weight against the unseen cards.
+    Built on first use.
+    """
+    keep_values = keep_value_table()
+    table = []
+    for vals in val_multisets(6):
+        best = max(keep_values[keep] for keep in set(combinations(vals, 4)))
+        counts = tuple((val, vals.count(val)) for val in sorted(set(vals)))
+        table.append((counts, best))
+    return table
+
+
+def estimate_opponent_hand_ev(known_cards: set[Card]) -> float:
+    """
+    Estimate the opponent's expected hand score, given the cards you hold.
+    """
+    unseen = [NUM_SUITS] * (NUM_VALS + 1)
+    for i_card in known_cards:
+        unseen[i_card.val] -= 1
+
+    return _estimate_vals_ev(tuple(unseen)) + _estimate_nobs_ev(known_cards)
+
+
+@cache
+def _estimate_vals_ev(unseen: tuple[int, ...]) -> float:
+    """
+    Expected 15s/runs/pairs score of the opponent's kept hand.
+    unseen is the number of cards of each value the opponent could hold (indexed by value).
+    Cached, as it only depends on the values you hold.
+    """
+    total = 0.0
+    for counts, best in opponent_keep_table():
+        ways = prod(comb(unseen[val], count) for val, count in counts)
+        if ways:
+            total += ways * best
+    return total / comb(sum(unseen), 6)
+
+
+def _estimate_nobs_ev(known_cards: set[Card]) -> float:
+    """
+    Expected score from nobs in the opponent's kept hand.
+    Each jack you can't see is kept by the opponent 4 times in (number of unseen cards),
+    and scores if the starter is one of the other unseen cards in its suit; the starter is
+    equally likely to be any of the other unseen cards.
+    """
+    num_unseen = NUM_VALS * NUM_SUITS - len(known_cards)
+    total = 0.0
+    for i_suit_cards in _cards_by_suit(known_cards).values():
+        if any(i_card.val == CardVal.VAL_J for i_card in i_suit_cards):
+            continue
+        same_suit_unseen = NUM_VALS - len(i_suit_cards) - 1
+        total += (4 / num_unseen) * same_suit_unseen / (num_unseen - 1)
+    return total
+
+
+def _cards_by_suit(cards: set[Card]) -> dict[CardSuit, list[Card]]:
+    """
+    Split the cards up by suit, including suits with no cards
+    """
+    by_suit: dict[CardSuit, list[Card]] = {i_suit: [] for i_suit in CardSuit}
+    for i_card in cards:
+        by_suit[i_card.suit].append(i_card)
+    return by_suit
+
+
+class OpponentDiscardModel(abc.ABC):
+    """
+    Base model of the opponent's discard.
+    Subclasses provide _build_pair_weights; the table is built on first use, and kept with the
+    model (so it's sent along with the model to worker processes, if built before then).
+    """
+
+    _pair_weights: dict[ValPair, float] | None = None
+
+    def pair_weights(self) -> dict[ValPair, float]:
+        """
+        The weight of each pair of card values, as a sorted tuple of two values.
+        """
+        if self._pair_weights is None:
+            self._pair_weights = self._build_pair_weights()
+        return self._pair_weights
+
+    def cache_key(self) -> tuple[str, tuple[tuple[ValPair, float], ...]]:
+        """
+        What the model is, rather than which object it is; for keying caches.
+        Models of the same class with the same pair weights have the same key.
+        """
+        return type(self).__name__, tuple(sorted(self.pair_weights().items()))
+
+    def weight(self, first: Card, second: Card) -> float:
+        """
+        The weight of the opponent throwing these two cards
+        """
+        return self.pair_weights()[_val_pair(first.val, second.val)]
+
+    @abc.abstractmethod
+    def _build_pair_weights(self) -> dict[ValPair, float]:
+        """
+        The weight of each pair of card values; see pair_weights
+        """
+
+
+class UniformDiscardModel(OpponentDiscardModel):
+    """
+    The opponent throws two cards at random.
+    """
+
+    def _build_pair_weights(self) -> dict[ValPair, float]:
+        return {pair: 1.0 for pair in val_multisets(2)}
+
+
+class GreedyDiscardModel(OpponentDiscardModel):
+    """
+    The opponent keeps whichever 4 cards give the best expected hand + crib (if it's their crib)
+    or hand - crib (if it's your crib).
+    """
+
+    opponent_is_dealer: bool
+
+    def __init__(self, opponent_is_dealer: bool = False) -> None:
+        self.opponent_is_dealer = opponent_is_dealer
+
+    def _build_pair_weights(self) -> dict[ValPair, float]:
+        return _greedy_pair_weights(self.opponent_is_dealer)
+
+
+class EmpiricalDiscardModel(OpponentDiscardModel):
+    """
+    Weights from how often each pair of values has been seen thrown into the crib.
+
+    The file is JSON, mapping each pair of values (written like the cards, without the suits)
+    to the number of times it was thrown. E.g. {"5X": 12, "AK": 3, "55": 1}.
+    Pairs not in the file are never thrown.
+    """
+
+    counts: dict[ValPair, float]
+
+    def __init__(self, counts: dict[ValPair, float]) -> None:
+        self.counts = counts
+
+    @classmethod
+    def from_file(cls, path: str) -> EmpiricalDiscardModel:
+        """
+        Load the observed counts from a JSON file
+        """
+        with open(path, encoding="utf-8") as counts_file:
+            raw_counts = json.load(counts_file)
+
+        counts: dict[ValPair, float] = defaultdict(float)
+        for pair_str, count in raw_counts.items():
+            if len(pair_str) != 2:
+                raise ValueError(f"Pair of values must be 2 characters, got '{pair_str}'")
+            first, second = map(CardVal.from_str, pair_str)
+            counts[_val_pair(first, second)] += float(count)
+        return cls(dict(counts))
+
+    def _build_pair_weights(self) -> dict[ValPair, float]:
+        return _normalise_pair_weights(
+            {pair: self.counts.get(pair, 0.0) for pair in val_multisets(2)}
+        )
+
+
+def _val_pair(first: int, second: int) -> ValPair:
+    """
+    Key for a pair of values
+    """
+    return (int(first), int(second)) if first <= second else (int(second), int(first))
+
+
+def _random_pair_frequency(pair: ValPair) -> int:
+    """
+    How many ways there are of picking two cards with these values from a full deck.
+    """
+    if pair[0] == pair[1]:
+        return comb(NUM_SUITS, 2)
+    return NUM_SUITS * NUM_SUITS
+
+
+def _normalise_pair_weights(frequencies: dict[ValPair, float]) -> dict[ValPair, float]:
+    """
+    Turn the frequency each pair is thrown into a weight relative to throwing two random cards.
+    Scaled so throwing two random cards has an average weight of 1.
+    """
+    total_frequency = sum(frequencies.values())
+    if not total_frequency:
+        raise ValueError("No pairs are ever thrown")
+    total_random = sum(_random_pair_frequency(pair) for pair in frequencies)
+    return {
+        pair: (frequency / total_frequency) / (_random_pair_frequency(pair) / total_random)
+        for pair, frequency in frequencies.items()
+    }
+
+
+@cache
+def _greedy_pair_weights(opponent_is_dealer: bool) -> dict[ValPair, float]:
+    """
+    Weights for the GreedyDiscardModel.
+    Find the best discard for every multiset of 6 values the opponent could be dealt,
+    and count how often each pair is thrown.
+    """
+    keep_values = keep_value_table()
+    crib_values = pair_crib_value_table()
+    crib_sign = 1 if opponent_is_dealer else -1
+
+    frequencies: dict[ValPair, float] = {pair: 0.0 for pair in val_multisets(2)}
+    for vals in val_multisets(6):
+        best_value = None
+        best_discard = vals[:2]
+        for discard_idx in combinations(range(6), 2):
+            keep = tuple(val for i, val in enumerate(vals) if i not in discard_idx)
+            discard = (vals[discard_idx[0]], vals[discard_idx[1]])
+            value = keep_values[keep] + crib_sign * crib_values[discard]
+            if best_value is None or value > best_value:
+                best_value = value
+                best_discard = discard
+
+        frequencies[best_discard] += prod(comb(NUM_SUITS, vals.count(val)) for val in set(vals))
+
+    return _normalise_pair_weights(frequencies)
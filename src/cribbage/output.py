@@ -0,0 +1,468 @@
+# -*- coding: utf-8 -*-
+"""
+Writing the results of an analysis to a file, as they're made.
+
+Each discard option is a row: the hand index (for batches), the cards kept and discarded,
+the stats of the hand and crib scores, and any extras (opponent's hand, pegging) that were
+calculated; these are NaN (or empty/null) if not. Optionally, the chance of each hand and crib
+score (0-29) can be added.
+
+Formats, picked by file extension in open_writer:
+    .jsonl: a JSON object per line; for pipelines
+    .csv: for spreadsheets
+    .npy: a NumPy structured array, one record per row; for millions of rows.
+        The file can be appended to, and loaded with numpy.load(path, mmap_mode="r").
+        NumPy isn't needed to write it.
+
+Rows are formatted straight into a buffer, which is written out when full.
+
+read_results reads the rows back, from any of the formats; e.g. for the indexes of
+resultindex.py.
+"""
+
+from __future__ import annotations
+
+from typing import IO, Iterable, Iterator
+
+import abc
+import ast
+import csv
+import json
+import math
+import struct
+from pathlib import Path
+
+from .stats import DiscardOption, ScoringStats, points_distribution
+
+# Bins in each score histogram; 29 is the highest possible score
+HISTOGRAM_BINS = 30
+
+# Columns of stats, after hand_idx, keep and discard
+STAT_COLUMNS = (
+    "hand_mean",
+    "hand_median",
+    "hand_stdev",
+    "hand_min",
+    "hand_max",
+    "crib_mean",
+    "crib_median",
+    "crib_stdev",
+    "crib_min",
+    "crib_max",
+    "opponent_hand_ev",
+    "dealer_pegging_ev",
+    "pone_pegging_ev",
+)
+
+# Space for the card strings in the .npy file; e.g. b"5H5SJDXC"
+_NPY_KEEP_SIZE = 10
+_NPY_DISCARD_SIZE = 6
+_NPY_MAGIC = b"\x93NUMPY\x01\x00"
+_NPY_ALIGN = 64
+
+
+def option_stats(option: DiscardOption) -> tuple[float, ...]:
+    """
+    The values of STAT_COLUMNS for an option; NaN if not calculated
+    """
+    hand = option.hand_scores
+    crib = option.crib_scores
+    return (
+        hand.mean,
+        hand.median,
+        hand.stdev,
+        hand.min,
+        hand.max,
+        crib.mean,
+        crib.median,
+        crib.stdev,
+        crib.min,
+        crib.max,
+        math.nan if option.opponent_hand_ev is None else option.opponent_hand_ev,
+        math.nan if option.dealer_pegging_ev is None else option.dealer_pegging_ev,
+        math.nan if option.pone_pegging_ev is None else option.pone_pegging_ev,
+    )
+
+
+def score_histogram(stats: ScoringStats) -> list[float]:
+    """
+    The chance of each score, 0 to HISTOGRAM_BINS - 1
+    """
+    histogram = [0.0] * HISTOGRAM_BINS
+    for score, chance in points_distribution(stats.possible_scores, stats.weights).items():
+        histogram[score] = chance
+    return histogram
+
+
+def _card_strs(cards: Iterable) -> list[str]:
+    return [str(i_card) for i_card in sorted(cards)]
+
+
+class ResultWriter(abc.ABC):
+    """
+    Base class of the writers; use as a context manager, or call close.
+    """
+
+    path: Path
+    histograms: bool
+    rows_written: int
+    _buffer_size: int
+    _file: IO[bytes]
+
+    def __init__(
+        self, path: str | Path, histograms: bool = False, buffer_size: int = 1 << 16
+    ) -> None:
+        self.path = Path(path)
+        self.histograms = histograms
+        self.rows_written = 0
+        self._buffer_size = buffer_size
+
+    @abc.abstractmethod
+    def write(self, option: DiscardOption, hand_idx: int = 0) -> None:
+        """
+        Write one option
+        """
+
+    def write_all(self, results: Iterable[tuple[int, DiscardOption]]) -> int:
+        """
+        Write (hand index, option) pairs, e.g. from calculate_cribbage_eu_batch.
+        Returns the number written.
+        """
+        start = self.rows_written
+        for hand_idx, option in results:
+            self.write(option, hand_idx)
+        return self.rows_written - start
+
+    @abc.abstractmethod
+    def flush(self) -> None:
+        """
+        Write out anything buffered
+        """
+
+    def close(self) -> None:
+        """
+        Flush and close the file
+        """
+        self.flush()
+        self._file.close()
+
+    def __enter__(self) -> ResultWriter:
+        return self
+
+    def __exit__(self, *_exc_info) -> None:
+        self.close()
+
+
+class _TextWriter(ResultWriter):
+    """
+    Writers of lines of text; lines are kept in a list until there's enough to write.
+    """
+
+    _lines: list[str]
+    _buffered: int
+
+    def __init__(
+        self, path: str | Path, histograms: bool = False, buffer_size: int = 1 << 16
+    ) -> None:
+        super().__init__(path, histograms, buffer_size)
+        self._lines = []
+        self._buffered = 0
+
+    def _add_line(self, line: str) -> None:
+        self._lines.append(line)
+        self._buffered += len(line)
+        self.rows_written += 1
+        if self._buffered >= self._buffer_size:
+            self.flush()
+
+    def flush(self) -> None:
+        if self._lines:
+            self._file.write("".join(self._lines).encode("utf-8"))
+            self._lines.clear()
+            self._buffered = 0
+        self._file.flush()
+
+
+def _json_num(value: float) -> str:
+    return "null" if math.isnan(value) else repr(value)
+
+
+class JsonlWriter(_TextWriter):
+    """
+    A JSON object per option, one per line.
+    Cards are lists of strings, e.g. ["5H", "XC"]; histograms are lists of chances.
+    """
+
+    def __init__(
+        self, path: str | Path, histograms: bool = False, buffer_size: int = 1 << 16
+    ) -> None:
+        super().__init__(path, histograms, buffer_size)
+        self._file = open(self.path, "ab")  # pylint: disable=consider-using-with
+
+    def write(self, option: DiscardOption, hand_idx: int = 0) -> None:
+        keep = '", "'.join(_card_strs(option.hand))
+        discard = '", "'.join(_card_strs(option.discard))
+        stats = ", ".join(
+            f'"{name}": {_json_num(value)}'
+            for name, value in zip(STAT_COLUMNS, option_stats(option))
+        )
+        line = (
+            f'{{"hand_idx": {hand_idx}, "keep": ["{keep}"], "discard": ["{discard}"], '
+            + stats
+        )
+        if self.histograms:
+            hand_hist = ", ".join(map(repr, score_histogram(option.hand_scores)))
+            crib_hist = ", ".join(map(repr, score_histogram(option.crib_scores)))
+            line += f', "hand_histogram": [{hand_hist}], "crib_histogram": [{crib_hist}]'
+        self._add_line(line + "}\n")
+
+
+def _csv_num(value: float) -> str:
+    return "" if math.isnan(value) else repr(value)
+
+
+class CsvWriter(_TextWriter):
+    """
+    A row per option, with a header if the file is new.
+    Cards are space separated; histograms are a column per score (hand_p0, ..., crib_p29).
+    Stats that weren't calculated are empty.
+    """
+
+    def __init__(
+        self, path: str | Path, histograms: bool = False, buffer_size: int = 1 << 16
+    ) -> None:
+        super().__init__(path, histograms, buffer_size)
+        new_file = not self.path.exists() or self.path.stat().st_size == 0
+        self._file = open(self.path, "ab")  # pylint: disable=consider-using-with
+        if new_file:
+            header = ["hand_idx", "keep", "discard", *STAT_COLUMNS]
+            if histograms:
+                header += [f"hand_p{i}" for i in range(HISTOGRAM_BINS)]
+                header += [f"crib_p{i}" for i in range(HISTOGRAM_BINS)]
+            self._lines.append(",".join(header) + "\n")
+
+    def write(self, option: DiscardOption, hand_idx: int = 0) -> None:
+        keep = " ".join(_card_strs(option.hand))
+        discard = " ".join(_card_strs(option.discard))
+        line = f"{hand_idx},{keep},{discard}," + ",".join(map(_csv_num, option_stats(option)))
+        if self.histograms:
+            line += "," + ",".join(map(repr, score_histogram(option.hand_scores)))
+            line += "," + ",".join(map(repr, score_histogram(option.crib_scores)))
+        self._add_line(line + "\n")
+
+
+def npy_descr(histograms: bool = False) -> list[tuple]:
+    """
+    The NumPy dtype of the records in the .npy file, as it's written in the header
+    """
+    descr: list[tuple] = [
+        ("hand_idx", "<i8"),
+        ("keep", f"|S{_NPY_KEEP_SIZE}"),
+        ("discard", f"|S{_NPY_DISCARD_SIZE}"),
+    ]
+    descr += [(name, "<f8") for name in STAT_COLUMNS]
+    if histograms:
+        descr += [
+            ("hand_histogram", "<f8", (HISTOGRAM_BINS,)),
+            ("crib_histogram", "<f8", (HISTOGRAM_BINS,)),
+        ]
+    return descr
+
+
+def _npy_header(descr: list[tuple], num_rows: int, length: int | None = None) -> bytes:
+    """
+    The .npy (version 1.0) header; padded to length if given, else to fit any number of rows
+    """
+    header = f"{{'descr': {descr!r}, 'fortran_order': False, 'shape': ({num_rows},), }}"
+    if length is None:
+        # Leave room for the row count to grow, so the header can be rewritten in place
+        longest = len(_NPY_MAGIC) + 2 + len(header) + 20 + 1
+        length = -(-longest // _NPY_ALIGN) * _NPY_ALIGN
+    padding = length - len(_NPY_MAGIC) - 2 - len(header) - 1
+    if padding < 0:
+        raise ValueError("Too many rows for the .npy header")
+    header += " " * padding + "\n"
+    return _NPY_MAGIC + struct.pack("<H", len(header)) + header.encode("latin1")
+
+
+def read_npy_header(path: str | Path) -> tuple[list[tuple], int, int]:
+    """
+    Read the header of a .npy file; gives (descr, number of rows, length of the header)
+    """
+    with open(path, "rb") as file:
+        magic = file.read(len(_NPY_MAGIC))
+        if magic != _NPY_MAGIC:
+            raise ValueError(f"{path} isn't a version 1.0 .npy file")
+        (header_len,) = struct.unpack("<H", file.read(2))
+        header = ast.literal_eval(file.read(header_len).decode("latin1"))
+    if header["fortran_order"] or len(header["shape"]) != 1:
+        raise ValueError(f"{path} isn't a 1D array of records")
+    return header["descr"], header["shape"][0], len(_NPY_MAGIC) + 2 + header_len
+
+
+class NpyWriter(ResultWriter):
+    """
+    A NumPy structured array, one record per option; see npy_descr.
+    Records are packed into a fixed size buffer. If the file exists, the records are added
+    on the end (it must have the same columns). The row count in the header is updated on
+    flush; so the file is only a valid array of all the rows after flush or close.
+    """
+
+    _descr: list[tuple]
+    _header_len: int
+    _record: struct.Struct
+    _buffer: bytearray
+    _buffered_rows: int
+    _rows_in_file: int
+
+    def __init__(
+        self, path: str | Path, histograms: bool = False, buffer_size: int = 1 << 16
+    ) -> None:
+        super().__init__(path, histograms, buffer_size)
+        self._descr = npy_descr(histograms)
+        self._record = struct.Struct(
+            f"<q{_NPY_KEEP_SIZE}s{_NPY_DISCARD_SIZE}s{len(STAT_COLUMNS)}d"
+            + (f"{2 * HISTOGRAM_BINS}d" if histograms else "")
+        )
+
+        if self.path.exists() and self.path.stat().st_size > 0:
+            descr, self._rows_in_file, self._header_len = read_npy_header(self.path)
+            if descr != self._descr:
+                raise ValueError(f"{self.path} has different columns")
+            self._file = open(self.path, "r+b")  # pylint: disable=consider-using-with
+            self._file.seek(self._header_len + self._rows_in_file * self._record.size)
+            self._file.truncate()
+        else:
+            header = _npy_header(self._descr, 0)
+            self._header_len = len(header)
+            self._rows_in_file = 0
+            self._file = open(self.path, "wb")  # pylint: disable=consider-using-with
+            self._file.write(header)
+
+        self._buffer = bytearray(max(buffer_size // self._record.size, 1) * self._record.size)
+        self._buffered_rows = 0
+
+    def write(self, option: DiscardOption, hand_idx: int = 0) -> None:
+        values = option_stats(option)
+        if self.histograms:
+            values += tuple(score_histogram(option.hand_scores))
+            values += tuple(score_histogram(option.crib_scores))
+        self._record.pack_into(
+            self._buffer,
+            self._buffered_rows * self._record.size,
+            hand_idx,
+            "".join(_card_strs(option.hand)).encode("ascii"),
+            "".join(_card_strs(option.discard)).encode("ascii"),
+            *values,
+        )
+        self._buffered_rows += 1
+        self.rows_written += 1
+        if (self._buffered_rows + 1) * self._record.size > len(self._buffer):
+            self.flush()
+
+    def flush(self) -> None:
+        if self._buffered_rows:
+            used = self._buffered_rows * self._record.size
+            self._file.write(memoryview(self._buffer)[:used])
+            self._rows_in_file += self._buffered_rows
+            self._buffered_rows = 0
+
+        # Update the row count
+        end = self._file.tell()
+        self._file.seek(0)
+        self._file.write(_npy_header(self._descr, self._rows_in_file, self._header_len))
+        self._file.seek(end)
+        self._file.flush()
+
+
+WRITERS: dict[str, type[ResultWriter]] = {
+    ".jsonl": JsonlWriter,
+    ".csv": CsvWriter,
+    ".npy": NpyWriter,
+}
+
+
+def open_writer(path: str | Path, histograms: bool = False) -> ResultWriter:
+    """
+    A writer for the file, picked by its extension
+    """
+    suffix = Path(path).suffix.lower()
+    if suffix not in WRITERS:
+        raise ValueError(
+            f"Unknown output format {suffix!r}; expected one of {sorted(WRITERS)}"
+        )
+    return WRITERS[suffix](path, histograms)
+
+
+# A row read back; (hand index, cards kept, cards discarded, values of STAT_COLUMNS)
+# The cards are strings, e.g. "5H"; stats that weren't calculated are NaN.
+ResultRow = tuple[int, list[str], list[str], tuple[float, ...]]
+
+
+def _read_jsonl(path: Path) -> Iterator[ResultRow]:
+    with open(path, encoding="utf-8") as file:
+        for line in file:
+            if not line.strip():
+                continue
+            row = json.loads(line)
+            yield (
+                row["hand_idx"],
+                row["keep"],
+                row["discard"],
+                tuple(math.nan if row[x] is None else float(row[x]) for x in STAT_COLUMNS),
+            )
+
+
+def _read_csv(path: Path) -> Iterator[ResultRow]:
+    with open(path, encoding="utf-8", newline="") as file:
+        for row in csv.DictReader(file):
+            yield (
+                int(row["hand_idx"]),
+                row["keep"].split(),
+                row["discard"].split(),
+                tuple(float(row[x]) if row[x] else math.nan for x in STAT_COLUMNS),
+            )
+
+
+def _split_cards(packed: bytes) -> list[str]:
+    text = packed.rstrip(b"\0").decode("ascii")
+    return [text[i : i + 2] for i in range(0, len(text), 2)]
+
+
+def _read_npy(path: Path) -> Iterator[ResultRow]:
+    descr, num_rows, header_len = read_npy_header(path)
+    if descr not in (npy_descr(False), npy_descr(True)):
+        raise ValueError(f"{path} wasn't written by NpyWriter")
+    record = struct.Struct(
+        f"<q{_NPY_KEEP_SIZE}s{_NPY_DISCARD_SIZE}s{len(STAT_COLUMNS)}d"
+        + (f"{2 * HISTOGRAM_BINS}d" if descr == npy_descr(True) else "")
+    )
+    with open(path, "rb") as file:
+        file.seek(header_len)
+        for values in record.iter_unpack(file.read(num_rows * record.size)):
+            yield (
+                values[0],
+                _split_cards(values[1]),
+                _split_cards(values[2]),
+                values[3 : 3 + len(STAT_COLUMNS)],
+            )
+
+
+READERS = {
+    ".jsonl": _read_jsonl,
+    ".csv": _read_csv,
+    ".npy": _read_npy,
+}
+
+
+def read_results(path: str | Path) -> Iterator[ResultRow]:
+    """
+    The rows of a file written by one of the writers, in order; picked by its extension.
+    Histograms aren't read.
+    """
+    suffix = Path(path).suffix.lower()
+    if suffix not in READERS:
+        raise ValueError(
+            f"Unknown output format {suffix!r}; expected one of {sorted(READERS)}"
+        )
+    return READERS[suffix](Path(path))
@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+"""
+Running independent chunks of work on a pool of worker processes; or in this process, when
+starting the workers would take longer than it saves.
+
+Used by the analysis (each option), cribbage verify (each chunk of hands) and cribbage
+simulate (each shard of deals). concurrent.futures is slow to import, so it's only imported
+when a pool is started.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Callable, Iterator, Sequence, TypeVar
+
+R = TypeVar("R")
+
+
+def run_chunks(  # pylint: disable=too-many-arguments
+    func: Callable[..., R],
+    args_list: Sequence[tuple],
+    max_workers: int | None = None,
+    in_process: bool | None = None,
+    on_progress: Callable[[], None] | None = None,
+    progress_interval: float | None = None,
+    **executor_args: Any,
+) -> Iterator[tuple[int, R]]:
+    """
+    func(*args) for each args in args_list; yields (index of the args, result) as each
+    finishes, so in any order from the pool.
+    By default, runs in this process if there's only one chunk, or only one worker.
+    on_progress is called after each result in this process; with the pool, each time a result
+    comes back, and at least every progress_interval seconds while waiting.
+    executor_args are passed to the ProcessPoolExecutor (e.g. initializer); they aren't used
+    in this process.
+    """
+    if in_process is None:
+        in_process = len(args_list) <= 1 or max_workers == 1
+    if in_process:
+        for index, args in enumerate(args_list):
+            result = func(*args)
+            if on_progress is not None:
+                on_progress()
+            yield index, result
+        return
+
+    import concurrent.futures  # pylint: disable=import-outside-toplevel
+
+    with concurrent.futures.ProcessPoolExecutor(max_workers, **executor_args) as executor:
+        futures = {executor.submit(func, *args): index for index, args in enumerate(args_list)}
+        pending = set(futures)
+        while pending:
+            done, pending = concurrent.futures.wait(
+                pending,
+                timeout=None if on_progress is None else progress_interval,
+                return_when=concurrent.futures.FIRST_COMPLETED,
+            )
+            if on_progress is not None:
+                on_progress()
+            for future in done:
+                yield futures[future], future.result()
@@ -0,0 +1,629 @@
+# -*- coding: utf-8 -*-
+"""
+Expected points from pegging (the play), for a kept hand.
+
+https://en.wikipedia.org/wiki/Rules_of_cribbage#The_play
+Scoring routes, for the card just played:
+    1. Running count reaches 15, 2 points; reaches 31, 2 points.
+    2. Pairs - the card just played and the cards directly before it of the same value;
+        2 for a pair, 6 for three, 12 for four.
+    3. Runs - the longest run made by the card just played and the cards directly before it,
+        in any order; 1 point per card.
+    4. Go - when neither player can play, the last player to play scores 1 (unless it made 31).
+        This includes the last card of all.
+
+Pegging only depends on the card values, not the suits, so hands are sorted tuples of values
+(Ace = 1, King = 13); the same as in tables.py.
+
+Neither player can see the other's cards, so the play is searched with chance nodes, from your
+point of view (expectimax):
+    - The opponent's hand is a belief: every 4 values they could have kept, each weighted by how
+        many ways it can be dealt from the unseen cards (and, given a model of their discard,
+        how likely they are to have kept it; see weighted_opponent_hands).
+    - On your turn, you pick the play with the best expected value over that belief; the same
+        play whatever the opponent actually holds.
+    - On the opponent's turn, each hand in the belief plays what the opponent would play with
+        it (see opponent_play). So the opponent's play is a chance node, and each play (or go)
+        leaves the belief narrowed down to the hands that would have made it.
+The opponent picks its play against the cards it hasn't seen: the points it scores less the
+points of your best reply, expected over the hands you could hold. It doesn't look further
+ahead than your reply; your side is searched to the end.
+
+Every position searched is kept in a table (a transposition table), as are the opponent's
+plays; the same positions come up again and again, by plays in a different order, and in the
+other options of the hand, which share an engine (see hand_engine). Plays are tried highest
+scoring first, so the opponent's policy can stop as soon as nothing left can beat its best.
+
+Assumptions:
+    The starter doesn't change the pegging, other than being one fewer unseen card; so it's
+    ignored.
+    The opponent doesn't know which cards you threw into the crib, and doesn't count the cards
+    it threw itself as seen.
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Callable
+
+import threading
+from collections import defaultdict
+from functools import cache
+from itertools import combinations
+from math import comb, prod
+
+from .card import Card
+from .tables import NUM_SUITS, NUM_VALS, val_multisets
+
+if TYPE_CHECKING:
+    from .opponent import OpponentDiscardModel
+
+Hand = tuple[int, ...]
+
+Belief = tuple[tuple[Hand, float], ...]
+
+# The engine of the hand being worked out, and its cards; see hand_engine
+_HAND_ENGINE: tuple[frozenset[Card], PeggingEngine] | None = None
+_HAND_ENGINE_LOCK = threading.Lock()
+
+
+def peg_value(val: int) -> int:
+    """
+    Value of a card towards the running count; picture cards are 10.
+    """
+    return min(val, 10)
+
+
+# peg_value of each value, for the search
+_PEG_VALUES = tuple(peg_value(val) for val in range(NUM_VALS + 1))
+
+
+def score_play(played: Hand, count: int) -> int:
+    """
+    Points for the last card in played, given the count after playing it.
+    played is the values played since the count was last reset.
+    """
+    score = 0
+    if count in (15, 31):
+        score += 2
+
+    # Pairs; trailing cards of the same value
+    last = played[-1]
+    num_same = 1
+    for val in reversed(played[:-1]):
+        if val != last:
+            break
+        num_same += 1
+    score += num_same * (num_same - 1)
+
+    # Runs; the longest tail that's a run
+    for length in range(len(played), 2, -1):
+        tail = sorted(played[-length:])
+        if all(tail[i] + 1 == tail[i + 1] for i in range(length - 1)):
+            score += length
+            break
+
+    return score
+
+
+def relevant_tail(played: Hand) -> Hand:
+    """
+    The part of the played values that can still score.
+    A run can't include the same value twice, so only the longest tail with no repeated values
+    can be part of a future run; pairs only need the trailing cards of the same value.
+    """
+    seen = set()
+    start = len(played)
+    while start and played[start - 1] not in seen:
+        start -= 1
+        seen.add(played[start])
+
+    num_same = 1
+    while num_same < len(played) and played[-num_same - 1] == played[-1]:
+        num_same += 1
+
+    return played[-max(len(played) - start, num_same) :]
+
+
+def _remove(hand: Hand, idx: int) -> Hand:
+    return hand[:idx] + hand[idx + 1 :]
+
+
+def _remove_val(hand: Hand, val: int) -> Hand:
+    return _remove(hand, hand.index(val))
+
+
+def reply_levels(
+    count: int, played: Hand, score: Callable[[Hand, int], int] = score_play
+) -> tuple[tuple[int, tuple[int, ...]], ...]:
+    """
+    The values that score if played next, as (points, values scoring them), highest first.
+    score is score_play, or a cache of it.
+    """
+    by_points: dict[int, list[int]] = defaultdict(list)
+    for val in range(1, NUM_VALS + 1):
+        new_count = count + _PEG_VALUES[val]
+        if new_count <= 31:
+            points = score(played + (val,), new_count)
+            if points:
+                by_points[points].append(val)
+    return tuple((points, tuple(by_points[points])) for points in sorted(by_points, reverse=True))
+
+
+def expected_best_reply(
+    count: int,
+    played: Hand,
+    pool: tuple[int, ...],
+    num_cards: int,
+    score: Callable[[Hand, int], int] = score_play,
+) -> float:
+    """
+    The expected points of the best reply to the cards played, by a player holding num_cards
+    cards drawn at random from the pool (the number of cards of each value, indexed by value).
+    Nothing is scored if they can't play. score is score_play, or a cache of it.
+    """
+    return _expected_best(reply_levels(count, played, score), pool, num_cards)
+
+
+def _expected_best(
+    levels: tuple[tuple[int, tuple[int, ...]], ...], pool: tuple[int, ...], num_cards: int
+) -> float:
+    num_pool = sum(pool)
+    num_cards = min(num_cards, num_pool)
+    if not num_cards:
+        return 0.0
+
+    # The best reply scores at least p if any card scoring at least p is held
+    expected = 0.0
+    num_at_least = 0
+    no_cards = comb(num_pool, num_cards)
+    for idx, (points, vals) in enumerate(levels):
+        num_at_least += sum(pool[val] for val in vals)
+        next_points = levels[idx + 1][0] if idx + 1 < len(levels) else 0
+        chance = 1 - comb(num_pool - num_at_least, num_cards) / no_cards
+        expected += (points - next_points) * chance
+    return expected
+
+
+# A position: (your turn, count, played tail, seen, your cards, belief, passed, you played last)
+Position = tuple[bool, int, Hand, tuple[int, ...], Hand, Belief, bool, bool | None]
+
+
+class PeggingEngine:
+    """
+    Expectimax search of the play, from your point of view; see the module docstring.
+
+    Values are your points less the opponent's. The tables are kept between searches:
+        _table: the value of each position searched; keyed on the count, the played tail that
+            can still score, your cards, the opponent's belief and the cards seen, whose turn,
+            and the go state
+        _opponent_plays: the opponent's play in each position it's been in
+        _plays: the legal plays from a hand, highest scoring first; _moves: the points and
+            played tail after each play; _levels: see reply_levels; _replies: the expected
+            points of the best reply (see expected_best_reply); _scores: score_play
+        _splits: the belief split up by the opponent's play; see _split
+    So an engine shared by the options of a hand (which have the same unseen cards, so the
+    same belief) reuses the positions they have in common.
+    """
+
+    _table: dict[Position, float]
+    _opponent_plays: dict[tuple[int, Hand, Hand, tuple[int, ...], int], int | None]
+    _plays: dict[tuple[int, Hand, Hand], tuple[tuple[int, int, Hand], ...]]
+    _moves: dict[tuple[int, Hand, int], tuple[int, Hand]]
+    _levels: dict[tuple[int, Hand], tuple[tuple[int, tuple[int, ...]], ...]]
+    _replies: dict[tuple[int, Hand, tuple[int, ...], int], float]
+    _scores: dict[tuple[Hand, int], int]
+    _splits: dict[tuple[int, Hand, tuple[int, ...], int, Belief], list]
+    nodes: int
+
+    def __init__(self) -> None:
+        self._table = {}
+        self._opponent_plays = {}
+        self._plays = {}
+        self._moves = {}
+        self._levels = {}
+        self._replies = {}
+        self._scores = {}
+        self._splits = {}
+        self.nodes = 0
+
+    def clear(self) -> None:
+        """
+        Forget everything searched
+        """
+        self._table.clear()
+        self._opponent_plays.clear()
+        self._plays.clear()
+        self._moves.clear()
+        self._levels.clear()
+        self._replies.clear()
+        self._scores.clear()
+        self._splits.clear()
+
+    def _score(self, played: Hand, count: int) -> int:
+        """
+        score_play, remembered
+        """
+        key = (played, count)
+        points = self._scores.get(key)
+        if points is None:
+            points = self._scores[key] = score_play(played, count)
+        return points
+
+    def _move(self, count: int, played: Hand, val: int) -> tuple[int, Hand]:
+        """
+        The points for playing val (which must fit under 31), and the played tail after it
+        """
+        key = (count, played, val)
+        move = self._moves.get(key)
+        if move is None:
+            new_played = played + (val,)
+            move = self._moves[key] = (
+                self._score(new_played, count + _PEG_VALUES[val]),
+                relevant_tail(new_played),
+            )
+        return move
+
+    def _ordered_plays(
+        self, count: int, played: Hand, hand: Hand
+    ) -> tuple[tuple[int, int, Hand], ...]:
+        """
+        Legal plays as (value, points scored, played tail after it), highest scoring first.
+        Cards with the same value are the same play, so only one of each is given.
+        """
+        key = (count, played, hand)
+        plays = self._plays.get(key)
+        if plays is None:
+            found = []
+            for idx, val in enumerate(hand):
+                if idx and hand[idx - 1] == val:
+                    continue
+                if count + _PEG_VALUES[val] <= 31:
+                    found.append((val, *self._move(count, played, val)))
+            found.sort(key=lambda play: -play[1])
+            plays = self._plays[key] = tuple(found)
+        return plays
+
+    def opponent_play(
+        self, count: int, played: Hand, hand: Hand, seen: tuple[int, ...], num_cards: int
+    ) -> int | None:
+        """
+        The value the opponent plays from their hand, or None for a go.
+        The opponent can't see your cards; the num_cards you hold could be any of the cards
+        it hasn't seen (not in its hand, and not played yet; seen counts those of each value).
+        It plays for the most points, less the expected points of your best reply; ties go to
+        the first play in order.
+        """
+        key = (count, played, hand, seen, num_cards)
+        if key in self._opponent_plays:
+            return self._opponent_plays[key]
+
+        unseen = [NUM_SUITS - x for x in seen]
+        for val in hand:
+            unseen[val] -= 1
+        unseen[0] = 0
+        pool = tuple(unseen)
+        best = None
+        best_value = -1000.0
+        for val, points, tail in self._ordered_plays(count, played, hand):
+            if points <= best_value:
+                # The reply can only take points away; nothing later can do better
+                break
+            new_count = count + _PEG_VALUES[val]
+            reply_key = (new_count, tail, pool, num_cards)
+            reply = self._replies.get(reply_key)
+            if reply is None:
+                levels = self._reply_levels(new_count, tail)
+                reply = self._replies[reply_key] = _expected_best(levels, pool, num_cards)
+            if points - reply > best_value:
+                best, best_value = val, points - reply
+        self._opponent_plays[key] = best
+        return best
+
+    def _reply_levels(self, count: int, played: Hand) -> tuple[tuple[int, tuple[int, ...]], ...]:
+        """
+        reply_levels, remembered
+        """
+        key = (count, played)
+        levels = self._levels.get(key)
+        if levels is None:
+            levels = self._levels[key] = reply_levels(count, played, self._score)
+        return levels
+
+    def expected_value(
+        self,
+        keep: set[Card],
+        known_cards: set[Card],
+        dealer: bool,
+        opponent_hands: Belief | None = None,
+        discard_model: OpponentDiscardModel | None = None,
+    ) -> float:
+        """
+        Expected pegging points, less the opponent's, for the kept cards.
+        known_cards are all the cards you've seen (normally the 6 you were dealt).
+        opponent_hands are (hand, weight); by default, every hand the opponent could have kept,
+        weighted by the discard_model if given (see weighted_opponent_hands).
+        """
+        my_hand = tuple(sorted(int(i_card.val) for i_card in keep))
+        if opponent_hands is None:
+            unseen = [NUM_SUITS] * (NUM_VALS + 1)
+            for i_card in known_cards:
+                unseen[i_card.val] -= 1
+            opponent_hands = weighted_opponent_hands(tuple(unseen), discard_model)
+        return self.play_value(my_hand, opponent_hands, not dealer)
+
+    def play_value(self, my_hand: Hand, opponent_hands: Belief, i_lead: bool) -> float:
+        """
+        Your expected pegging points less the opponent's, from the start of the play.
+        Hands are sorted tuples of values; opponent_hands are (hand, weight), all the same size.
+        The pone (not the dealer) leads.
+        """
+        seen = (0,) * (NUM_VALS + 1)
+        return self._turn(i_lead, 0, (), seen, my_hand, tuple(opponent_hands), False, None)
+
+    def _turn(  # pylint: disable=too-many-arguments
+        self,
+        my_turn: bool,
+        count: int,
+        played: Hand,
+        seen: tuple[int, ...],
+        mine: Hand,
+        belief: Belief,
+        passed: bool,
+        i_played_last: bool | None,
+    ) -> float:
+        """
+        Value of the position, for you; from the table if it's been searched before.
+        played is the tail of the values played since the count was reset, that can still score;
+        seen is the number of each value played so far.
+        passed: the player not to move has said go.
+        i_played_last: who played the last card of this count; None if nobody has yet.
+        """
+        key = (my_turn, count, played, seen, mine, belief, passed, i_played_last)
+        value = self._table.get(key)
+        if value is not None:
+            return value
+
+        self.nodes += 1
+        if my_turn:
+            value = self._my_turn(count, played, seen, mine, belief, passed, i_played_last)
+        else:
+            value = self._opponent_turn(count, played, seen, mine, belief, passed, i_played_last)
+        self._table[key] = value
+        return value
+
+    def _my_turn(  # pylint: disable=too-many-arguments
+        self,
+        count: int,
+        played: Hand,
+        seen: tuple[int, ...],
+        mine: Hand,
+        belief: Belief,
+        passed: bool,
+        i_played_last: bool | None,
+    ) -> float:
+        """
+        Your best play, by its expected value over the opponent's hands
+        """
+        plays = self._ordered_plays(count, played, mine)
+        if not plays:
+            return self._cant_play(True, count, played, seen, mine, belief, passed, i_played_last)
+
+        best = -1000.0
+        for val, points, tail in plays:
+            value = points + self._after_play(
+                True,
+                count + _PEG_VALUES[val],
+                tail,
+                _add_seen(seen, val),
+                _remove_val(mine, val),
+                belief,
+                passed,
+            )
+            best = max(best, value)
+        return best
+
+    def _opponent_turn(  # pylint: disable=too-many-arguments
+        self,
+        count: int,
+        played: Hand,
+        seen: tuple[int, ...],
+        mine: Hand,
+        belief: Belief,
+        passed: bool,
+        i_played_last: bool | None,
+    ) -> float:
+        """
+        The chance node of the opponent's play; each hand in the belief makes its own play
+        """
+        total = 0.0
+        total_weight = 0.0
+        for val, play_belief, weight in self._split(count, played, seen, len(mine), belief):
+            if val is None:
+                value = self._cant_play(
+                    False, count, played, seen, mine, play_belief, passed, i_played_last
+                )
+            else:
+                points, tail = self._move(count, played, val)
+                value = -points + self._after_play(
+                    False,
+                    count + _PEG_VALUES[val],
+                    tail,
+                    _add_seen(seen, val),
+                    mine,
+                    play_belief,
+                    passed,
+                )
+            total += weight * value
+            total_weight += weight
+        return total / total_weight
+
+    def _split(
+        self, count: int, played: Hand, seen: tuple[int, ...], num_cards: int, belief: Belief
+    ) -> list[tuple[int | None, Belief, float]]:
+        """
+        The belief split up by what the opponent plays, as (value or None for a go,
+        the hands that play it with that card removed, their total weight).
+        The opponent can't see your cards, only how many you have; so this is shared by
+        positions (e.g. of different options of a hand) that only differ in your cards.
+        """
+        key = (count, played, seen, num_cards, belief)
+        split = self._splits.get(key)
+        if split is None:
+            by_play: dict[int | None, list[tuple[Hand, float]]] = defaultdict(list)
+            for hand, weight in belief:
+                val = self.opponent_play(count, played, hand, seen, num_cards)
+                by_play[val].append((hand if val is None else _remove_val(hand, val), weight))
+            split = self._splits[key] = [
+                (val, tuple(hands), sum(x[1] for x in hands)) for val, hands in by_play.items()
+            ]
+        return split
+
+    def _after_play(  # pylint: disable=too-many-arguments
+        self,
+        mover_is_me: bool,
+        count: int,
+        played: Hand,
+        seen: tuple[int, ...],
+        mine: Hand,
+        belief: Belief,
+        passed: bool,
+    ) -> float:
+        """
+        Value of the position after a card is played, for you
+        """
+        if count == 31:
+            # Reset; the other player leads the next count
+            if not mine and not belief[0][0]:
+                return 0.0
+            return self._turn(not mover_is_me, 0, (), seen, mine, belief, False, None)
+
+        if passed:
+            # The other player can't play, so the mover keeps going
+            return self._turn(mover_is_me, count, played, seen, mine, belief, True, mover_is_me)
+
+        return self._turn(not mover_is_me, count, played, seen, mine, belief, False, mover_is_me)
+
+    def _cant_play(  # pylint: disable=too-many-arguments
+        self,
+        mover_is_me: bool,
+        count: int,
+        played: Hand,
+        seen: tuple[int, ...],
+        mine: Hand,
+        belief: Belief,
+        passed: bool,
+        i_played_last: bool | None,
+    ) -> float:
+        """
+        Value when the mover can't play.
+        Either it's a go for whoever played last, or the other player carries on.
+        """
+        other_has_cards = bool(belief[0][0]) if mover_is_me else bool(mine)
+        if passed or not other_has_cards:
+            # Neither can play; go (or last card) to whoever played last
+            go_value = 0.0 if i_played_last is None else (1.0 if i_played_last else -1.0)
+            if not mine and not belief[0][0]:
+                return go_value
+            # Whoever didn't play last leads the next count
+            return go_value + self._turn(
+                not i_played_last, 0, (), seen, mine, belief, False, None
+            )
+
+        # Say go; the other player plays on if they can
+        return self._turn(
+            not mover_is_me, count, played, seen, mine, belief, True, i_played_last
+        )
+
+
+def _add_seen(seen: tuple[int, ...], val: int) -> tuple[int, ...]:
+    return seen[:val] + (seen[val] + 1,) + seen[val + 1 :]
+
+
+@cache
+def possible_opponent_hands(unseen: tuple[int, ...]) -> Belief:
+    """
+    Every multiset of 4 values the opponent could hold, with the number of ways it can be
+    dealt from the unseen cards.
+    unseen is the number of unseen cards of each value (indexed by value).
+    """
+    hands = []
+    for vals in val_multisets(4):
+        ways = prod(comb(unseen[val], vals.count(val)) for val in set(vals))
+        if ways:
+            hands.append((vals, float(ways)))
+    return tuple(hands)
+
+
+def weighted_opponent_hands(
+    unseen: tuple[int, ...], discard_model: OpponentDiscardModel | None = None
+) -> Belief:
+    """
+    Every multiset of 4 values the opponent could have kept, with how likely it is.
+    Without a model, the opponent keeps 4 random cards; see possible_opponent_hands.
+    With a model, each 6 values the opponent could be dealt is weighted by the number of
+    ways it can be dealt, and split between the 4 kept by how likely the model says each
+    discard from them is.
+    """
+    if discard_model is None:
+        return possible_opponent_hands(unseen)
+    return _kept_hands(unseen, tuple(sorted(discard_model.pair_weights().items())))
+
+
+@cache
+def _kept_hands(
+    unseen: tuple[int, ...], pair_weights: tuple[tuple[tuple[int, ...], float], ...]
+) -> Belief:
+    weights = dict(pair_weights)
+    kept: dict[Hand, float] = defaultdict(float)
+    for vals in val_multisets(6):
+        ways = prod(comb(unseen[val], vals.count(val)) for val in set(vals))
+        if not ways:
+            continue
+        # Each different pair of values that could be thrown; weighted by the ways of picking
+        # those two cards from the six, and by the model
+        discards = {}
+        for first, second in combinations(range(6), 2):
+            pair = (vals[first], vals[second])
+            if pair not in discards:
+                pair_ways = prod(comb(vals.count(val), pair.count(val)) for val in set(pair))
+                discards[pair] = pair_ways * weights.get(pair, 0.0)
+        total = sum(discards.values())
+        if not total:
+            continue
+        for pair, weight in discards.items():
+            keep = list(vals)
+            keep.remove(pair[0])
+            keep.remove(pair[1])
+            kept[tuple(keep)] += ways * weight / total
+    return tuple((hand, weight) for hand, weight in kept.items() if weight)
+
+
+def hand_engine(known_cards: set[Card]) -> PeggingEngine:
+    """
+    The engine shared by every option of the hand known_cards, in this process; so the options
+    (worked out one after another, in a worker or here) reuse each other's positions.
+    A new engine is started when the hand changes, to keep memory in check.
+    """
+    global _HAND_ENGINE  # pylint: disable=global-statement
+    hand = frozenset(known_cards)
+    with _HAND_ENGINE_LOCK:
+        if _HAND_ENGINE is None or _HAND_ENGINE[0] != hand:
+            _HAND_ENGINE = (hand, PeggingEngine())
+        return _HAND_ENGINE[1]
+
+
+def calculate_pegging_evs(
+    keep: set[Card],
+    known_cards: set[Card],
+    discard_model: OpponentDiscardModel | None = None,
+) -> tuple[float, float]:
+    """
+    Expected pegging points, less the opponent's, for the kept cards;
+    as (if you're the dealer, if you're the pone).
+    Uses the engine of the hand; see hand_engine.
+    """
+    engine = hand_engine(known_cards)
+    return (
+        engine.expected_value(keep, known_cards, True, discard_model=discard_model),
+        engine.expected_value(keep, known_cards, False, discard_model=discard_model),
+    )
@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+"""
+Per-phase profiling of an analysis.
+
+Phases are timed with:
+    with timed(profile, "hand_scoring"):
+        ...
+When profile is None, timed gives back a shared do-nothing context; the hooks are only around
+whole phases (never inside the scoring loops), so leaving them in costs nothing measurable.
+
+Phases used:
+    discard_generation: picking the discard options
+    hand_scoring: scoring the hand against each starter
+    crib_enumeration: scoring (and weighting) every crib deal
+    joint_enumeration: scoring the hand and crib together
+    pegging: searching the play
+    stats_construction: building the stats from the scores
+    ipc_pickling: pickling each option to send back from a worker process
+    presentation: presenting the results
+"""
+
+from __future__ import annotations
+
+from types import TracebackType
+from typing import Any
+
+from time import perf_counter
+
+
+class PhaseProfile:
+    """
+    Counts and total time for each phase, and any other counters (e.g. bytes sent between
+    processes).
+    """
+
+    counts: dict[str, int]
+    seconds: dict[str, float]
+    counters: dict[str, int]
+
+    def __init__(self) -> None:
+        self.counts = {}
+        self.seconds = {}
+        self.counters = {}
+
+    def add(self, phase: str, seconds: float, count: int = 1) -> None:
+        """
+        Add time spent in a phase
+        """
+        self.counts[phase] = self.counts.get(phase, 0) + count
+        self.seconds[phase] = self.seconds.get(phase, 0.0) + seconds
+
+    def count(self, counter: str, amount: int = 1) -> None:
+        """
+        Add to a counter
+        """
+        self.counters[counter] = self.counters.get(counter, 0) + amount
+
+    def merge(self, other: PhaseProfile) -> None:
+        """
+        Add another profile (e.g. from a worker process) to this one
+        """
+        for phase, seconds in other.seconds.items():
+            self.add(phase, seconds, other.counts[phase])
+        for counter, amount in other.counters.items():
+            self.count(counter, amount)
+
+    def report(self) -> dict[str, Any]:
+        """
+        Structured report; for each phase the count, total and mean seconds, and the counters.
+        Time in worker processes is added up, so can be more than the wall time.
+        """
+        return {
+            "phases": {
+                phase: {
+                    "count": self.counts[phase],
+                    "seconds": seconds,
+                    "mean_seconds": seconds / self.counts[phase],
+                }
+                for phase, seconds in self.seconds.items()
+            },
+            "counters": dict(self.counters),
+        }
+
+    def __str__(self) -> str:
+        lines = [f"{'phase':<20} {'count':>8} {'total (s)':>10} {'mean (ms)':>10}"]
+        for phase, seconds in sorted(self.seconds.items(), key=lambda item: -item[1]):
+            count = self.counts[phase]
+            lines.append(f"{phase:<20} {count:>8} {seconds:>10.3f} {1000 * seconds / count:>10.3f}")
+        for counter, amount in sorted(self.counters.items()):
+            lines.append(f"{counter:<20} {amount:>8}")
+        return "\n".join(lines)
+
+
+class _PhaseTimer:
+    """
+    Times a single phase into a profile
+    """
+
+    __slots__ = ("_profile", "_phase", "_start")
+
+    def __init__(self, profile: PhaseProfile, phase: str) -> None:
+        self._profile = profile
+        self._phase = phase
+        self._start = 0.0
+
+    def __enter__(self) -> None:
+        self._start = perf_counter()
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        self._profile.add(self._phase, perf_counter() - self._start)
+
+
+class _NullTimer:
+    """
+    Does nothing; used when not profiling
+    """
+
+    __slots__ = ()
+
+    def __enter__(self) -> None:
+        return None
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        return None
+
+
+_NULL_TIMER = _NullTimer()
+
+
+def timed(profile: PhaseProfile | None, phase: str) -> _PhaseTimer | _NullTimer:
+    """
+    Context to time a phase into the profile; does nothing if the profile is None.
+    """
+    if profile is None:
+        return _NULL_TIMER
+    return _PhaseTimer(profile, phase)
@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+"""
+Progress reporting for long analyses.
+
+Work is counted in units of deals scored; each starter for the hand, and each crib deal.
+Worker processes add to a shared counter at the end of each phase (never inside the scoring
+loops), and the main process reads it while waiting for results; so the callback sees the
+work done across all the workers.
+Callbacks are rate limited; at most one per interval, plus one when all the work is done.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Callable
+
+from math import comb
+from time import perf_counter
+
+# Shared counter of work units done; set in each worker process (or in this process)
+_COUNTER: Any = None
+
+
+class ProgressReport:
+    """
+    How far through an analysis we are
+    """
+
+    completed: int
+    total: int
+    elapsed: float
+
+    def __init__(self, completed: int, total: int, elapsed: float) -> None:
+        self.completed = completed
+        self.total = total
+        self.elapsed = elapsed
+
+    @property
+    def fraction(self) -> float:
+        """
+        Fraction of the work done
+        """
+        return self.completed / self.total if self.total else 1.0
+
+    @property
+    def rate(self) -> float:
+        """
+        Units of work per second, so far
+        """
+        return self.completed / self.elapsed if self.elapsed else 0.0
+
+    @property
+    def eta(self) -> float | None:
+        """
+        Estimated seconds left, at the rate so far; None until some work is done
+        """
+        if not self.completed:
+            return None
+        return (self.total - self.completed) / self.rate
+
+    def __str__(self) -> str:
+        eta = "?" if self.eta is None else f"{self.eta:.0f}s"
+        return f"{self.completed}/{self.total} ({self.fraction:.0%}), ETA {eta}"
+
+
+ProgressCallback = Callable[[ProgressReport], None]
+
+
+def option_work_units(num_unseen: int = 46) -> int:
+    """
+    Units of work for one discard option; every starter for the hand, and every crib deal
+    (3 unseen cards, each of which can be the starter).
+    """
+    return num_unseen + 3 * comb(num_unseen, 3)
+
+
+def report_progress(units: int) -> None:
+    """
+    Add to the work done; does nothing unless progress is being tracked.
+    """
+    if _COUNTER is None:
+        return
+    with _COUNTER.get_lock():
+        _COUNTER.value += units
+
+
+def init_worker_progress(counter: Any) -> None:
+    """
+    Initialiser for worker processes, to share the counter
+    """
+    global _COUNTER  # pylint: disable=global-statement
+    _COUNTER = counter
+
+
+class ProgressTracker:
+    """
+    Reads the shared counter, and calls the callback (at most once per interval).
+    """
+
+    counter: Any
+    total: int
+    callback: ProgressCallback
+    interval: float
+
+    _start: float
+    _last_call: float
+    _last_completed: int
+
+    def __init__(self, total: int, callback: ProgressCallback, interval: float = 0.5) -> None:
+        # Only needed when tracking progress; slow to import
+        import multiprocessing  # pylint: disable=import-outside-toplevel
+
+        self.counter = multiprocessing.Value("q", 0)
+        self.total = total
+        self.callback = callback
+        self.interval = interval
+        self._start = perf_counter()
+        self._last_call = -interval
+        self._last_completed = -1
+
+    def update(self) -> None:
+        """
+        Call the callback, if it's been long enough (or everything is done)
+        """
+        now = perf_counter()
+        completed = self.counter.value
+        if completed == self._last_completed:
+            return
+        if completed < self.total and now - self._last_call < self.interval:
+            return
+        self._last_call = now
+        self._last_completed = completed
+        self.callback(ProgressReport(completed, self.total, now - self._start))
@@ -0,0 +1,293 @@
+# -*- coding: utf-8 -*-
+"""
+Ranking discard options by several objectives at once.
+
+Each objective's value is worked out once per option, into a table with a column per
+objective. The top n of each column are then picked with a heap; any other options tied with
+the nth are kept too. The options passed in are never reordered.
+
+The rankings are plain data, so can be rendered as text (what present_results prints),
+JSON or CSV.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Callable
+
+import csv
+import heapq
+import io
+import json
+
+from .card import convert_cardlist_to_str
+from .stats import DiscardOption
+
+
+class Objective:
+    """
+    Something to rank options by; bigger values are better.
+    Some objectives need extra results (e.g. pegging); available says if they can be used.
+    """
+
+    name: str
+    title: str
+    keyfunc: Callable[[DiscardOption], float]
+    available: Callable[[list[DiscardOption]], bool]
+
+    def __init__(
+        self,
+        name: str,
+        title: str,
+        keyfunc: Callable[[DiscardOption], float],
+        available: Callable[[list[DiscardOption]], bool] | None = None,
+    ) -> None:
+        self.name = name
+        self.title = title
+        self.keyfunc = keyfunc
+        self.available = available or (lambda options: True)
+
+
+class RankedOption:
+    """
+    One option in a ranking; tied is set if its value is the same as the one before it.
+    """
+
+    option: DiscardOption
+    value: float
+    tied: bool
+
+    def __init__(self, option: DiscardOption, value: float, tied: bool) -> None:
+        self.option = option
+        self.value = value
+        self.tied = tied
+
+    def to_dict(self) -> dict[str, Any]:
+        """
+        For rendering as JSON or CSV
+        """
+        return {
+            "discard": [str(i_card) for i_card in sorted(self.option.discard)],
+            "keep": [str(i_card) for i_card in sorted(self.option.hand)],
+            "value": self.value,
+            "tied": self.tied,
+        }
+
+
+class ObjectiveRanking:
+    """
+    The best options for one objective, best first.
+    """
+
+    objective: Objective
+    num_make: int
+    entries: list[RankedOption]
+
+    def __init__(self, objective: Objective, num_make: int, entries: list[RankedOption]) -> None:
+        self.objective = objective
+        self.num_make = num_make
+        self.entries = entries
+
+    @property
+    def heading(self) -> str:
+        """
+        Heading, as printed by present_results
+        """
+        return f"Top {self.num_make} {self.objective.title}"
+
+
+def _has_opponent_ev(options: list[DiscardOption]) -> bool:
+    return all(x.opponent_hand_ev is not None for x in options)
+
+
+def _has_pegging(options: list[DiscardOption]) -> bool:
+    return all(x.dealer_pegging_ev is not None for x in options)
+
+
+def default_objectives(game_state: tuple[int, int, bool] | None = None) -> list[Objective]:
+    """
+    The objectives used by present_results.
+    The win probability objective is only included if game_state is given, as
+    (my score, opponent's score, if I'm the dealer).
+    """
+    objectives = [
+        Objective("hand_mean", "highest EU options (mean)", lambda x: x.hand_scores.mean),
+        Objective("hand_median", "highest EU options (median)", lambda x: x.hand_scores.median),
+        Objective("hand_min", "highest min hand score", lambda x: x.hand_scores.min),
+        Objective(
+            "hand_plus_crib",
+            "best overall EU (hand + crib)",
+            lambda x: x.hand_scores.mean + x.crib_scores.mean,
+        ),
+        Objective(
+            "hand_minus_crib",
+            "best overall EU (hand - crib)",
+            lambda x: x.hand_scores.mean - x.crib_scores.mean,
+        ),
+        Objective("least_crib", "LEAST crib EU", lambda x: -x.crib_scores.mean),
+        Objective("most_crib", "MOST crib EU (mean)", lambda x: x.crib_scores.mean),
+        Objective(
+            "net_game_dealer",
+            "best net game EU (hand + crib - opponent's hand)",
+            lambda x: x.hand_scores.mean + x.crib_scores.mean - (x.opponent_hand_ev or 0),
+            _has_opponent_ev,
+        ),
+        Objective(
+            "net_game_pone",
+            "best net game EU (hand - crib - opponent's hand)",
+            lambda x: x.hand_scores.mean - x.crib_scores.mean - (x.opponent_hand_ev or 0),
+            _has_opponent_ev,
+        ),
+        Objective(
+            "pegging_dealer",
+            "best overall EU with pegging (hand + crib + pegging)",
+            lambda x: x.hand_scores.mean + x.crib_scores.mean + (x.dealer_pegging_ev or 0),
+            _has_pegging,
+        ),
+        Objective(
+            "pegging_pone",
+            "best overall EU with pegging (hand - crib + pegging)",
+            lambda x: x.hand_scores.mean - x.crib_scores.mean + (x.pone_pegging_ev or 0),
+            _has_pegging,
+        ),
+    ]
+
+    if game_state is not None:
+        # Loads its tables from the package data; only when needed, to keep startup quick
+        from .winprob import (  # pylint: disable=import-outside-toplevel
+            option_win_probability,
+            scores_to_distribution,
+        )
+
+        my_score, opp_score, dealer = game_state
+        objectives.append(
+            Objective(
+                "win_probability",
+                "highest chance of winning (%)",
+                lambda x: 100
+                * option_win_probability(
+                    scores_to_distribution(x.hand_scores.possible_scores),
+                    scores_to_distribution(
+                        x.crib_scores.possible_scores, x.crib_scores.weights
+                    ),
+                    my_score,
+                    opp_score,
+                    dealer,
+                ),
+            )
+        )
+
+    return objectives
+
+
+def rank_options(
+    options: list[DiscardOption],
+    objectives: list[Objective],
+    num_make: int = 3,
+) -> list[ObjectiveRanking]:
+    """
+    Rank the options by each (available) objective.
+    Each objective is worked out once per option; then the top num_make of each, plus any
+    options tied with the last of those.
+    """
+    objectives = [objective for objective in objectives if objective.available(options)]
+    num_make = min(num_make, len(options))
+
+    # One column per objective
+    table = [[objective.keyfunc(option) for option in options] for objective in objectives]
+
+    rankings = []
+    for objective, column in zip(objectives, table):
+        entries = _top_entries(options, column, num_make)
+        rankings.append(ObjectiveRanking(objective, num_make, entries))
+    return rankings
+
+
+def _top_entries(
+    options: list[DiscardOption], column: list[float], num_make: int
+) -> list[RankedOption]:
+    """
+    The top num_make options by the column, and any tied with the last of them.
+    Options with the same value stay in the order they were given.
+    """
+    if num_make < 1:
+        return []
+
+    top = heapq.nlargest(num_make, range(len(column)), key=column.__getitem__)
+    final_val = column[top[-1]]
+    selected = [i_option for i_option, value in enumerate(column) if value >= final_val]
+    selected.sort(key=lambda i_option: -column[i_option])
+
+    entries = []
+    last_val = None
+    for i_option in selected:
+        value = column[i_option]
+        entries.append(RankedOption(options[i_option], value, value == last_val))
+        last_val = value
+    return entries
+
+
+def format_entry(entry: RankedOption) -> str:
+    """
+    One line of text for an option in a ranking; = marks a tie with the line before.
+    """
+    return (
+        f"Discard {{{convert_cardlist_to_str(entry.option.discard, True)}}}, "
+        f"keep {{{convert_cardlist_to_str(entry.option.hand, True)}}}: {entry.value:.2f}"
+        f"{'=' if entry.tied else ''}"
+    )
+
+
+def render_text(rankings: list[ObjectiveRanking]) -> str:
+    """
+    Human readable; each objective as a heading, then a line per option.
+    """
+    sections = []
+    for ranking in rankings:
+        lines = [ranking.heading] + [format_entry(entry) for entry in ranking.entries]
+        sections.append("\n".join(lines))
+    return "\n\n".join(sections)
+
+
+def rankings_data(rankings: list[ObjectiveRanking]) -> list[dict[str, Any]]:
+    """
+    The rankings as plain lists and dicts; a dict per objective
+    """
+    return [
+        {
+            "objective": ranking.objective.name,
+            "title": ranking.objective.title,
+            "num_make": ranking.num_make,
+            "results": [entry.to_dict() for entry in ranking.entries],
+        }
+        for ranking in rankings
+    ]
+
+
+def render_json(rankings: list[ObjectiveRanking]) -> str:
+    """
+    JSON; a list with an object per objective
+    """
+    return json.dumps(rankings_data(rankings))
+
+
+def render_csv(rankings: list[ObjectiveRanking]) -> str:
+    """
+    CSV; a row per option per objective. Cards are space separated.
+    """
+    out = io.StringIO()
+    writer = csv.writer(out)
+    writer.writerow(["objective", "rank", "discard", "keep", "value", "tied"])
+    for ranking in rankings:
+        for rank, entry in enumerate(ranking.entries, start=1):
+            row = entry.to_dict()
+            writer.writerow(
+                [
+                    ranking.objective.name,
+                    rank,
+                    " ".join(row["discard"]),
+                    " ".join(row["keep"]),
+                    row["value"],
+                    row["tied"],
+                ]
+            )
+    return out.getvalue()
@@ -0,0 +1,418 @@
+# -*- coding: utf-8 -*-
+"""
+Reviewing the discards of played games; how much EU each player gave up against the best
+discard, over a whole archive of game logs. Run by `cribbage replay`.
+
+The log format, one hand at a time; blank lines and lines starting with # are ignored:
+
+    game <game id>
+    hand <dealer> [<starter>]
+    <player>: <6 cards dealt> / <2 cards discarded>
+    <player>: <6 cards dealt> / <2 cards discarded>
+
+e.g.
+
+    game 17
+    hand alice 5C
+    alice: 5H 5S JD XC 2C 9D / 2C 9D
+    bob: AH 2H 3H 4H KS QD / KS QD
+
+Each hand is for the two player game; the dealer must be one of the players of the hand, and
+no card can turn up twice in a hand. The starter is optional; if given, each review also has
+the points the kept cards actually scored, against the points they were expected to score (the
+mean over every starter); and each player's summary adds these up, over the hands with a
+starter. That's luck, not skill, but shows how far the results strayed from the expectation.
+
+Each discard is scored by its EU, from the player's point of view; the hand plus the crib for
+the dealer, or the hand less the crib for the pone. The EV loss is how far that's below the
+best discard's.
+
+Hands are analysed by an AnalysisEngine (see engine.py); so the options are worked out on its
+pool of workers, and hands that turn up again (up to suits) come from its cache. A few hands
+are analysed at once, to keep all the workers busy, and only the EUs are kept afterwards.
+"""
+
+from __future__ import annotations
+
+from typing import Iterable, Iterator
+
+import concurrent.futures
+from collections import deque
+
+from .card import Card
+from .engine import AnalysisEngine
+from .scorecalc import calculate_score
+from .stats import DiscardOption
+
+HAND_SIZE = 6
+NUM_DISCARD = 2
+# Bytes of results the engine keeps for a replay; an analysed hand is a few MB
+REPLAY_CACHE_BYTES = 256 * 1024 * 1024
+# EUs closer than this are the same; so ties with the best aren't a loss
+EV_TOLERANCE = 1e-9
+
+
+class ReplayError(ValueError):
+    """
+    A line of a game log that can't be used
+    """
+
+    def __init__(self, line_number: int, message: str) -> None:
+        super().__init__(f"Line {line_number}: {message}")
+        self.line_number = line_number
+
+
+class Decision:
+    """
+    One player's discard, from one hand of a game
+    """
+
+    game: str
+    hand_number: int
+    player: str
+    dealer: bool
+    cards: set[Card]
+    discard: set[Card]
+    starter: Card | None
+    line_number: int
+
+    def __init__(  # pylint: disable=too-many-arguments
+        self,
+        game: str,
+        hand_number: int,
+        player: str,
+        dealer: bool,
+        cards: set[Card],
+        discard: set[Card],
+        starter: Card | None = None,
+        line_number: int = 0,
+    ) -> None:
+        self.game = game
+        self.hand_number = hand_number
+        self.player = player
+        self.dealer = dealer
+        self.cards = cards
+        self.discard = discard
+        self.starter = starter
+        self.line_number = line_number
+
+    def __str__(self) -> str:
+        return f"game {self.game}, hand {self.hand_number}, {self.player}"
+
+
+def _parse_cards(text: str, line_number: int) -> list[Card]:
+    try:
+        return [Card.from_str(x) for x in text.split()]
+    except (KeyError, ValueError, IndexError) as exc:
+        raise ReplayError(line_number, f"Unknown card in {text.strip()!r}") from exc
+
+
+def parse_log(lines: Iterable[str]) -> list[Decision]:
+    """
+    Every decision in the log, in order; see the module docstring for the format.
+    Raises ReplayError for anything that doesn't fit the format.
+    """
+    decisions: list[Decision] = []
+    game: str | None = None
+    hand_number = 0
+    # The hand being read; (dealer, starter, line number), and its decisions so far
+    hand: tuple[str, Card | None, int] | None = None
+    hand_decisions: list[Decision] = []
+
+    def finish_hand() -> None:
+        if hand is None:
+            return
+        dealer, _, line_number = hand
+        if not hand_decisions:
+            raise ReplayError(line_number, "Hand has no players")
+        if dealer not in {x.player for x in hand_decisions}:
+            raise ReplayError(line_number, f"Dealer {dealer} isn't one of the players")
+        decisions.extend(hand_decisions)
+
+    for line_number, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        keyword, _, rest = line.partition(" ")
+
+        if keyword == "game":
+            finish_hand()
+            hand, hand_decisions = None, []
+            game, hand_number = rest.strip(), 0
+            if not game:
+                raise ReplayError(line_number, "Game needs an ID")
+        elif keyword == "hand":
+            finish_hand()
+            hand_decisions = []
+            if game is None:
+                raise ReplayError(line_number, "Hand before any game")
+            fields = rest.split()
+            if len(fields) not in (1, 2):
+                raise ReplayError(line_number, "Expected: hand <dealer> [<starter>]")
+            starter = _parse_cards(fields[1], line_number)[0] if len(fields) == 2 else None
+            hand_number += 1
+            hand = (fields[0], starter, line_number)
+        else:
+            if hand is None or game is None:
+                raise ReplayError(line_number, "Player's cards before any hand")
+            hand_decisions.append(_parse_decision(line, game, hand_number, hand, line_number))
+            _check_distinct(hand_decisions, hand[1], line_number)
+
+    finish_hand()
+    return decisions
+
+
+def _parse_decision(
+    line: str, game: str, hand_number: int, hand: tuple[str, Card | None, int], line_number: int
+) -> Decision:
+    """
+    A player's line; <player>: <cards dealt> / <cards discarded>
+    """
+    player, colon, cards_text = line.partition(":")
+    dealt_text, slash, discard_text = cards_text.partition("/")
+    player = player.strip()
+    if not colon or not slash or not player:
+        raise ReplayError(line_number, "Expected: <player>: <cards dealt> / <cards discarded>")
+
+    dealt = _parse_cards(dealt_text, line_number)
+    discard = _parse_cards(discard_text, line_number)
+    if len(set(dealt)) != HAND_SIZE or len(dealt) != HAND_SIZE:
+        raise ReplayError(line_number, f"Need {HAND_SIZE} different cards dealt")
+    if len(set(discard)) != NUM_DISCARD or len(discard) != NUM_DISCARD:
+        raise ReplayError(line_number, f"Need {NUM_DISCARD} different cards discarded")
+    if not set(discard) <= set(dealt):
+        raise ReplayError(line_number, "Discarded cards must be from the cards dealt")
+
+    dealer, starter, _ = hand
+    return Decision(
+        game,
+        hand_number,
+        player,
+        player == dealer,
+        set(dealt),
+        set(discard),
+        starter,
+        line_number,
+    )
+
+
+def _check_distinct(
+    hand_decisions: list[Decision], starter: Card | None, line_number: int
+) -> None:
+    """
+    Check the newest player's cards weren't dealt to anyone else, or turned up as the starter
+    """
+    newest = hand_decisions[-1]
+    if any(x.player == newest.player for x in hand_decisions[:-1]):
+        raise ReplayError(line_number, f"{newest.player} is in the hand twice")
+    others = {i_card for x in hand_decisions[:-1] for i_card in x.cards}
+    if starter is not None:
+        others.add(starter)
+    if newest.cards & others:
+        raise ReplayError(line_number, "Cards turn up twice in the hand")
+
+
+def decision_ev(option: DiscardOption, dealer: bool) -> float:
+    """
+    The EU of the option for the player; the crib counts for them if they're the dealer,
+    and against them if not
+    """
+    if dealer:
+        return option.hand_scores.mean + option.crib_scores.mean
+    return option.hand_scores.mean - option.crib_scores.mean
+
+
+class DecisionReview:
+    """
+    How a discard compares to the best discard for the player
+    """
+
+    decision: Decision
+    actual_ev: float
+    best_ev: float
+    best_discard: set[Card]
+    # Points the kept cards scored with the starter; None if there's no starter
+    hand_points: int | None
+    # The mean points of the kept cards, over every starter
+    expected_hand_points: float
+
+    def __init__(  # pylint: disable=too-many-arguments
+        self,
+        decision: Decision,
+        actual_ev: float,
+        best_ev: float,
+        best_discard: set[Card],
+        hand_points: int | None = None,
+        expected_hand_points: float = 0.0,
+    ) -> None:
+        self.decision = decision
+        self.actual_ev = actual_ev
+        self.best_ev = best_ev
+        self.best_discard = best_discard
+        self.hand_points = hand_points
+        self.expected_hand_points = expected_hand_points
+
+    @property
+    def loss(self) -> float:
+        """
+        EV given up against the best discard; 0 if it was the best (or tied for it)
+        """
+        loss = self.best_ev - self.actual_ev
+        return loss if loss > EV_TOLERANCE else 0.0
+
+    def __str__(self) -> str:
+        discarded = " ".join(str(x) for x in sorted(self.decision.discard))
+        best = " ".join(str(x) for x in sorted(self.best_discard))
+        text = (
+            f"{self.decision}: discarded {discarded} ({self.actual_ev:.2f}), "
+            f"best {best} ({self.best_ev:.2f}), lost {self.loss:.2f}"
+        )
+        if self.hand_points is not None:
+            text += f"; hand scored {self.hand_points} ({self.expected_hand_points:.2f} expected)"
+        return text
+
+
+def review_options(decision: Decision, options: list[DiscardOption]) -> DecisionReview:
+    """
+    Review the decision, given every option of its cards
+    """
+    actual = next((x for x in options if x.discard == decision.discard), None)
+    if actual is None:
+        raise ValueError(f"No option for the discard of {decision}")
+    best = max(options, key=lambda x: decision_ev(x, decision.dealer))
+    hand_points = (
+        None if decision.starter is None else calculate_score(actual.hand, decision.starter)
+    )
+    return DecisionReview(
+        decision,
+        decision_ev(actual, decision.dealer),
+        decision_ev(best, decision.dealer),
+        set(best.discard),
+        hand_points,
+        actual.hand_scores.mean,
+    )
+
+
+def review_decisions(
+    decisions: Iterable[Decision],
+    engine: AnalysisEngine,
+    max_in_flight: int = 4,
+) -> Iterator[DecisionReview]:
+    """
+    Review each decision, in order, analysing up to max_in_flight hands at once on the engine.
+    """
+    with concurrent.futures.ThreadPoolExecutor(max_in_flight) as threads:
+        pending: deque[tuple[Decision, concurrent.futures.Future]] = deque()
+        for decision in decisions:
+            pending.append((decision, threads.submit(engine.analyse, decision.cards)))
+            if len(pending) >= max_in_flight:
+                done, future = pending.popleft()
+                yield review_options(done, future.result())
+        while pending:
+            done, future = pending.popleft()
+            yield review_options(done, future.result())
+
+
+class PlayerSummary:
+    """
+    The EV lost by one player, over all their decisions
+    """
+
+    player: str
+    decisions: int
+    best_decisions: int
+    total_loss: float
+    worst_loss: float
+    # Over the decisions with a starter
+    scored_hands: int
+    hand_points: int
+    expected_hand_points: float
+
+    def __init__(self, player: str) -> None:
+        self.player = player
+        self.decisions = 0
+        self.best_decisions = 0
+        self.total_loss = 0.0
+        self.worst_loss = 0.0
+        self.scored_hands = 0
+        self.hand_points = 0
+        self.expected_hand_points = 0.0
+
+    def add(self, review: DecisionReview) -> None:
+        """
+        Add a review of one of the player's decisions
+        """
+        loss = review.loss
+        self.decisions += 1
+        self.best_decisions += not loss
+        self.total_loss += loss
+        self.worst_loss = max(self.worst_loss, loss)
+        if review.hand_points is not None:
+            self.scored_hands += 1
+            self.hand_points += review.hand_points
+            self.expected_hand_points += review.expected_hand_points
+
+    @property
+    def mean_loss(self) -> float:
+        """
+        EV lost per decision
+        """
+        return self.total_loss / self.decisions if self.decisions else 0.0
+
+    def __str__(self) -> str:
+        text = (
+            f"{self.player}: {self.decisions} discards, {self.best_decisions} best, "
+            f"EV lost {self.total_loss:.2f} total, {self.mean_loss:.3f} per discard, "
+            f"worst {self.worst_loss:.2f}"
+        )
+        if self.scored_hands:
+            text += (
+                f"; hands scored {self.hand_points} against {self.expected_hand_points:.2f} "
+                f"expected, over {self.scored_hands} hands with a starter"
+            )
+        return text
+
+
+def summarise(
+    reviews: Iterable[DecisionReview], num_worst: int = 0
+) -> tuple[dict[str, PlayerSummary], list[DecisionReview]]:
+    """
+    The summary for each player (in the order they first turn up), and the num_worst
+    decisions that lost the most EV, worst first.
+    Only the worst reviews are kept, so this can be given the reviews as they're made.
+    """
+    summaries: dict[str, PlayerSummary] = {}
+    worst: list[DecisionReview] = []
+    for review in reviews:
+        player = review.decision.player
+        summaries.setdefault(player, PlayerSummary(player)).add(review)
+        if num_worst and review.loss:
+            worst.append(review)
+            worst.sort(key=lambda x: -x.loss)
+            del worst[num_worst:]
+    return summaries, worst
+
+
+def replay(log_path: str, max_workers: int | None = None, num_worst: int = 5) -> None:
+    """
+    Review every decision in the game log, and print the summary for each player
+    """
+    with open(log_path, encoding="utf-8") as log_file:
+        decisions = parse_log(log_file)
+    print(f"Reviewing {len(decisions)} discards from {log_path}")
+
+    with AnalysisEngine(max_workers, cache_bytes=REPLAY_CACHE_BYTES) as engine:
+        summaries, worst = summarise(review_decisions(decisions, engine), num_worst)
+        stats = engine.stats()
+
+    print()
+    print("EV lost per player:")
+    for summary in sorted(summaries.values(), key=lambda x: x.total_loss):
+        print(f"    {summary}")
+    if worst:
+        print()
+        print(f"Worst {len(worst)} discards:")
+        for review in worst:
+            print(f"    {review}")
+    print()
+    print(f"Hands analysed: {stats['computed']}, from the cache: {stats['hits']}")
@@ -0,0 +1,300 @@
+# -*- coding: utf-8 -*-
+"""
+Indexes over stored results, to answer questions about many hands without analysing them
+again. Run by `cribbage query`.
+
+The results are the rows written by output.py (any format; see read_results), or options added
+as they're made. Each option is indexed by:
+    the ranks discarded, and the ranks kept; both as the exact pattern (e.g. discarding 5 5),
+        and by each rank it has (e.g. every discard with a 5, or with two 5s)
+    the value of each objective (sorted, for ranges of values)
+    whether it's the best option of its hand for each objective (with any tied with it)
+The objectives are those of ranking.default_objectives that only need the stats stored; e.g.
+hand_plus_crib (the dealer's EU) and hand_minus_crib (the pone's EU). Options without the
+stats an objective needs (e.g. no pegging) aren't indexed for it.
+
+A query is answered by intersecting the sets of options of each condition, smallest first;
+e.g.
+    all hands where discarding a 5 is best as the pone:
+        index.query(discard_ranks=[5], best_for="hand_minus_crib")
+    hands whose best crib EU is over 8:
+        index.query(best_for="most_crib", ranges={"most_crib": (8, None)})
+
+A hand is its six cards; if the same option turns up again (e.g. a file appended to by several
+runs), the latest stats are kept. The sorted values and best options are worked out on the
+first query after options are added.
+"""
+
+from __future__ import annotations
+
+from typing import Callable, Iterable
+
+import bisect
+import math
+from collections import Counter, defaultdict
+from pathlib import Path
+
+from .card import Card
+from .output import STAT_COLUMNS, option_stats, read_results
+from .stats import DiscardOption
+
+# Values of the same objective closer than this are tied
+VALUE_TOLERANCE = 1e-9
+
+_COLUMN = {name: i_column for i_column, name in enumerate(STAT_COLUMNS)}
+
+
+def _stat(name: str) -> Callable[[tuple[float, ...]], float]:
+    i_column = _COLUMN[name]
+    return lambda stats: stats[i_column]
+
+
+# Objectives that can be worked out from the stored stats; named as in ranking.py.
+# NaN if the stats it needs weren't stored.
+INDEX_OBJECTIVES: dict[str, Callable[[tuple[float, ...]], float]] = {
+    "hand_mean": _stat("hand_mean"),
+    "hand_median": _stat("hand_median"),
+    "hand_min": _stat("hand_min"),
+    "hand_plus_crib": lambda x: x[_COLUMN["hand_mean"]] + x[_COLUMN["crib_mean"]],
+    "hand_minus_crib": lambda x: x[_COLUMN["hand_mean"]] - x[_COLUMN["crib_mean"]],
+    "least_crib": lambda x: -x[_COLUMN["crib_mean"]],
+    "most_crib": _stat("crib_mean"),
+    "net_game_dealer": lambda x: (
+        x[_COLUMN["hand_mean"]] + x[_COLUMN["crib_mean"]] - x[_COLUMN["opponent_hand_ev"]]
+    ),
+    "net_game_pone": lambda x: (
+        x[_COLUMN["hand_mean"]] - x[_COLUMN["crib_mean"]] - x[_COLUMN["opponent_hand_ev"]]
+    ),
+    "pegging_dealer": lambda x: (
+        x[_COLUMN["hand_mean"]] + x[_COLUMN["crib_mean"]] + x[_COLUMN["dealer_pegging_ev"]]
+    ),
+    "pegging_pone": lambda x: (
+        x[_COLUMN["hand_mean"]] - x[_COLUMN["crib_mean"]] + x[_COLUMN["pone_pegging_ev"]]
+    ),
+}
+
+
+def rank_pattern(cards: Iterable[Card]) -> tuple[int, ...]:
+    """
+    The sorted values of the cards, e.g. (5, 5, 11, 13)
+    """
+    return tuple(sorted(int(i_card.val) for i_card in cards))
+
+
+def _rank_keys(pattern: Iterable[int]) -> list[tuple[int, int]]:
+    """
+    (rank, n) for each rank, for n from 1 to the number of cards of that rank
+    """
+    return [(rank, n) for rank, count in Counter(pattern).items() for n in range(1, count + 1)]
+
+
+class StoredOption:
+    """
+    One option of one hand, as stored
+    """
+
+    hand_idx: int
+    keep: tuple[Card, ...]
+    discard: tuple[Card, ...]
+    stats: tuple[float, ...]
+
+    def __init__(
+        self,
+        hand_idx: int,
+        keep: Iterable[Card],
+        discard: Iterable[Card],
+        stats: tuple[float, ...],
+    ) -> None:
+        self.hand_idx = hand_idx
+        self.keep = tuple(sorted(keep))
+        self.discard = tuple(sorted(discard))
+        self.stats = stats
+
+    @property
+    def cards(self) -> tuple[Card, ...]:
+        """
+        The cards of the hand; kept and discarded
+        """
+        return tuple(sorted(self.keep + self.discard))
+
+    def value(self, objective: str) -> float:
+        """
+        The value of the objective (see INDEX_OBJECTIVES); NaN if it needs stats not stored
+        """
+        return INDEX_OBJECTIVES[objective](self.stats)
+
+    def __str__(self) -> str:
+        keep = " ".join(str(x) for x in self.keep)
+        discard = " ".join(str(x) for x in self.discard)
+        return f"keep {keep}, discard {discard}"
+
+
+class ResultIndex:
+    """
+    The stored options, and the indexes over them; see the module docstring.
+    Options are numbered in the order they're added.
+    """
+
+    options: list[StoredOption]
+    _option_ids: dict[tuple[tuple[Card, ...], tuple[Card, ...]], int]
+    _hands: dict[tuple[Card, ...], list[int]]
+    _by_discard_pattern: defaultdict[tuple[int, ...], set[int]]
+    _by_keep_pattern: defaultdict[tuple[int, ...], set[int]]
+    _by_discard_rank: defaultdict[tuple[int, int], set[int]]
+    _by_keep_rank: defaultdict[tuple[int, int], set[int]]
+    # Built on the first query after options are added
+    _sorted_values: dict[str, tuple[list[float], list[int]]]
+    _best: dict[str, set[int]]
+    _stale: bool
+
+    def __init__(self) -> None:
+        self.options = []
+        self._option_ids = {}
+        self._hands = {}
+        self._by_discard_pattern = defaultdict(set)
+        self._by_keep_pattern = defaultdict(set)
+        self._by_discard_rank = defaultdict(set)
+        self._by_keep_rank = defaultdict(set)
+        self._sorted_values = {}
+        self._best = {}
+        self._stale = False
+
+    @classmethod
+    def from_file(cls, path: str | Path) -> ResultIndex:
+        """
+        Index every row of a file written by output.py
+        """
+        index = cls()
+        for hand_idx, keep, discard, stats in read_results(path):
+            index.add(
+                StoredOption(
+                    hand_idx,
+                    (Card.from_str(x) for x in keep),
+                    (Card.from_str(x) for x in discard),
+                    stats,
+                )
+            )
+        return index
+
+    def add_option(self, option: DiscardOption, hand_idx: int = 0) -> int:
+        """
+        Index an option as it's made, e.g. from calculate_cribbage_eu; returns its number
+        """
+        return self.add(StoredOption(hand_idx, option.hand, option.discard, option_stats(option)))
+
+    def add(self, stored: StoredOption) -> int:
+        """
+        Index an option; returns its number. An option already indexed is replaced.
+        """
+        self._stale = True
+        key = (stored.keep, stored.discard)
+        if key in self._option_ids:
+            option_id = self._option_ids[key]
+            self.options[option_id] = stored
+            return option_id
+
+        option_id = len(self.options)
+        self.options.append(stored)
+        self._option_ids[key] = option_id
+        self._hands.setdefault(stored.cards, []).append(option_id)
+
+        discard_pattern = rank_pattern(stored.discard)
+        keep_pattern = rank_pattern(stored.keep)
+        self._by_discard_pattern[discard_pattern].add(option_id)
+        self._by_keep_pattern[keep_pattern].add(option_id)
+        for rank_key in _rank_keys(discard_pattern):
+            self._by_discard_rank[rank_key].add(option_id)
+        for rank_key in _rank_keys(keep_pattern):
+            self._by_keep_rank[rank_key].add(option_id)
+        return option_id
+
+    @property
+    def num_hands(self) -> int:
+        """
+        Number of different hands indexed
+        """
+        return len(self._hands)
+
+    def _refresh(self) -> None:
+        """
+        Sort the values of each objective, and find the best options of each hand
+        """
+        if not self._stale:
+            return
+        self._sorted_values = {}
+        self._best = {}
+        for objective in INDEX_OBJECTIVES:
+            values = [
+                (value, option_id)
+                for option_id, value in enumerate(x.value(objective) for x in self.options)
+                if not math.isnan(value)
+            ]
+            values.sort()
+            self._sorted_values[objective] = ([x[0] for x in values], [x[1] for x in values])
+
+            best: set[int] = set()
+            for option_ids in self._hands.values():
+                hand_values = [(self.options[x].value(objective), x) for x in option_ids]
+                hand_values = [x for x in hand_values if not math.isnan(x[0])]
+                if not hand_values:
+                    continue
+                top = max(x[0] for x in hand_values)
+                best.update(x[1] for x in hand_values if x[0] >= top - VALUE_TOLERANCE)
+            self._best[objective] = best
+        self._stale = False
+
+    def _in_range(self, objective: str, low: float | None, high: float | None) -> set[int]:
+        values, option_ids = self._sorted_values[objective]
+        start = 0 if low is None else bisect.bisect_left(values, low)
+        stop = len(values) if high is None else bisect.bisect_right(values, high)
+        return set(option_ids[start:stop])
+
+    def query(  # pylint: disable=too-many-arguments
+        self,
+        discard_ranks: Iterable[int] = (),
+        keep_ranks: Iterable[int] = (),
+        discard_pattern: Iterable[int] | None = None,
+        keep_pattern: Iterable[int] | None = None,
+        best_for: str | None = None,
+        ranges: dict[str, tuple[float | None, float | None]] | None = None,
+    ) -> list[StoredOption]:
+        """
+        The options matching every condition given, in the order they were added:
+            discard_ranks / keep_ranks: has at least these ranks (e.g. [5, 5] for two 5s)
+            discard_pattern / keep_pattern: exactly these ranks
+            best_for: is the best option of its hand for this objective (or tied for it)
+            ranges: {objective: (low, high)}; the value is from low to high, inclusive
+                (None for no limit)
+        Objectives are the keys of INDEX_OBJECTIVES.
+        """
+        ranges = ranges or {}
+        unknown = [x for x in [best_for, *ranges] if x is not None and x not in INDEX_OBJECTIVES]
+        if unknown:
+            raise ValueError(
+                f"Unknown objectives {unknown}; choose from {', '.join(INDEX_OBJECTIVES)}"
+            )
+        self._refresh()
+
+        conditions: list[set[int]] = [
+            self._by_discard_rank.get(rank_key, set())
+            for rank_key in _rank_keys(int(x) for x in discard_ranks)
+        ]
+        conditions += [
+            self._by_keep_rank.get(rank_key, set())
+            for rank_key in _rank_keys(int(x) for x in keep_ranks)
+        ]
+        if discard_pattern is not None:
+            pattern = tuple(sorted(int(x) for x in discard_pattern))
+            conditions.append(self._by_discard_pattern.get(pattern, set()))
+        if keep_pattern is not None:
+            pattern = tuple(sorted(int(x) for x in keep_pattern))
+            conditions.append(self._by_keep_pattern.get(pattern, set()))
+        if best_for is not None:
+            conditions.append(self._best[best_for])
+        conditions += [self._in_range(name, *limits) for name, limits in ranges.items()]
+
+        if not conditions:
+            return list(self.options)
+        conditions.sort(key=len)
+        matches = set(conditions[0]).intersection(*conditions[1:])
+        return [self.options[x] for x in sorted(matches)]
@@ -10,9 +10,12 @@ from collections.abc import Iterable
 import itertools
 from itertools import combinations
 
-from .card import Card, convert_card_array_to_enum_array
+from .card import Card
 from .cardenums import CardVal
 
+# The separate ways a hand scores; the keys of calculate_score_breakdown
+SCORE_CATEGORIES = ("fifteen", "runs", "pairs", "flush", "nobs")
+
 
 def calculate_score(hand: set[Card], starter: Card) -> int:
     """
@@ -31,26 +34,124 @@ def calculate_score(hand: set[Card], starter: Card) -> int:
         5. "His Nobs" - holding a jack in hand, same suit as starter.
     """
 
+    return sum(calculate_score_breakdown(hand, starter).values())
+
+
+def calculate_score_breakdown(hand: set[Card], starter: Card) -> dict[str, int]:
+    """
+    Calculates the score of a hand of cards, split up by each scoring route.
+    As calculate_score; the keys are SCORE_CATEGORIES.
+    """
+
     # ASSERT:
     if len(hand) != 4:
         raise ValueError("Hand must be 4 cards")
 
-    # Generate set of all cards
-    # Copy here to avoid ruining hand
-    full_set = set(hand)
-    full_set.add(starter)
-
-    full_set_vals, _ = convert_card_array_to_enum_array(full_set)
+    # Count how many of each value there are, including the starter
+    # Routes 1-3 only need the counts; see the histogram_score_* functions
+    counts = val_histogram(i_card.val for i_card in hand)
+    counts[starter.val] += 1
 
     this_score = {
-        "fifteen": calculate_score_1_15s(full_set_vals),
-        "runs": calculate_score_2_runs(full_set_vals),
-        "pairs": calculate_score_3_pairs(full_set_vals),
+        "fifteen": histogram_score_15s(counts),
+        "runs": histogram_score_runs(counts),
+        "pairs": histogram_score_pairs(counts),
         "flush": calculate_score_4_flush(hand, starter),
         "nobs": calculate_score_5_nobs(hand, starter),
     }
 
-    return sum(this_score.values())
+    return this_score
+
+
+def calculate_score_shared(full_set_vals: Iterable[int]) -> int:
+    """
+    Calculate the parts of the score that only depend on the card values
+    I.e. 15s, runs and pairs.
+    These are the same whichever of the 5 cards is the starter, so can be shared between
+    every choice of starter from the same 5 cards.
+    """
+    counts = val_histogram(full_set_vals)
+    return (
+        histogram_score_15s(counts)
+        + histogram_score_runs(counts)
+        + histogram_score_pairs(counts)
+    )
+
+
+# Histogram scoring
+# The 15s, runs and pairs only depend on how many cards there are of each value.
+# These do the same as calculate_score_1_15s, calculate_score_2_runs and calculate_score_3_pairs
+# but from the counts of each value (indexed by value, so index 0 is unused), which avoids
+# looking at every combination of cards.
+
+# Value of each card towards 15, indexed by value
+_FIFTEEN_POINTS = [0, 1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 10, 10, 10]
+# Number of ways of choosing k of n cards; _CHOOSE[n][k]
+_CHOOSE = [[1], [1, 1], [1, 2, 1], [1, 3, 3, 1], [1, 4, 6, 4, 1]]
+
+
+def val_histogram(full_set_vals: Iterable[int]) -> list[int]:
+    """
+    Count how many cards there are of each value
+    """
+    counts = [0] * (len(CardVal) + 1)
+    for val in full_set_vals:
+        counts[val] += 1
+    return counts
+
+
+def histogram_score_15s(counts: list[int]) -> int:
+    """
+    Calculate 15s from the counts of each value
+    Count the number of ways of making each total (up to 15), adding one value at a time;
+    taking any number of the cards of that value.
+    """
+    ways = [1] + [0] * 15
+    for val, num in enumerate(counts):
+        if not num:
+            continue
+        points = _FIFTEEN_POINTS[val]
+        choose = _CHOOSE[num]
+        # Go down, so each value is only added once to each total
+        for total in range(15 - points, -1, -1):
+            if not ways[total]:
+                continue
+            for num_used in range(1, num + 1):
+                new_total = total + num_used * points
+                if new_total > 15:
+                    break
+                ways[new_total] += ways[total] * choose[num_used]
+    return 2 * ways[15]
+
+
+def histogram_score_runs(counts: list[int]) -> int:
+    """
+    Calculate runs from the counts of each value
+    Each stretch of at least 3 consecutive values with cards is a run; there's one run for
+    each way of picking a card of each value, so it's the length times the product of counts.
+    """
+    score = 0
+    length = 0
+    product = 1
+    # A 0 on the end, to finish any run up to the King
+    for num in itertools.chain(counts[1:], [0]):
+        if num:
+            length += 1
+            product *= num
+            continue
+        if length >= 3:
+            score += length * product
+        length = 0
+        product = 1
+    return score
+
+
+def histogram_score_pairs(counts: list[int]) -> int:
+    """
+    Calculate pairs from the counts of each value
+    n cards of the same value make n(n-1)/2 pairs, at 2 points each.
+    """
+    return sum(num * (num - 1) for num in counts)
 
 
 def calculate_score_1_15s(full_set_vals: list[CardVal]) -> int:
@@ -125,6 +226,7 @@ def calculate_score_4_flush(hand: set[Card], starter: Card) -> int:
     """
     Check for a flush, and score as appropriate
     I.e. 4 for a flush in hand only, 5 for a flush including the starter
+    (a point per card; so 3 and 4 for the 3 card hands of five-card cribbage)
     """
 
     # Are all the hand suits the same?
@@ -133,7 +235,7 @@ def calculate_score_4_flush(hand: set[Card], starter: Card) -> int:
     if len(all_hand_same) != 1:
         return 0
 
-    return 5 if all_hand_same.pop() == starter.suit else 4
+    return len(hand) + 1 if all_hand_same.pop() == starter.suit else len(hand)
 
 
 def calculate_score_5_nobs(hand: set[Card], starter: Card) -> int:
@@ -0,0 +1,262 @@
+# -*- coding: utf-8 -*-
+"""
+A local HTTP service for hand analysis; so bots can ask for an analysis without starting the CLI
+(and a new pool of workers) for every decision. Started by `cribbage serve`.
+
+All the requests share one AnalysisEngine (see engine.py); so the workers stay up, results for
+recent hands are cached, and identical (or suit-equivalent) requests at the same time are only
+worked out once.
+
+Endpoints, all giving JSON:
+    GET /analyse?cards=5H,5S,JD,XC,2C,9D[&joint=1][&opponent_ev=1][&pegging=1][&top=3]
+    POST /analyse with a JSON object of the same; cards can be a list
+        Every discard option, with its stats, and the top options for each objective
+        (see ranking.py).
+    GET /stats
+        Request count and latency percentiles (in ms), and the engine's cache stats.
+    GET /health
+
+Only listens on localhost by default; there's no authentication.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Callable
+
+import json
+import math
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from .card import Card
+from .engine import AnalysisEngine
+from .output import STAT_COLUMNS, option_stats
+from .ranking import default_objectives, rank_options, rankings_data
+from .stats import DiscardOption
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8121
+LATENCY_PERCENTILES = (50, 90, 99)
+
+_FLAGS = ("joint", "opponent_ev", "pegging", "breakdown")
+
+
+class LatencyStats:
+    """
+    Times of the most recent requests, for percentiles.
+    """
+
+    count: int
+    _recent: deque[float]
+    _lock: threading.Lock
+
+    def __init__(self, window: int = 10000) -> None:
+        self.count = 0
+        self._recent = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float) -> None:
+        """
+        Add the time taken by a request
+        """
+        with self._lock:
+            self.count += 1
+            self._recent.append(seconds)
+
+    def percentiles(self) -> dict[str, float | None]:
+        """
+        Latency percentiles, in ms, of the recent requests (nearest rank); None if there's
+        been no requests.
+        """
+        with self._lock:
+            recent = sorted(self._recent)
+        if not recent:
+            return {f"p{percent}": None for percent in (*LATENCY_PERCENTILES, 100)}
+        result = {}
+        for percent in LATENCY_PERCENTILES:
+            rank = max(math.ceil(percent / 100 * len(recent)), 1)
+            result[f"p{percent}"] = 1000 * recent[rank - 1]
+        result["p100"] = 1000 * recent[-1]
+        return result
+
+
+class AnalysisServer(ThreadingHTTPServer):
+    """
+    The HTTP server; each request is handled in a thread, all sharing the engine.
+    """
+
+    daemon_threads = True
+    engine: AnalysisEngine
+    latencies: LatencyStats
+
+    def __init__(
+        self, address: tuple[str, int], engine: AnalysisEngine | None = None
+    ) -> None:
+        super().__init__(address, AnalysisRequestHandler)
+        self.engine = engine or AnalysisEngine()
+        self.latencies = LatencyStats()
+
+    def server_close(self) -> None:
+        super().server_close()
+        self.engine.close()
+
+
+class RequestError(ValueError):
+    """
+    A bad request; sent back as a 400
+    """
+
+
+def option_record(option: DiscardOption) -> dict[str, Any]:
+    """
+    An option as plain JSON data
+    """
+    record: dict[str, Any] = {
+        "keep": [str(i_card) for i_card in sorted(option.hand)],
+        "discard": [str(i_card) for i_card in sorted(option.discard)],
+    }
+    for name, value in zip(STAT_COLUMNS, option_stats(option)):
+        record[name] = None if math.isnan(value) else value
+    return record
+
+
+def parse_request(
+    params: dict[str, Any], num_cards: int
+) -> tuple[set[Card], dict[str, bool], int]:
+    """
+    Get the cards, flags and number of top options from the request's parameters
+    """
+    cards_param = params.get("cards")
+    if isinstance(cards_param, str):
+        cards_param = cards_param.replace(" ", ",").split(",")
+    if not isinstance(cards_param, list):
+        raise RequestError("cards must be given, as a list or comma separated")
+
+    try:
+        cards = {Card.from_str(str(i_card)) for i_card in cards_param if i_card}
+    except (KeyError, ValueError, IndexError) as exc:
+        raise RequestError(f"Unknown card in {cards_param}") from exc
+    if len(cards) != num_cards:
+        raise RequestError(f"Need {num_cards} different cards, got {len(cards)}")
+
+    flags = {}
+    for flag in _FLAGS:
+        value = params.get(flag, False)
+        if isinstance(value, str):
+            value = value.lower() in ("1", "true", "yes")
+        flags[flag] = bool(value)
+
+    try:
+        top = int(params.get("top", 3))
+    except (TypeError, ValueError) as exc:
+        raise RequestError("top must be a number") from exc
+
+    return cards, flags, top
+
+
+class AnalysisRequestHandler(BaseHTTPRequestHandler):
+    """
+    Handles each request; see the module docstring for the endpoints.
+    """
+
+    server: AnalysisServer
+
+    def do_GET(self) -> None:  # pylint: disable=invalid-name
+        """
+        GET requests
+        """
+        url = urlsplit(self.path)
+        if url.path == "/analyse":
+            params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+            self._timed(self._analyse, params)
+        elif url.path == "/stats":
+            self._send(
+                200,
+                {
+                    "requests": self.server.latencies.count,
+                    "latency_ms": self.server.latencies.percentiles(),
+                    "engine": self.server.engine.stats(),
+                },
+            )
+        elif url.path == "/health":
+            self._send(200, {"status": "ok"})
+        else:
+            self._send(404, {"error": f"Unknown path {url.path}"})
+
+    def do_POST(self) -> None:  # pylint: disable=invalid-name
+        """
+        POST requests; a JSON object of parameters
+        """
+        if urlsplit(self.path).path != "/analyse":
+            self._send(404, {"error": f"Unknown path {self.path}"})
+            return
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            params = json.loads(self.rfile.read(length) or b"{}")
+            if not isinstance(params, dict):
+                raise ValueError("Expected a JSON object")
+        except ValueError as exc:
+            self._send(400, {"error": f"Bad JSON: {exc}"})
+            return
+        self._timed(self._analyse, params)
+
+    def _timed(self, handler: Callable[[dict[str, Any]], tuple[int, Any]], params: Any) -> None:
+        """
+        Handle the request, recording how long it took before sending the response
+        """
+        start = time.perf_counter()
+        try:
+            status, data = handler(params)
+        finally:
+            self.server.latencies.record(time.perf_counter() - start)
+        self._send(status, data)
+
+    def _analyse(self, params: dict[str, Any]) -> tuple[int, Any]:
+        engine = self.server.engine
+        try:
+            cards, flags, top = parse_request(params, 4 + engine.num_discard)
+        except RequestError as exc:
+            return 400, {"error": str(exc)}
+
+        try:
+            options = engine.analyse(cards, **flags)
+        except Exception as exc:  # pylint: disable=broad-except
+            # Keep serving; the error is for this request only
+            return 500, {"error": f"Analysis failed: {exc!r}"}
+
+        return 200, {
+            "cards": [str(i_card) for i_card in sorted(cards)],
+            "options": [option_record(option) for option in options],
+            "rankings": rankings_data(rank_options(options, default_objectives(), top)),
+        }
+
+    def _send(self, status: int, data: Any) -> None:
+        body = json.dumps(data).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: Any) -> None:  # pylint: disable=redefined-builtin
+        # Quiet; see /stats instead
+        return
+
+
+def serve(
+    host: str = DEFAULT_HOST, port: int = DEFAULT_PORT, max_workers: int | None = None
+) -> None:
+    """
+    Run the server until interrupted
+    """
+    server = AnalysisServer((host, port), AnalysisEngine(max_workers))
+    print(f"Serving on http://{server.server_address[0]}:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
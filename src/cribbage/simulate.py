@@ -0,0 +1,342 @@
+# -*- coding: utf-8 -*-
+"""
+Self-play simulation, to compare discard policies by the points they actually score.
+Run by `cribbage simulate`.
+
+Each deal:
+    1. Six cards each are dealt to you and the opponent, and the starter is cut.
+        You're the dealer on even deals, and the pone on odd deals.
+    2. You discard by each policy in turn (from the same cards); the opponent discards by
+        the by_seat policy.
+    3. The hand and crib are scored with calculate_score; the points for the deal are your
+        hand plus the crib if you're the dealer, or less it if you're the pone.
+Every policy plays the same deals, so the difference between two policies is measured deal by
+deal; which gives much tighter confidence intervals than comparing their means.
+
+Policies pick the discard with the best expected value by the same objectives as
+present_results (hand mean, hand + crib, hand - crib). Working out the full EU of every hand
+(see cribbage_eu.py) takes seconds, far too long for millions of deals; so the policies use the
+tables of expected 15s, runs and pairs of the values kept and thrown (see tables.py), as the
+GreedyDiscardModel does. These ignore flushes, nobs and the cards you can see.
+
+The deals are split into shards of a fixed size, each with its own seed worked out from the
+simulation's seed; so the results are the same however many workers there are. Shards are
+worked out on a pool of worker processes (or in this process, if there's only one), and each
+gives the running totals of the points; these are whole numbers, so adding up shards in any
+order gives exactly the same totals. The totals so far are given after each shard.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Callable, Iterator
+
+import hashlib
+import math
+import random
+from itertools import combinations
+
+from .canonical import card_from_id
+from .card import Card
+from .parallel import run_chunks
+from .scorecalc import calculate_score
+from .tables import keep_value_table, pair_crib_value_table
+
+HAND_SIZE = 6
+DECK = [card_from_id(i_card) for i_card in range(52)]
+# For each way to discard 2 of 6 cards, (positions kept, positions discarded)
+_CHOICES = [
+    (tuple(i for i in range(HAND_SIZE) if i not in discard), discard)
+    for discard in combinations(range(HAND_SIZE), 2)
+]
+DEFAULT_SHARD_SIZE = 10000
+# For 95% confidence intervals
+CONFIDENCE_Z = 1.96
+
+
+class Policy:
+    """
+    A way to pick the discard; the best expected hand score, plus (or minus) crib_sign times
+    the expected crib score of the discard. crib_sign is given if you're the dealer.
+    """
+
+    name: str
+    title: str
+    crib_sign: Callable[[bool], int]
+
+    def __init__(self, name: str, title: str, crib_sign: Callable[[bool], int]) -> None:
+        self.name = name
+        self.title = title
+        self.crib_sign = crib_sign
+
+    def pick(self, values: list[tuple[float, float]], dealer: bool) -> int:
+        """
+        The index of the best discard (in _CHOICES), given the option_values of the hand;
+        the first best, if there's a tie
+        """
+        sign = self.crib_sign(dealer)
+        best = 0
+        best_value = -math.inf
+        for i_choice, (keep_value, crib_value) in enumerate(values):
+            value = keep_value + sign * crib_value
+            if value > best_value:
+                best, best_value = i_choice, value
+        return best
+
+    def choose(self, hand: list[Card], dealer: bool) -> tuple[set[Card], set[Card]]:
+        """
+        The cards to keep and discard
+        """
+        keep, discard = _CHOICES[self.pick(option_values(hand), dealer)]
+        return {hand[i] for i in keep}, {hand[i] for i in discard}
+
+    def __repr__(self) -> str:
+        return f"Policy<{self.name}>"
+
+
+def option_values(hand: list[Card]) -> list[tuple[float, float]]:
+    """
+    For each way to discard (in _CHOICES), the expected 15s, runs and pairs of the cards kept,
+    and what the cards discarded bring to the crib
+    """
+    keep_values = keep_value_table()
+    crib_values = pair_crib_value_table()
+    vals = [int(i_card.val) for i_card in hand]
+    return [
+        (
+            keep_values[tuple(sorted([vals[i] for i in keep]))],
+            crib_values[tuple(sorted([vals[i] for i in discard]))],
+        )
+        for keep, discard in _CHOICES
+    ]
+
+
+POLICIES = {
+    policy.name: policy
+    for policy in (
+        Policy("hand_mean", "highest EU options (mean)", lambda dealer: 0),
+        Policy("hand_plus_crib", "best overall EU (hand + crib)", lambda dealer: 1),
+        Policy("hand_minus_crib", "best overall EU (hand - crib)", lambda dealer: -1),
+        Policy(
+            "by_seat",
+            "hand + crib as the dealer, hand - crib as the pone",
+            lambda dealer: 1 if dealer else -1,
+        ),
+    )
+}
+OPPONENT_POLICY = POLICIES["by_seat"]
+
+
+class RunningTotals:
+    """
+    Count, total and total of squares of whole numbers of points; for the mean and its
+    confidence interval. Exact, so totals can be added up in any order.
+    """
+
+    count: int
+    total: int
+    total_sq: int
+
+    def __init__(self, count: int = 0, total: int = 0, total_sq: int = 0) -> None:
+        self.count = count
+        self.total = total
+        self.total_sq = total_sq
+
+    def add(self, points: int) -> None:
+        """
+        Add the points of one deal
+        """
+        self.count += 1
+        self.total += points
+        self.total_sq += points * points
+
+    def merge(self, other: RunningTotals) -> None:
+        """
+        Add the totals of another shard
+        """
+        self.count += other.count
+        self.total += other.total
+        self.total_sq += other.total_sq
+
+    @property
+    def mean(self) -> float:
+        """
+        Points per deal
+        """
+        return self.total / self.count if self.count else math.nan
+
+    @property
+    def stdev(self) -> float:
+        """
+        Sample standard deviation of the points per deal
+        """
+        if self.count < 2:
+            return math.nan
+        variance = (self.total_sq - self.total * self.total / self.count) / (self.count - 1)
+        return math.sqrt(max(variance, 0.0))
+
+    def confidence_interval(self, z: float = CONFIDENCE_Z) -> tuple[float, float]:
+        """
+        Confidence interval of the mean (95% by default), from the normal approximation
+        """
+        half_width = z * self.stdev / math.sqrt(self.count) if self.count else math.nan
+        return self.mean - half_width, self.mean + half_width
+
+    def to_dict(self) -> dict[str, Any]:
+        """
+        For writing as JSON
+        """
+        low, high = self.confidence_interval()
+        return {"deals": self.count, "mean": self.mean, "ci_low": low, "ci_high": high}
+
+
+class SimulationTotals:
+    """
+    Totals of the points of each policy, and of the difference between each policy and the
+    first (the reference); per deal, so the difference has a tight confidence interval.
+    """
+
+    policies: list[str]
+    points: dict[str, RunningTotals]
+    differences: dict[str, RunningTotals]
+    shards: int
+
+    def __init__(self, policies: list[str]) -> None:
+        self.policies = policies
+        self.points = {name: RunningTotals() for name in policies}
+        self.differences = {name: RunningTotals() for name in policies}
+        self.shards = 0
+
+    @property
+    def reference(self) -> str:
+        """
+        The policy the others are compared against
+        """
+        return self.policies[0]
+
+    def merge(self, other: SimulationTotals) -> None:
+        """
+        Add the totals of another shard
+        """
+        for name in self.policies:
+            self.points[name].merge(other.points[name])
+            self.differences[name].merge(other.differences[name])
+        self.shards += other.shards
+
+    def to_dict(self) -> dict[str, Any]:
+        """
+        For writing as JSON; e.g. one line per shard, as the totals so far
+        """
+        return {
+            "shards": self.shards,
+            "reference": self.reference,
+            "policies": {
+                name: {
+                    **self.points[name].to_dict(),
+                    "difference": self.differences[name].to_dict(),
+                }
+                for name in self.policies
+            },
+        }
+
+
+def shard_seed(seed: int, shard: int) -> int:
+    """
+    The seed of a shard; the same on every machine, and unrelated between shards
+    """
+    digest = hashlib.sha256(f"{seed}/{shard}".encode("ascii")).digest()
+    return int.from_bytes(digest[:8], "big")
+
+
+def simulate_shard(
+    seed: int, shard: int, num_deals: int, policies: list[str]
+) -> SimulationTotals:
+    """
+    Play num_deals deals of one shard, with each policy
+    """
+    rng = random.Random(shard_seed(seed, shard))
+    chosen = [POLICIES[name] for name in policies]
+    totals = SimulationTotals(policies)
+    totals.shards = 1
+
+    for i_deal in range(num_deals):
+        dealer = i_deal % 2 == 0
+        dealt = [DECK[i_card] for i_card in rng.sample(range(52), 2 * HAND_SIZE + 1)]
+        hand = dealt[:HAND_SIZE]
+        starter = dealt[-1]
+        _, opponent_discard = OPPONENT_POLICY.choose(dealt[HAND_SIZE:-1], not dealer)
+        values = option_values(hand)
+
+        # Policies often agree; only score each discard once
+        scored: dict[int, int] = {}
+        reference_points = 0
+        for i_policy, policy in enumerate(chosen):
+            i_choice = policy.pick(values, dealer)
+            if i_choice not in scored:
+                keep, discard = _CHOICES[i_choice]
+                hand_points = calculate_score({hand[i] for i in keep}, starter)
+                crib_points = calculate_score(
+                    {hand[i] for i in discard} | opponent_discard, starter
+                )
+                scored[i_choice] = (
+                    hand_points + crib_points if dealer else hand_points - crib_points
+                )
+            points = scored[i_choice]
+            if i_policy == 0:
+                reference_points = points
+            totals.points[policy.name].add(points)
+            totals.differences[policy.name].add(points - reference_points)
+
+    return totals
+
+
+def simulate(
+    num_deals: int,
+    policies: list[str] | None = None,
+    seed: int = 0,
+    shard_size: int = DEFAULT_SHARD_SIZE,
+    max_workers: int | None = None,
+) -> Iterator[SimulationTotals]:
+    """
+    Play num_deals deals with each policy (all of them by default; the first is the
+    reference), giving the totals so far after each shard.
+    The totals after the last shard are the same for the same seed and shard_size, whatever
+    the number of workers.
+    """
+    policies = list(POLICIES) if policies is None else policies
+    unknown = [name for name in policies if name not in POLICIES]
+    if unknown or not policies:
+        raise ValueError(f"Unknown policies {unknown}; choose from {', '.join(POLICIES)}")
+    if len(set(policies)) != len(policies):
+        raise ValueError("Each policy can only be given once")
+
+    shards = [
+        (i_shard, min(shard_size, num_deals - start))
+        for i_shard, start in enumerate(range(0, num_deals, shard_size))
+    ]
+    totals = SimulationTotals(policies)
+
+    shard_args = [(seed, i_shard, shard_deals, policies) for i_shard, shard_deals in shards]
+    for _, shard_totals in run_chunks(simulate_shard, shard_args, max_workers):
+        totals.merge(shard_totals)
+        yield totals
+
+
+def render_comparison(totals: SimulationTotals) -> str:
+    """
+    The points per deal of each policy, and the difference from the reference, with their
+    confidence intervals
+    """
+    lines = [
+        f"Points per deal (95% CI), over {totals.points[totals.reference].count} deals; "
+        f"difference from {totals.reference}:"
+    ]
+    for name in totals.policies:
+        points = totals.points[name]
+        difference = totals.differences[name]
+        low, high = points.confidence_interval()
+        diff_low, diff_high = difference.confidence_interval()
+        lines.append(
+            f"    {name:<16} {points.mean:7.3f} ({low:7.3f} to {high:7.3f})   "
+            f"{difference.mean:+7.3f} ({diff_low:+7.3f} to {diff_high:+7.3f})"
+        )
+    return "\n".join(lines)
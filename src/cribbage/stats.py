@@ -1,27 +1,107 @@
 """Stats"""
 
+from __future__ import annotations
+
+import copy
 import statistics
 
 from .card import Card
 
 
 class ScoringStats:
-    """Stats for a specific scenario"""
+    """
+    Stats for a specific scenario
+    Optionally, each score can be weighted by how likely it is; otherwise all scores are
+    equally likely.
+    Optionally, the scores split up by scoring route (see scorecalc.SCORE_CATEGORIES), as a list
+    of points for each route, in the same order as the scores; these give the distribution
+    of points from each route.
+    """
 
     possible_scores: list[int]
+    weights: list[float] | None
     mean: float
     stdev: float
     median: float
     min: int
     max: int
+    # For each scoring route, the chance of each number of points
+    breakdown: dict[str, dict[int, float]] | None
 
-    def __init__(self, scores: list[int]) -> None:
+    def __init__(
+        self,
+        scores: list[int],
+        weights: list[float] | None = None,
+        breakdown: dict[str, list[int]] | None = None,
+    ) -> None:
         self.possible_scores = scores
-        self.mean = statistics.mean(scores)
-        self.stdev = statistics.stdev(scores)
-        self.median = statistics.median(scores)
-        self.min = min(scores)
-        self.max = max(scores)
+        self.weights = weights
+        self.breakdown = (
+            None
+            if breakdown is None
+            else {
+                category: points_distribution(points, weights)
+                for category, points in breakdown.items()
+            }
+        )
+
+        if weights is None:
+            self.mean = statistics.mean(scores)
+            self.stdev = statistics.stdev(scores)
+            self.median = statistics.median(scores)
+            self.min = min(scores)
+            self.max = max(scores)
+            return
+
+        total_weight = sum(weights)
+        if total_weight <= 0:
+            raise ValueError("Weights must add up to more than 0")
+
+        self.mean = sum(w * x for w, x in zip(weights, scores)) / total_weight
+        # Scaled so equal weights give the same answer as statistics.stdev
+        variance = sum(w * (x - self.mean) ** 2 for w, x in zip(weights, scores)) / total_weight
+        self.stdev = (variance * len(scores) / (len(scores) - 1)) ** 0.5
+        self.median = weighted_median(scores, weights)
+        possible = [x for w, x in zip(weights, scores) if w > 0]
+        self.min = min(possible)
+        self.max = max(possible)
+
+    @classmethod
+    def from_counts(cls, counts: dict[int, int]) -> ScoringStats:
+        """
+        Stats from the number of ways of getting each score; e.g. from variants.crib_score_counts.
+        The same as the stats of the list with each score repeated that many times.
+        """
+        scores = list(counts)
+        weights = [float(counts[score]) for score in scores]
+        stats = cls(scores, weights)
+        # Scale the variance by the number of ways, not the number of different scores
+        num_ways = sum(weights)
+        variance = sum(w * (x - stats.mean) ** 2 for w, x in zip(weights, scores)) / num_ways
+        stats.stdev = (variance * num_ways / (num_ways - 1)) ** 0.5
+        return stats
+
+    def category_mean(self, category: str) -> float:
+        """
+        Expected points from one scoring route; e.g. "runs".
+        Needs the breakdown.
+        """
+        if self.breakdown is None:
+            raise ValueError("No breakdown of the scores by scoring route")
+        return sum(points * chance for points, chance in self.breakdown[category].items())
+
+    def copy(self) -> ScoringStats:
+        """
+        A copy sharing nothing that can be changed; the scores, weights and breakdown are copied
+        """
+        copied = copy.copy(self)
+        copied.possible_scores = list(self.possible_scores)
+        copied.weights = None if self.weights is None else list(self.weights)
+        if self.breakdown is not None:
+            copied.breakdown = {
+                category: dict(points) for category, points in self.breakdown.items()
+            }
+        return copied
 
     def __str__(self) -> str:
         return f"{self.mean:.2f}±{self.stdev:.2f}"
@@ -30,6 +110,79 @@ class ScoringStats:
         return hash(self.possible_scores)
 
 
+def points_distribution(points: list[int], weights: list[float] | None) -> dict[int, float]:
+    """
+    The chance of each number of points, from a list of (optionally weighted) points.
+    """
+    totals: dict[int, float] = {}
+    if weights is None:
+        for i_points in points:
+            totals[i_points] = totals.get(i_points, 0.0) + 1.0
+    else:
+        for weight, i_points in zip(weights, points):
+            totals[i_points] = totals.get(i_points, 0.0) + weight
+    total_weight = sum(totals.values())
+    return {i_points: weight / total_weight for i_points, weight in sorted(totals.items())}
+
+
+def weighted_median(scores: list[int], weights: list[float]) -> float:
+    """
+    The score with half the total weight either side of it.
+    If the halfway point falls exactly between two scores, take the mean of them;
+    the same as statistics.median.
+    """
+    totals: dict[int, float] = {}
+    for weight, score in zip(weights, scores):
+        if weight > 0:
+            totals[score] = totals.get(score, 0.0) + weight
+
+    half_weight = sum(totals.values()) / 2
+    running_weight = 0.0
+    sorted_scores = sorted(totals)
+    for i_score, score in enumerate(sorted_scores):
+        running_weight += totals[score]
+        if running_weight > half_weight:
+            return score
+        if running_weight == half_weight:
+            return (score + sorted_scores[i_score + 1]) / 2
+    return sorted_scores[-1]
+
+
+class JointScoringStats:
+    """
+    Stats for the hand and crib scored together, against the same starter.
+    Each entry in possible_scores is a (hand score, crib score) pair for one starter and one
+    opponent discard; so the net score can be described as a single distribution.
+    As with ScoringStats, each entry can be weighted by how likely it is.
+    """
+
+    possible_scores: list[tuple[int, int]]
+    dealer_scores: ScoringStats
+    pone_scores: ScoringStats
+
+    def __init__(
+        self, scores: list[tuple[int, int]], weights: list[float] | None = None
+    ) -> None:
+        self.possible_scores = scores
+        # If it's your crib, the crib is added to your hand
+        self.dealer_scores = ScoringStats([hand + crib for hand, crib in scores], weights)
+        # If it's your opponent's crib, the crib counts against you
+        self.pone_scores = ScoringStats([hand - crib for hand, crib in scores], weights)
+
+    def copy(self) -> JointScoringStats:
+        """
+        A copy sharing nothing that can be changed
+        """
+        copied = copy.copy(self)
+        copied.possible_scores = list(self.possible_scores)
+        copied.dealer_scores = self.dealer_scores.copy()
+        copied.pone_scores = self.pone_scores.copy()
+        return copied
+
+    def __str__(self) -> str:
+        return f"dealer {self.dealer_scores}, pone {self.pone_scores}"
+
+
 class DiscardOption:
     """Stats for a hand+discard combo."""
 
@@ -38,6 +191,12 @@ class DiscardOption:
 
     hand_scores: ScoringStats
     crib_scores: ScoringStats
+    joint_scores: JointScoringStats | None
+    # Estimate of the opponent's hand score; the same for every discard from the same 6 cards
+    opponent_hand_ev: float | None
+    # Expected pegging points less the opponent's; if you're the dealer, or the pone
+    dealer_pegging_ev: float | None
+    pone_pegging_ev: float | None
 
     def __init__(
         self,
@@ -45,12 +204,18 @@ class DiscardOption:
         discard: set[Card],
         hand_scores: ScoringStats,
         crib_scores: ScoringStats,
+        joint_scores: JointScoringStats | None = None,
+        opponent_hand_ev: float | None = None,
+        pegging_evs: tuple[float, float] | None = None,
     ) -> None:
         self.hand = hand
         self.discard = discard
 
         self.hand_scores = hand_scores
         self.crib_scores = crib_scores
+        self.joint_scores = joint_scores
+        self.opponent_hand_ev = opponent_hand_ev
+        self.dealer_pegging_ev, self.pone_pegging_ev = pegging_evs or (None, None)
 
     def __str__(self) -> str:
         return f"keep {self.hand}, discard {self.discard}"
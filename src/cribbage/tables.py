@@ -0,0 +1,171 @@
+# -*- coding: utf-8 -*-
+"""
+Precomputed score tables, keyed on the card values only.
+
+Most of the score (15s, runs and pairs) only depends on the values of the cards, not their
+suits. There are far fewer multisets of values than there are hands, so these are scored
+once, on first use, and looked up after that.
+
+Multisets of values are stored as sorted tuples of ints (Ace = 1, King = 13).
+
+The order the crib deals are enumerated in is the same for every option; only which cards are
+unseen differs. So that's also kept as a table of indices into the list of unseen cards,
+and each option only looks up its own cards with gather.
+"""
+
+from __future__ import annotations
+
+from typing import Sequence, TypeVar
+
+from functools import cache
+from itertools import combinations, combinations_with_replacement
+from math import comb
+from operator import itemgetter
+
+from .cardenums import CardVal
+from .scorecalc import (
+    calculate_score_shared,
+    histogram_score_15s,
+    histogram_score_pairs,
+    histogram_score_runs,
+    val_histogram,
+)
+
+NUM_VALS = len(CardVal)
+NUM_SUITS = 4
+
+T = TypeVar("T")
+# Columns of indices into the unseen cards; see crib_deal_indices
+IndexColumns = tuple[tuple[int, ...], tuple[int, ...], tuple[int, ...]]
+
+
+def val_multisets(size: int) -> list[tuple[int, ...]]:
+    """
+    All the possible multisets of card values of the given size.
+    I.e. no value can turn up more than once per suit.
+    """
+    return [
+        vals
+        for vals in combinations_with_replacement(range(1, NUM_VALS + 1), size)
+        if all(vals.count(val) <= NUM_SUITS for val in set(vals))
+    ]
+
+
+@cache
+def val_multiset_counts(size: int) -> list[tuple[tuple[int, ...], tuple[tuple[int, int], ...]]]:
+    """
+    val_multisets, each with how many times each value turns up in it; as (value, count) pairs.
+    Built on first use.
+    """
+    return [
+        (vals, tuple((val, vals.count(val)) for val in sorted(set(vals))))
+        for vals in val_multisets(size)
+    ]
+
+
+@cache
+def shared_score_table() -> dict[tuple[int, ...], int]:
+    """
+    Table of calculate_score_shared for every multiset of 5 card values.
+    Built on first use.
+    """
+    return shared_score_table_for(5)
+
+
+@cache
+def shared_score_table_for(num_cards: int) -> dict[tuple[int, ...], int]:
+    """
+    Table of calculate_score_shared for every multiset of num_cards card values; e.g. 4 for the
+    3 card hand and starter of five-card cribbage.
+    Built on first use, for each size.
+    """
+    return {
+        vals: calculate_score_shared([CardVal(val) for val in vals])
+        for vals in val_multisets(num_cards)
+    }
+
+
+@cache
+def shared_breakdown_table() -> dict[tuple[int, ...], tuple[int, int, int]]:
+    """
+    Table of the (15s, runs, pairs) points for every multiset of 5 card values.
+    The same as shared_score_table, split up by scoring route.
+    Built on first use.
+    """
+    table = {}
+    for vals in val_multisets(5):
+        counts = val_histogram(vals)
+        table[vals] = (
+            histogram_score_15s(counts),
+            histogram_score_runs(counts),
+            histogram_score_pairs(counts),
+        )
+    return table
+
+
+@cache
+def keep_value_table() -> dict[tuple[int, ...], float]:
+    """
+    Table of the expected 15s/runs/pairs score of every multiset of 4 kept card values.
+    The starter is drawn from the other 48 cards, ignoring any other cards that are known.
+    Built on first use.
+    """
+    shared_scores = shared_score_table()
+    table = {}
+    for vals in val_multisets(4):
+        total = 0
+        for starter in range(1, NUM_VALS + 1):
+            remaining = NUM_SUITS - vals.count(starter)
+            if remaining:
+                total += remaining * shared_scores[tuple(sorted(vals + (starter,)))]
+        table[vals] = total / (NUM_VALS * NUM_SUITS - 4)
+    return table
+
+
+@cache
+def pair_crib_value_table() -> dict[tuple[int, ...], float]:
+    """
+    Table of the expected 15s/runs/pairs score that a pair of values brings to a crib.
+    The other 3 cards are drawn from the 50 cards left in the deck.
+    Built on first use.
+    """
+    shared_scores = shared_score_table()
+    table = {}
+    for pair in val_multisets(2):
+        total = 0
+        for others in val_multisets(3):
+            ways = 1
+            for val in set(others):
+                ways *= comb(NUM_SUITS - pair.count(val), others.count(val))
+            if ways:
+                total += ways * shared_scores[tuple(sorted(pair + others))]
+        table[pair] = total / comb(NUM_VALS * NUM_SUITS - 2, 3)
+    return table
+
+
+@cache
+def crib_deal_indices(num_unseen: int) -> IndexColumns:
+    """
+    Every crib deal from the unseen cards, as indices into the unseen cards; as columns of
+    (starter, opponent's first discard, opponent's second discard).
+    The same order as calculate_scores_from_crib; for each combination of 3 unseen cards, each
+    is the starter in turn, and the other two are the opponent's discard.
+    Built on first use, for each number of unseen cards.
+    """
+    starters = []
+    firsts = []
+    seconds = []
+    for first, second, third in combinations(range(num_unseen), 3):
+        starters += (first, second, third)
+        firsts += (second, first, first)
+        seconds += (third, third, second)
+    return tuple(starters), tuple(firsts), tuple(seconds)
+
+
+def gather(items: Sequence[T], indices: Sequence[int]) -> tuple[T, ...]:
+    """
+    The items at each of the indices, in one go
+    """
+    if len(indices) == 1:
+        return (items[indices[0]],)
+    return itemgetter(*indices)(items) if indices else ()
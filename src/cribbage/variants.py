@@ -0,0 +1,244 @@
+# -*- coding: utf-8 -*-
+"""
+Variants of the game; the rules for dealing and scoring, and the model of the crib for each.
+
+Two players: deal 6 each, discard 2 each to the crib.
+Three players: deal 5 each, discard 1 each, plus 1 card from the deck to the crib.
+Four players (in partnerships): deal 5 each, discard 1 each to the crib.
+Five-card (two players): deal 5 each, discard 2 each to the crib; so the hand is only 3 cards.
+    A 3 card flush in hand scores 3 (4 with the starter); a flush in the crib only counts if
+    the starter is the same suit too.
+
+Hands are scored from per-variant tables of the 15s, runs and pairs of every multiset of values
+(the hand and starter; see tables.shared_score_table_for), plus the flush and nobs.
+
+The crib is always 4 cards; your discards, plus some unknown cards. With one discard there
+are 3 unknown crib cards as well as the starter, which is far too many deals to score one at a
+time (4 x C(47, 4) per option). So the crib is scored from the values of the cards instead:
+    1. For each starter card, and each multiset of values for the unknown crib cards, count the
+        ways it can be dealt from the unseen cards; the product of C(unseen of value, needed).
+    2. Look up the 15s, runs and pairs for the 5 values (shared_score_table).
+    3. Nobs and flushes depend on the suits, but only on specific cards; so the number of those
+        ways that score them can be counted directly, without going through the suits.
+This gives the exact distribution of crib scores, as a count of the ways of getting each score.
+"""
+
+from __future__ import annotations
+
+from typing import Iterable
+
+from collections import defaultdict
+from math import comb
+
+from .card import Card
+from .cardenums import CardVal
+from .scorecalc import (
+    calculate_score_4_flush,
+    calculate_score_5_nobs,
+    histogram_score_15s,
+    histogram_score_pairs,
+    histogram_score_runs,
+    val_histogram,
+)
+from .tables import NUM_VALS, shared_score_table, shared_score_table_for, val_multiset_counts
+
+CRIB_SIZE = 4
+
+
+class GameVariant:
+    """
+    The rules of a variant; how the cards are dealt, and how flushes in the crib score.
+    hand_size is the number of cards dealt to each player.
+    """
+
+    name: str
+    num_players: int
+    hand_size: int
+    num_discard: int
+    crib_from_deck: int
+    crib_flush_needs_starter: bool
+
+    def __init__(  # pylint: disable=too-many-arguments
+        self,
+        name: str,
+        num_players: int,
+        hand_size: int,
+        num_discard: int,
+        crib_from_deck: int = 0,
+        crib_flush_needs_starter: bool = False,
+    ) -> None:
+        self.name = name
+        self.num_players = num_players
+        self.hand_size = hand_size
+        self.num_discard = num_discard
+        self.crib_from_deck = crib_from_deck
+        self.crib_flush_needs_starter = crib_flush_needs_starter
+
+    @property
+    def keep_size(self) -> int:
+        """
+        How many cards are kept in hand
+        """
+        return self.hand_size - self.num_discard
+
+    @property
+    def is_standard(self) -> bool:
+        """
+        If this is scored the same as the standard two player game; so everything in
+        cribbage_eu can be used.
+        """
+        return (
+            self.num_players == 2
+            and self.keep_size == 4
+            and self.num_unknown_crib == 2
+            and not self.crib_flush_needs_starter
+        )
+
+    def hand_score_table(self) -> dict[tuple[int, ...], int]:
+        """
+        The 15s, runs and pairs of every multiset of values of the hand and starter.
+        Built on first use; variants with the same size hand share it.
+        """
+        return shared_score_table_for(self.keep_size + 1)
+
+    @property
+    def num_unknown_crib(self) -> int:
+        """
+        How many of the crib cards you can't see; everyone else's discards and any from the deck
+        """
+        return CRIB_SIZE - self.num_discard
+
+    def __repr__(self) -> str:
+        return f"GameVariant<{self.name}>"
+
+
+# Flushes in the crib are scored the same as in hand, as calculate_score always has
+TWO_PLAYER = GameVariant("two_player", 2, 6, 2)
+THREE_PLAYER = GameVariant("three_player", 3, 5, 1, 1)
+FOUR_PLAYER = GameVariant("four_player", 4, 5, 1)
+FIVE_CARD = GameVariant("five_card", 2, 5, 2, crib_flush_needs_starter=True)
+
+VARIANTS = {
+    variant.name: variant for variant in (TWO_PLAYER, THREE_PLAYER, FOUR_PLAYER, FIVE_CARD)
+}
+
+
+def score_variant_hand(
+    hand: set[Card], starter: Card, variant: GameVariant, is_crib: bool = False
+) -> int:
+    """
+    Score a hand (or crib), under the rules of the variant; as calculate_score, for any size.
+    Scores one hand from scratch; variant_hand_scores and crib_score_counts use the tables.
+    """
+    if len(hand) != (CRIB_SIZE if is_crib else variant.keep_size):
+        raise ValueError(f"Wrong number of cards for {variant.name}")
+
+    counts = val_histogram(i_card.val for i_card in hand)
+    counts[starter.val] += 1
+    flush = calculate_score_4_flush(hand, starter)
+    if is_crib and variant.crib_flush_needs_starter and flush == len(hand):
+        flush = 0
+    return (
+        histogram_score_15s(counts)
+        + histogram_score_runs(counts)
+        + histogram_score_pairs(counts)
+        + flush
+        + calculate_score_5_nobs(hand, starter)
+    )
+
+
+def variant_hand_scores(
+    hand: set[Card], unseen: Iterable[Card], variant: GameVariant
+) -> list[int]:
+    """
+    The score of the hand with each unseen card as the starter, under the rules of the variant
+    """
+    table = variant.hand_score_table()
+    hand_vals = tuple(int(i_card.val) for i_card in hand)
+    hand_suits = {i_card.suit for i_card in hand}
+    flush_suit = hand_suits.pop() if len(hand_suits) == 1 else None
+    jack_suits = {i_card.suit for i_card in hand if i_card.val == CardVal.VAL_J}
+
+    scores = []
+    for starter in unseen:
+        score = table[tuple(sorted(hand_vals + (int(starter.val),)))]
+        if flush_suit is not None:
+            score += len(hand) + (starter.suit == flush_suit)
+        scores.append(score + (starter.suit in jack_suits))
+    return scores
+
+
+def crib_score_counts(
+    discard: set[Card],
+    unseen: Iterable[Card],
+    num_unknown: int,
+    flush_needs_starter: bool = False,
+) -> dict[int, int]:
+    """
+    The number of ways of getting each crib score; given your discards, and that the starter
+    and the other num_unknown crib cards come from the unseen cards.
+    Scored as calculate_score does; unless flush_needs_starter is set, when a flush only
+    counts if the starter is the same suit.
+    """
+    unseen_keys = {(int(i_card.val), i_card.suit) for i_card in unseen}
+    unseen_count = [0] * (NUM_VALS + 1)
+    for val, _ in unseen_keys:
+        unseen_count[val] += 1
+
+    discard_vals = tuple(int(i_card.val) for i_card in discard)
+    discard_suits = {i_card.suit for i_card in discard}
+    # All the crib cards have to be this suit for a flush
+    flush_suit = discard_suits.pop() if len(discard_suits) == 1 else None
+    discarded_jack_suits = {i_card.suit for i_card in discard if i_card.val == CardVal.VAL_J}
+    jack = int(CardVal.VAL_J)
+
+    shared_scores = shared_score_table()
+    multisets = val_multiset_counts(num_unknown)
+    counts: dict[int, int] = defaultdict(int)
+
+    for starter_val, starter_suit in unseen_keys:
+        remaining = unseen_count.copy()
+        remaining[starter_val] -= 1
+        # Nobs from your discards, or the unknown cards if they hold the right jack
+        nobs_discarded = starter_suit in discarded_jack_suits
+        nobs_jack_unseen = (jack, starter_suit) in unseen_keys and starter_val != jack
+
+        for vals, val_counts in multisets:
+            ways = 1
+            for val, count in val_counts:
+                ways *= comb(remaining[val], count)
+            if not ways:
+                continue
+            score = shared_scores[tuple(sorted(discard_vals + vals + (starter_val,)))]
+            num_jacks = vals.count(jack)
+
+            # Of the ways, how many hold the jack of the starter's suit
+            if nobs_discarded:
+                nobs_ways = ways
+            elif nobs_jack_unseen and num_jacks:
+                nobs_ways = ways * num_jacks // remaining[jack]
+            else:
+                nobs_ways = 0
+
+            # There's at most one way for the unknown cards to all be the flush suit
+            flush = (
+                flush_suit is not None
+                and not (flush_needs_starter and flush_suit != starter_suit)
+                and all(
+                    count == 1
+                    and (val, flush_suit) in unseen_keys
+                    and (val, flush_suit) != (starter_val, starter_suit)
+                    for val, count in val_counts
+                )
+            )
+            if flush:
+                flush_nobs = nobs_discarded or (flush_suit == starter_suit and num_jacks > 0)
+                flush_points = 5 if flush_suit == starter_suit else 4
+                counts[score + flush_points + flush_nobs] += 1
+                ways -= 1
+                nobs_ways -= flush_nobs
+
+            counts[score] += ways - nobs_ways
+            counts[score + 1] += nobs_ways
+
+    return {score: ways for score, ways in sorted(counts.items()) if ways}
@@ -0,0 +1,323 @@
+# -*- coding: utf-8 -*-
+"""
+Exhaustive check of the fast scoring paths against the per-combination scorers. Run by
+`cribbage verify`.
+
+Every 4 card hand is scored with each of the other 48 cards as the starter; 270,725 hands,
+12,994,800 scores. Each is scored by the reference, combination_scores: the per-combination
+scorers (calculate_score_1_15s etc.) that the histogram scorers replaced, which look at every
+combination of cards, so share nothing with the fast paths. Each fast path must agree exactly.
+The fast paths are the ways the analysis scores hands:
+    calculate_score: the histogram scorers; as the single hand scoring does
+    shared_table: 15s, runs and pairs from shared_score_table, plus the flush and nobs; as the
+        joint scores and crib_score_counts do
+    variant_table: variant_hand_scores, for the two player game; as the variants do
+    variant_hand: score_variant_hand, for the two player game
+
+The frequency of each score from the reference is also checked against the well known
+distribution (e.g. 76 ways to score 28, and 4 to score 29, out of 12,994,800).
+
+The hands are split into chunks (in the order of combinations of the cards, by card ID), which
+are checked on a pool of worker processes (or in this process, if there's only one).
+A full run takes about 16 minutes of CPU time, shared between the workers.
+"""
+
+from __future__ import annotations
+
+from typing import Callable, Iterable, Iterator
+
+from collections import Counter
+from itertools import combinations, islice
+from math import comb
+
+from .canonical import card_id
+from .card import Card, all_possible_cards
+from .parallel import run_chunks
+from .scorecalc import (
+    calculate_score,
+    calculate_score_1_15s,
+    calculate_score_2_runs,
+    calculate_score_3_pairs,
+    calculate_score_4_flush,
+    calculate_score_5_nobs,
+)
+from .tables import shared_score_table
+from .variants import TWO_PLAYER, score_variant_hand, variant_hand_scores
+
+HAND_SIZE = 4
+NUM_HANDS = comb(52, HAND_SIZE)
+DEFAULT_CHUNKS = 64
+# Mismatches kept to show; all of them are counted
+MAX_MISMATCHES = 20
+
+# The number of (hand, starter) pairs with each score; from any table of cribbage hand
+# statistics. Scores not listed (19, 25, 26 and 27) can't be made.
+KNOWN_SCORE_FREQUENCIES = {
+    0: 1009008,
+    1: 99792,
+    2: 2813796,
+    3: 505008,
+    4: 2855676,
+    5: 697508,
+    6: 1800268,
+    7: 751324,
+    8: 1137236,
+    9: 361224,
+    10: 388740,
+    11: 51680,
+    12: 317340,
+    13: 19656,
+    14: 90100,
+    15: 9168,
+    16: 58248,
+    17: 11196,
+    18: 2708,
+    20: 8068,
+    21: 2496,
+    22: 444,
+    23: 356,
+    24: 3680,
+    28: 76,
+    29: 4,
+}
+
+ScorePath = Callable[[set[Card], list[Card]], list[int]]
+
+
+def shared_table_scores(hand: set[Card], starters: list[Card]) -> list[int]:
+    """
+    The 15s, runs and pairs from the table of every multiset of 5 values, plus flush and nobs
+    """
+    table = shared_score_table()
+    hand_vals = tuple(int(i_card.val) for i_card in hand)
+    return [
+        table[tuple(sorted(hand_vals + (int(starter.val),)))]
+        + calculate_score_4_flush(hand, starter)
+        + calculate_score_5_nobs(hand, starter)
+        for starter in starters
+    ]
+
+
+def calculate_scores(hand: set[Card], starters: list[Card]) -> list[int]:
+    """
+    calculate_score; one starter at a time
+    """
+    return [calculate_score(hand, starter) for starter in starters]
+
+
+def variant_table_scores(hand: set[Card], starters: list[Card]) -> list[int]:
+    """
+    variant_hand_scores, for the two player game
+    """
+    return variant_hand_scores(hand, starters, TWO_PLAYER)
+
+
+def variant_hand_scores_each(hand: set[Card], starters: list[Card]) -> list[int]:
+    """
+    score_variant_hand, for the two player game; one starter at a time
+    """
+    return [score_variant_hand(hand, starter, TWO_PLAYER) for starter in starters]
+
+
+def combination_scores(hand: set[Card], starters: list[Card]) -> list[int]:
+    """
+    The per-combination scorers; looking at every combination of cards. The reference
+    """
+    scores = []
+    for starter in starters:
+        vals = [i_card.val for i_card in hand] + [starter.val]
+        scores.append(
+            calculate_score_1_15s(vals)
+            + calculate_score_2_runs(vals)
+            + calculate_score_3_pairs(vals)
+            + calculate_score_4_flush(hand, starter)
+            + calculate_score_5_nobs(hand, starter)
+        )
+    return scores
+
+
+FAST_PATHS: dict[str, ScorePath] = {
+    "calculate_score": calculate_scores,
+    "shared_table": shared_table_scores,
+    "variant_table": variant_table_scores,
+    "variant_hand": variant_hand_scores_each,
+}
+DEFAULT_PATHS = list(FAST_PATHS)
+
+
+class Mismatch:
+    """
+    A hand and starter where a fast path gave a different score to the reference
+    """
+
+    path: str
+    hand: tuple[Card, ...]
+    starter: Card
+    expected: int
+    actual: int
+
+    def __init__(  # pylint: disable=too-many-arguments
+        self, path: str, hand: tuple[Card, ...], starter: Card, expected: int, actual: int
+    ) -> None:
+        self.path = path
+        self.hand = hand
+        self.starter = starter
+        self.expected = expected
+        self.actual = actual
+
+    def __str__(self) -> str:
+        hand = " ".join(str(x) for x in self.hand)
+        return (
+            f"{self.path}: {hand} with starter {self.starter} "
+            f"scored {self.actual}, expected {self.expected}"
+        )
+
+
+class VerifyTotals:
+    """
+    What's been checked so far; merged from each chunk
+    """
+
+    paths: list[str]
+    chunks: int
+    hands: int
+    frequencies: Counter[int]
+    mismatch_counts: dict[str, int]
+    mismatches: list[Mismatch]
+
+    def __init__(self, paths: list[str]) -> None:
+        self.paths = paths
+        self.chunks = 0
+        self.hands = 0
+        self.frequencies = Counter()
+        self.mismatch_counts = {path: 0 for path in paths}
+        self.mismatches = []
+
+    def merge(self, other: VerifyTotals) -> None:
+        """
+        Add the totals of another chunk
+        """
+        self.chunks += other.chunks
+        self.hands += other.hands
+        self.frequencies.update(other.frequencies)
+        for path, count in other.mismatch_counts.items():
+            self.mismatch_counts[path] += count
+        self.mismatches.extend(other.mismatches[: MAX_MISMATCHES - len(self.mismatches)])
+
+    @property
+    def scores(self) -> int:
+        """
+        (hand, starter) pairs scored
+        """
+        return sum(self.frequencies.values())
+
+    def frequency_errors(self) -> dict[int, tuple[int, int]]:
+        """
+        Scores with a different frequency to KNOWN_SCORE_FREQUENCIES, as
+        {score: (expected, actual)}; only meaningful once every hand has been checked
+        """
+        return {
+            score: (KNOWN_SCORE_FREQUENCIES.get(score, 0), self.frequencies.get(score, 0))
+            for score in sorted(set(KNOWN_SCORE_FREQUENCIES) | set(self.frequencies))
+            if KNOWN_SCORE_FREQUENCIES.get(score, 0) != self.frequencies.get(score, 0)
+        }
+
+    @property
+    def passed(self) -> bool:
+        """
+        No mismatches; and if every hand was checked, the frequencies are right
+        """
+        if any(self.mismatch_counts.values()):
+            return False
+        return self.hands < NUM_HANDS or not self.frequency_errors()
+
+
+def chunk_bounds(num_chunks: int) -> list[tuple[int, int]]:
+    """
+    The (first, last + 1) hand of each chunk, in the order of combinations of the cards
+    """
+    size = -(-NUM_HANDS // num_chunks)
+    return [(start, min(start + size, NUM_HANDS)) for start in range(0, NUM_HANDS, size)]
+
+
+def verify_chunk(start: int, stop: int, paths: list[str]) -> VerifyTotals:
+    """
+    Check hands start to stop - 1 (in the order of combinations of the cards) by each path
+    """
+    cards = sorted(all_possible_cards(), key=card_id)
+    score_paths = [(path, FAST_PATHS[path]) for path in paths]
+    totals = VerifyTotals(paths)
+    totals.chunks = 1
+
+    for hand_tuple in islice(combinations(cards, HAND_SIZE), start, stop):
+        hand = set(hand_tuple)
+        starters = [x for x in cards if x not in hand]
+        expected = combination_scores(hand, starters)
+        totals.frequencies.update(expected)
+        totals.hands += 1
+
+        for path, score_path in score_paths:
+            actual = score_path(hand, starters)
+            for starter, expected_score, actual_score in zip(starters, expected, actual):
+                if expected_score == actual_score:
+                    continue
+                totals.mismatch_counts[path] += 1
+                if len(totals.mismatches) < MAX_MISMATCHES:
+                    totals.mismatches.append(
+                        Mismatch(path, hand_tuple, starter, expected_score, actual_score)
+                    )
+    return totals
+
+
+def verify(
+    paths: list[str] | None = None,
+    num_chunks: int = DEFAULT_CHUNKS,
+    max_workers: int | None = None,
+    only_chunks: Iterable[int] | None = None,
+) -> Iterator[VerifyTotals]:
+    """
+    Check every hand by each fast path (DEFAULT_PATHS by default), giving the totals so far
+    after each chunk. only_chunks checks only those chunks (of num_chunks), for a quick trial.
+    """
+    paths = list(DEFAULT_PATHS) if paths is None else paths
+    unknown = [path for path in paths if path not in FAST_PATHS]
+    if unknown:
+        raise ValueError(f"Unknown paths {unknown}; choose from {', '.join(FAST_PATHS)}")
+
+    bounds = chunk_bounds(num_chunks)
+    if only_chunks is not None:
+        bounds = [bounds[i_chunk] for i_chunk in only_chunks]
+    totals = VerifyTotals(paths)
+
+    chunks = [(start, stop, paths) for start, stop in bounds]
+    for _, chunk_totals in run_chunks(verify_chunk, chunks, max_workers):
+        totals.merge(chunk_totals)
+        yield totals
+
+
+def render_report(totals: VerifyTotals) -> str:
+    """
+    Mismatches of each path, and the check of the score frequencies
+    """
+    lines = [
+        f"Checked {totals.hands} of {NUM_HANDS} hands, {totals.scores} scores, "
+        f"in {totals.chunks} chunks"
+    ]
+    for path in totals.paths:
+        lines.append(f"    {path:<14} {totals.mismatch_counts[path]} mismatches")
+    if totals.mismatches:
+        lines.append("First mismatches:")
+        lines.extend(f"    {mismatch}" for mismatch in totals.mismatches)
+
+    if totals.hands < NUM_HANDS:
+        lines.append("Score frequencies not checked; not every hand was checked")
+    elif totals.frequency_errors():
+        lines.append("Score frequencies differ from the known distribution (expected, actual):")
+        lines.extend(
+            f"    {score:>2}: {expected}, {actual}"
+            for score, (expected, actual) in totals.frequency_errors().items()
+        )
+    else:
+        lines.append("Score frequencies match the known distribution")
+    lines.append("PASSED" if totals.passed else "FAILED")
+    return "\n".join(lines)
@@ -0,0 +1,269 @@
+# -*- coding: utf-8 -*-
+"""
+"What if I'd been dealt this card instead?"; re-analysing a hand when one card changes,
+starting from the analysis of the hand as it was.
+
+Every option holds the changed card, either in the hand or in the discard; the other side is
+unchanged, and only the unseen cards it's scored against differ (the old card is now unseen,
+and the new card isn't). So for each option, only one side is scored from scratch:
+    Old card in the hand: the hand is rescored (one score per starter; cheap). The crib keeps
+        every deal that doesn't use the new card, and only the deals using the old card are
+        scored; about 1 in 15 of them.
+    Old card in the discard: the crib is rescored. The hand keeps every starter but the new
+        card, and is scored with the old card as the starter.
+The scores come out in the same order as a fresh analysis, so the results are exactly the same.
+
+Adjusting the crib only scores a few thousand deals, so options with the old card in the hand
+are worked out in this process. Rescoring the crib (about 45,000 deals) is what's worth sending
+to worker processes; those options go to the pool of an AnalysisEngine if one is given (so no
+new pool is started), or to a pool of their own otherwise.
+
+Joint scores and breakdowns can't be adjusted like this (the hand score is in every joint
+entry, and breakdowns only keep their distributions), so options with those are worked out
+again in full. Pegging and the opponent's hand depend on all the unseen cards, so are worked
+out again too; those options are also sent to the workers.
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Iterator
+
+from functools import partial
+from itertools import combinations
+
+from .card import Card, all_possible_cards
+from .cribbage_eu import (
+    calculate_crib_weights,
+    calculate_joint_score_for_option,
+    calculate_score_for_option,
+    calculate_scores_from_crib,
+    calculate_scores_from_hand,
+    calculate_variant_score_for_option,
+)
+from .opponent import OpponentDiscardModel, estimate_opponent_hand_ev
+from .parallel import run_chunks
+from .pegging import calculate_pegging_evs
+from .scorecalc import calculate_score
+from .stats import DiscardOption, ScoringStats
+from .variants import GameVariant
+
+if TYPE_CHECKING:
+    from .engine import AnalysisEngine
+
+
+def substitute_card(  # pylint: disable=too-many-arguments
+    previous: list[DiscardOption],
+    old_card: Card,
+    new_card: Card,
+    discard_model: OpponentDiscardModel | None = None,
+    variant: GameVariant | None = None,
+    max_workers: int | None = None,
+    engine: AnalysisEngine | None = None,
+) -> list[DiscardOption]:
+    """
+    The options of the hand with old_card swapped for new_card, in the same order as previous
+    (every option of one hand, e.g. from calculate_cribbage_eu).
+    The same things are worked out as for previous (pegging, opponent_ev, joint, breakdown);
+    discard_model and variant must be the same as previous was worked out with.
+    Options that are rescored in full are worked out on the engine's pool, if given;
+    otherwise on a pool of max_workers processes.
+    """
+    if not previous:
+        return []
+    initial_hand = previous[0].hand | previous[0].discard
+    if old_card not in initial_hand:
+        raise ValueError(f"{old_card} isn't in the hand")
+    if new_card in initial_hand:
+        raise ValueError(f"{new_card} is already in the hand")
+    if any(option.hand | option.discard != initial_hand for option in previous):
+        raise ValueError("The options must all be from the same hand")
+
+    if discard_model is not None:
+        # Build the weights once, here, so they're sent to each worker with the model
+        discard_model.pair_weights()
+
+    option_func = partial(
+        substitute_option,
+        old_card=old_card,
+        new_card=new_card,
+        discard_model=discard_model,
+        variant=variant,
+    )
+    results: list[DiscardOption | None] = [None] * len(previous)
+    rescored = []
+    for i_option, option in enumerate(previous):
+        if _rescored(option, old_card, variant):
+            rescored.append(i_option)
+        else:
+            results[i_option] = option_func(option)
+
+    if engine is not None:
+        futures = [engine.submit_call(option_func, previous[x]) for x in rescored]
+        for i_option, future in zip(rescored, futures):
+            results[i_option] = future.result()
+    else:
+        jobs = [(previous[x],) for x in rescored]
+        for i_job, result in run_chunks(option_func, jobs, max_workers):
+            results[rescored[i_job]] = result
+
+    options = [option for option in results if option is not None]
+    if previous[0].opponent_hand_ev is not None:
+        opponent_hand_ev = estimate_opponent_hand_ev(initial_hand - {old_card} | {new_card})
+        for option in options:
+            option.opponent_hand_ev = opponent_hand_ev
+    return options
+
+
+def _rescored(option: DiscardOption, old_card: Card, variant: GameVariant | None) -> bool:
+    """
+    Whether substitute_option scores the crib (or everything) from scratch, or works out the
+    pegging; rather than only adjusting what the swap changes
+    """
+    if variant is not None and not variant.is_standard:
+        return False
+    return (
+        old_card in option.discard
+        or option.joint_scores is not None
+        or option.hand_scores.breakdown is not None
+        or option.dealer_pegging_ev is not None
+    )
+
+
+def substitute_option(
+    option: DiscardOption,
+    old_card: Card,
+    new_card: Card,
+    discard_model: OpponentDiscardModel | None = None,
+    variant: GameVariant | None = None,
+) -> DiscardOption:
+    """
+    One option, with old_card swapped for new_card; old_card must be in the hand or discard.
+    Scores only what the swap changes (see the module docstring). opponent_hand_ev isn't set.
+    """
+    old_known = option.hand | option.discard
+    if old_card not in old_known:
+        raise ValueError(f"{old_card} isn't in the option")
+    if new_card in old_known:
+        raise ValueError(f"{new_card} is already in the option")
+    if variant is None and (discard_model is None) != (option.crib_scores.weights is None):
+        raise ValueError("discard_model must be the same as the option was worked out with")
+
+    hand = _swap(option.hand, old_card, new_card)
+    discard = _swap(option.discard, old_card, new_card)
+    pegging = option.dealer_pegging_ev is not None
+    breakdown = option.hand_scores.breakdown is not None
+
+    if variant is not None and not variant.is_standard:
+        # Scored from the tables; quick enough to do again
+        return calculate_variant_score_for_option(hand, discard, variant=variant)
+    if option.joint_scores is not None:
+        return calculate_joint_score_for_option(
+            hand, discard, discard_model, pegging, None, breakdown
+        )
+    if breakdown:
+        return calculate_score_for_option(hand, discard, discard_model, pegging, None, True)
+
+    old_unseen = _unseen(old_known)
+    new_unseen = _unseen(hand | discard)
+    if old_card in option.hand:
+        hand_scores = calculate_scores_from_hand(hand, discard)
+        crib_scores, crib_weights = _adjust_crib(
+            option.crib_scores, discard, old_unseen, new_unseen, discard_model
+        )
+    else:
+        hand_scores = _adjust_hand(
+            option.hand_scores.possible_scores, hand, old_unseen, new_unseen
+        )
+        crib_scores = calculate_scores_from_crib(hand, discard)
+        crib_weights = (
+            None
+            if discard_model is None
+            else calculate_crib_weights(hand, discard, discard_model)
+        )
+
+    return DiscardOption(
+        hand,
+        discard,
+        ScoringStats(hand_scores),
+        ScoringStats(crib_scores, crib_weights),
+        pegging_evs=(
+            calculate_pegging_evs(hand, hand | discard, discard_model) if pegging else None
+        ),
+    )
+
+
+def _swap(cards: set[Card], old_card: Card, new_card: Card) -> set[Card]:
+    return cards - {old_card} | {new_card} if old_card in cards else set(cards)
+
+
+def _unseen(known_cards: set[Card]) -> list[Card]:
+    """
+    The unseen cards, in the order the scores are worked out in
+    """
+    return [i_card for i_card in all_possible_cards() if i_card not in known_cards]
+
+
+def _adjust_hand(
+    old_scores: list[int], hand: set[Card], old_unseen: list[Card], new_unseen: list[Card]
+) -> list[int]:
+    """
+    The hand scores for the new unseen cards; the same as calculate_scores_from_hand.
+    The score for each starter still unseen is kept, and the card now unseen is scored.
+    """
+    (gone,) = set(old_unseen) - set(new_unseen)
+    (returned,) = set(new_unseen) - set(old_unseen)
+    kept = iter(
+        score for starter, score in zip(old_unseen, old_scores, strict=True) if starter != gone
+    )
+    return [
+        calculate_score(hand, starter) if starter == returned else next(kept)
+        for starter in new_unseen
+    ]
+
+
+def _adjust_crib(
+    old_stats: ScoringStats,
+    discard: set[Card],
+    old_unseen: list[Card],
+    new_unseen: list[Card],
+    discard_model: OpponentDiscardModel | None,
+) -> tuple[list[int], list[float] | None]:
+    """
+    The crib scores (and weights) for the new unseen cards; the same as
+    calculate_scores_from_crib and calculate_crib_weights.
+    The deals not using the card no longer unseen are kept, and the deals using the card now
+    unseen are scored. Both are enumerated in the same order, so the deals kept stay in order.
+    """
+    (gone,) = set(old_unseen) - set(new_unseen)
+    (returned,) = set(new_unseen) - set(old_unseen)
+    kept = _kept_entries(old_unseen, gone)
+    old_scores = old_stats.possible_scores
+    old_weights = old_stats.weights
+
+    scores: list[int] = []
+    weights: list[float] | None = None if discard_model is None else []
+    for cards_tuple in combinations(new_unseen, 3):
+        if returned not in cards_tuple:
+            for _ in range(3):
+                i_entry = next(kept)
+                scores.append(old_scores[i_entry])
+                if weights is not None and old_weights is not None:
+                    weights.append(old_weights[i_entry])
+            continue
+
+        cards = set(cards_tuple)
+        for i_starter in cards_tuple:
+            scores.append(calculate_score(discard | (cards - {i_starter}), i_starter))
+            if weights is not None and discard_model is not None:
+                first, second = (i_card for i_card in cards_tuple if i_card != i_starter)
+                weights.append(discard_model.weight(first, second))
+    return scores, weights
+
+
+def _kept_entries(old_unseen: list[Card], gone: Card) -> Iterator[int]:
+    """
+    The index of each crib deal (as calculate_scores_from_crib) that doesn't use the card gone
+    """
+    for i_combo, cards_tuple in enumerate(combinations(old_unseen, 3)):
+        if gone not in cards_tuple:
+            yield from range(3 * i_combo, 3 * i_combo + 3)
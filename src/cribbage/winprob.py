@@ -0,0 +1,331 @@
+# -*- coding: utf-8 -*-
+"""
+Probability of winning the game, from the scores and who's dealing.
+
+Near the end of the game the best discard is the one most likely to win, not the one with the
+best EU. This needs the chance of winning from every score, which is built with dynamic
+programming over the points scored in a deal:
+    W(me, opp, dealer) = chance I win, at the start of a deal.
+    In each deal the pone counts first, then the dealer. First to 121 wins.
+    If nobody wins, the next deal starts with the other player dealing.
+
+The default per-deal points are the show only (no pegging):
+    Hand: the best 4 cards by expected 15s/runs/pairs, from 6 random cards.
+    Crib: 5 random cards.
+Flushes and nobs are left out. Any other distributions can be used to build a table.
+
+Tables are stored compactly (2 bytes per probability) and the default table is loaded on
+first use; from the copy shipped with the package if there is one, otherwise it's built.
+"""
+
+from __future__ import annotations
+
+from array import array
+from collections import Counter
+from functools import cache
+from math import comb, prod
+
+import importlib.resources
+
+from .tables import NUM_SUITS, NUM_VALS, keep_value_table, shared_score_table, val_multisets
+
+WINNING_SCORE = 121
+
+# Probabilities are stored as 0..65535
+_SCALE = 65535
+_DEFAULT_TABLE_FILE = "win_probability.bin"
+
+Distribution = dict[int, float]
+
+
+class WinProbabilityTable:
+    """
+    Chance of winning from each score, at the start of a deal.
+    Indexed by (my score, opponent's score, whether I'm the dealer).
+    """
+
+    _probabilities: array
+
+    def __init__(self, probabilities: array) -> None:
+        if len(probabilities) != WINNING_SCORE * WINNING_SCORE * 2:
+            raise ValueError("Wrong number of entries for a win probability table")
+        self._probabilities = probabilities
+
+    def win_probability(self, my_score: int, opp_score: int, dealer: bool) -> float:
+        """
+        Chance I win from these scores, at the start of a deal.
+        """
+        if my_score >= WINNING_SCORE:
+            return 1.0
+        if opp_score >= WINNING_SCORE:
+            return 0.0
+        idx = (my_score * WINNING_SCORE + opp_score) * 2 + dealer
+        return self._probabilities[idx] / _SCALE
+
+    @classmethod
+    def build(
+        cls, pone_points: Distribution, dealer_points: Distribution
+    ) -> WinProbabilityTable:
+        """
+        Build the table from the points scored by the pone and by the dealer in a deal.
+        """
+        return cls(_solve(pone_points, dealer_points))
+
+    def to_bytes(self) -> bytes:
+        """
+        Compact form of the table; 2 bytes per entry, little endian.
+        """
+        probabilities = array("H", self._probabilities)
+        if probabilities.itemsize != 2:
+            raise ValueError("Need 2 byte unsigned ints to store the table")
+        return _little_endian(probabilities).tobytes()
+
+    @classmethod
+    def from_bytes(cls, raw: bytes) -> WinProbabilityTable:
+        """
+        Load a table made by to_bytes
+        """
+        probabilities = array("H")
+        probabilities.frombytes(raw)
+        return cls(_little_endian(probabilities))
+
+    def save(self, path: str) -> None:
+        """
+        Write the table to a file
+        """
+        with open(path, "wb") as table_file:
+            table_file.write(self.to_bytes())
+
+    @classmethod
+    def load(cls, path: str) -> WinProbabilityTable:
+        """
+        Read a table written by save
+        """
+        with open(path, "rb") as table_file:
+            return cls.from_bytes(table_file.read())
+
+
+def _little_endian(probabilities: array) -> array:
+    """
+    The stored tables are little endian; swap if this machine isn't.
+    """
+    if array("H", [1]).tobytes()[0] != 1:
+        probabilities.byteswap()
+    return probabilities
+
+
+def _solve(pone_points: Distribution, dealer_points: Distribution) -> array:
+    """
+    Work back from the end of the game.
+
+    States only lead to states with at least the same scores, so working down from the highest
+    scores means everything needed is known, except for deals where nobody scores. Those lead
+    back to the same scores with the deal swapped, so the two states for each pair of scores
+    are solved together.
+
+    Two partial sums are kept, so each state is a couple of short sums:
+        after_pone[me][opp]: chance I win if I'm the dealer, the pone has counted and
+            the scores are now (me, opp); summed over my count.
+        after_me[me][opp]: chance I win if I'm the pone, I've counted and the scores are now
+            (me, opp); summed over the dealer's count.
+    """
+    size = WINNING_SCORE
+    win = [[[0.0, 0.0] for _ in range(size)] for _ in range(size)]
+    after_pone = [[0.0] * size for _ in range(size)]
+    after_me = [[0.0] * size for _ in range(size)]
+
+    pone_items = sorted(pone_points.items())
+    dealer_items = sorted(dealer_points.items())
+    pone_zero = pone_points.get(0, 0.0)
+    dealer_zero = dealer_points.get(0, 0.0)
+    no_score = pone_zero * dealer_zero
+
+    for me in range(size - 1, -1, -1):
+        for opp in range(size - 1, -1, -1):
+            # Partial sums, leaving out scoring 0 (which would need this state)
+            after_pone_rest = sum(
+                chance * (1.0 if me + points >= size else win[me + points][opp][0])
+                for points, chance in dealer_items
+                if points
+            )
+            after_me_rest = sum(
+                chance * (0.0 if opp + points >= size else win[me][opp + points][1])
+                for points, chance in dealer_items
+                if points
+            )
+
+            # I'm the dealer; the pone counts first
+            dealer_rest = pone_zero * after_pone_rest + sum(
+                chance * after_pone[me][opp + points]
+                for points, chance in pone_items
+                if points and opp + points < size
+            )
+            # I'm the pone; I count first
+            pone_rest = pone_zero * after_me_rest + sum(
+                chance * (1.0 if me + points >= size else after_me[me + points][opp])
+                for points, chance in pone_items
+                if points
+            )
+
+            # win_dealer = dealer_rest + no_score * win_pone, and vice versa
+            win_dealer = (dealer_rest + no_score * pone_rest) / (1 - no_score * no_score)
+            win_pone = pone_rest + no_score * win_dealer
+            win[me][opp] = [win_pone, win_dealer]
+
+            after_pone[me][opp] = after_pone_rest + dealer_zero * win_pone
+            after_me[me][opp] = after_me_rest + dealer_zero * win_dealer
+
+    return array(
+        "H",
+        (
+            round(win[me][opp][dealer] * _SCALE)
+            for me in range(size)
+            for opp in range(size)
+            for dealer in (0, 1)
+        ),
+    )
+
+
+def convolve(first: Distribution, second: Distribution) -> Distribution:
+    """
+    Distribution of the sum of two independent scores
+    """
+    total: Distribution = {}
+    for first_points, first_chance in first.items():
+        for second_points, second_chance in second.items():
+            points = first_points + second_points
+            total[points] = total.get(points, 0.0) + first_chance * second_chance
+    return total
+
+
+def scores_to_distribution(
+    scores: list[int], weights: list[float] | None = None
+) -> Distribution:
+    """
+    Turn a list of equally likely (or weighted) scores into a distribution
+    """
+    if weights is None:
+        counts = Counter(scores)
+        return {points: count / len(scores) for points, count in counts.items()}
+
+    total_weight = sum(weights)
+    distribution: Distribution = {}
+    for points, weight in zip(scores, weights):
+        distribution[points] = distribution.get(points, 0.0) + weight / total_weight
+    return distribution
+
+
+@cache
+def default_hand_distribution() -> Distribution:
+    """
+    Points from a hand, when the best 4 of 6 random cards are kept.
+    """
+    keep_values = keep_value_table()
+    shared_scores = shared_score_table()
+    distribution: Distribution = {}
+    total_ways = 0
+    for vals in val_multisets(6):
+        ways = prod(comb(NUM_SUITS, vals.count(val)) for val in set(vals))
+        keep = _best_keep(vals, keep_values)
+        for starter in range(1, NUM_VALS + 1):
+            starter_ways = NUM_SUITS - vals.count(starter)
+            if starter_ways <= 0:
+                continue
+            points = shared_scores[tuple(sorted(keep + (starter,)))]
+            distribution[points] = distribution.get(points, 0.0) + ways * starter_ways
+            total_ways += ways * starter_ways
+    return {points: ways / total_ways for points, ways in distribution.items()}
+
+
+def _best_keep(
+    vals: tuple[int, ...], keep_values: dict[tuple[int, ...], float]
+) -> tuple[int, ...]:
+    """
+    The 4 values with the best expected score
+    """
+    keeps = (
+        tuple(val for i, val in enumerate(vals) if i not in (skip_a, skip_b))
+        for skip_a in range(6)
+        for skip_b in range(skip_a + 1, 6)
+    )
+    return max(keeps, key=keep_values.__getitem__)
+
+
+@cache
+def default_crib_distribution() -> Distribution:
+    """
+    Points from a crib of 5 random cards.
+    """
+    distribution: Distribution = {}
+    for vals, points in shared_score_table().items():
+        ways = prod(comb(NUM_SUITS, vals.count(val)) for val in set(vals))
+        distribution[points] = distribution.get(points, 0.0) + ways
+    total_ways = sum(distribution.values())
+    return {points: ways / total_ways for points, ways in distribution.items()}
+
+
+def build_default_table() -> WinProbabilityTable:
+    """
+    Build the table from the default per-deal points.
+    """
+    hand = default_hand_distribution()
+    return WinProbabilityTable.build(hand, convolve(hand, default_crib_distribution()))
+
+
+@cache
+def default_win_table() -> WinProbabilityTable:
+    """
+    The default table; loaded from the package if it's there, otherwise built.
+    """
+    table_file = importlib.resources.files("cribbage").joinpath("data").joinpath(
+        _DEFAULT_TABLE_FILE
+    )
+    if table_file.is_file():
+        return WinProbabilityTable.from_bytes(table_file.read_bytes())
+    return build_default_table()
+
+
+def option_win_probability(  # pylint: disable=too-many-arguments
+    hand_scores: Distribution,
+    crib_scores: Distribution,
+    my_score: int,
+    opp_score: int,
+    dealer: bool,
+    table: WinProbabilityTable | None = None,
+) -> float:
+    """
+    Chance of winning with this hand and crib, from these scores (before the show).
+    The opponent's hand is the default hand distribution; if I'm the dealer the crib is mine,
+    otherwise it's added to the opponent's hand.
+    The hand and crib are taken as independent.
+    """
+    if table is None:
+        table = default_win_table()
+    opp_hand = default_hand_distribution()
+
+    if dealer:
+        # The pone counts first, then me
+        my_points = convolve(hand_scores, crib_scores)
+        first_scores, second_scores = opp_hand, my_points
+    else:
+        # I count first, then the dealer
+        first_scores, second_scores = hand_scores, convolve(opp_hand, crib_scores)
+
+    total = 0.0
+    for first_points, first_chance in first_scores.items():
+        if dealer and opp_score + first_points >= WINNING_SCORE:
+            continue
+        if not dealer and my_score + first_points >= WINNING_SCORE:
+            total += first_chance
+            continue
+        for second_points, second_chance in second_scores.items():
+            if dealer:
+                chance = table.win_probability(
+                    my_score + second_points, opp_score + first_points, False
+                )
+            else:
+                chance = table.win_probability(
+                    my_score + first_points, opp_score + second_points, True
+                )
+            total += first_chance * second_chance * chance
+    return total
@@ -0,0 +1,366 @@
+# -*- coding: utf-8 -*-
+"""
+A work queue on a shared directory (e.g. on NFS), for building tables of every canonical hand
+on several machines. Run by `cribbage queue`.
+
+    cribbage queue create DIR --job=NAME [--units=N]
+    cribbage queue work DIR [--worker=ID] [--max-units=N]     (on each machine; as many as cores)
+    cribbage queue status DIR [--requeue-after=SECONDS]
+    cribbage queue merge DIR OUTPUT
+
+The hands of a job are every canonical hand (see canonical.py) of its size. They're split into
+work units by the values of the cards; each unit is a list of multisets of values, and covers
+every canonical hand with those values. The multisets are dealt out to the units in turn, so
+the units are about the same size.
+
+The directory:
+    manifest.json: the job, and the number of units
+    pending/unit-NNNNN.json: units waiting for a worker; the multisets of values they cover
+    claimed/unit-NNNNN.json.WORKER: units being worked on, by WORKER
+    results/unit-NNNNN.jsonl.gz: the results of each finished unit; a line per hand, of
+        [card IDs of the canonical hand, result]
+
+Everything that changes hands is done with a rename, which is atomic (on NFS too); so:
+    A worker claims a unit by renaming it from pending/ to claimed/. If two workers try for the
+        same unit, only one rename works; the other moves on to the next unit.
+    Results are written to a temporary file, and renamed into results/ when they're complete.
+Workers touch their claimed unit as they go. If a worker dies, its unit stops being touched;
+status --requeue-after puts units that haven't been touched for that long back in pending/.
+If the original worker was only slow, and both finish, the results are the same anyway.
+
+merge checks every unit is finished, and writes all the results as one table (a line per
+hand, sorted by card IDs; gzipped if OUTPUT ends with .gz). load_table reads it back.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Callable, Iterator
+
+import gzip
+import json
+import os
+import socket
+import statistics
+import time
+from itertools import combinations
+
+from .canonical import SUITS, CanonicalKey, canonical_hand, card_from_id, card_id
+from .card import Card, all_possible_cards
+from .cardenums import CardVal
+from .cribbage_eu import calculate_score_for_option
+from .scorecalc import calculate_score
+from .tables import val_multisets
+
+MANIFEST = "manifest.json"
+PENDING = "pending"
+CLAIMED = "claimed"
+RESULTS = "results"
+# Touch the claimed unit after this many hands, so it isn't requeued
+HEARTBEAT_HANDS = 50
+
+
+class Job:
+    """
+    A table to build; compute gives the result for one canonical hand of hand_size cards,
+    as something that can be written as JSON.
+    """
+
+    name: str
+    hand_size: int
+    compute: Callable[[set[Card]], Any]
+
+    def __init__(self, name: str, hand_size: int, compute: Callable[[set[Card]], Any]) -> None:
+        self.name = name
+        self.hand_size = hand_size
+        self.compute = compute
+
+    def __repr__(self) -> str:
+        return f"Job<{self.name}>"
+
+
+def keep_scores(hand: set[Card]) -> list[float]:
+    """
+    The score of the 4 cards with each of the other 48 cards as the starter;
+    as [mean, min, max]
+    """
+    scores = [
+        calculate_score(hand, starter) for starter in all_possible_cards() if starter not in hand
+    ]
+    return [statistics.mean(scores), min(scores), max(scores)]
+
+
+def discard_eus(hand: set[Card]) -> list[list[Any]]:
+    """
+    For each discard from the 6 cards, the mean hand and crib scores;
+    as [card IDs discarded, hand mean, crib mean]
+    """
+    results = []
+    for discard_tuple in combinations(sorted(hand), 2):
+        discard = set(discard_tuple)
+        option = calculate_score_for_option(hand - discard, discard)
+        results.append(
+            [
+                sorted(card_id(x) for x in discard),
+                option.hand_scores.mean,
+                option.crib_scores.mean,
+            ]
+        )
+    return results
+
+
+JOBS = {
+    job.name: job
+    for job in (
+        Job("keep_scores", 4, keep_scores),
+        Job("discard_eus", 6, discard_eus),
+    )
+}
+
+
+def canonical_hands_for_values(vals: tuple[int, ...]) -> list[CanonicalKey]:
+    """
+    Every canonical hand with these values, as sorted card IDs.
+    Suits are given out in order (a new suit is always the lowest not used yet), which
+    leaves few hands that are the same up to suits; those are removed by canonical_hand.
+    """
+    counts = [(val, vals.count(val)) for val in sorted(set(vals))]
+    keys: set[CanonicalKey] = set()
+
+    def assign(i_val: int, num_used: int, cards: list[Card]) -> None:
+        if i_val == len(counts):
+            keys.add(canonical_hand(cards)[0])
+            return
+        val, count = counts[i_val]
+        for suits in combinations(range(min(len(SUITS), num_used + count)), count):
+            new_suits = [i_suit for i_suit in suits if i_suit >= num_used]
+            if new_suits != list(range(num_used, num_used + len(new_suits))):
+                continue
+            assign(
+                i_val + 1,
+                num_used + len(new_suits),
+                cards + [Card(CardVal(val), SUITS[i_suit]) for i_suit in suits],
+            )
+
+    assign(0, 0, [])
+    return sorted(keys)
+
+
+def _unit_name(i_unit: int) -> str:
+    return f"unit-{i_unit:05d}"
+
+
+def _read_json(path: str) -> Any:
+    with open(path, encoding="utf-8") as json_file:
+        return json.load(json_file)
+
+
+def _write_atomic(path: str, data: bytes) -> None:
+    """
+    Write the file, so it's never seen half written
+    """
+    temp_path = os.path.join(
+        os.path.dirname(path), f".tmp-{default_worker_id()}-{os.path.basename(path)}"
+    )
+    with open(temp_path, "wb") as temp_file:
+        temp_file.write(data)
+        temp_file.flush()
+        os.fsync(temp_file.fileno())
+    os.replace(temp_path, path)
+
+
+def create_queue(
+    directory: str,
+    job_name: str,
+    num_units: int = 1000,
+    values: list[tuple[int, ...]] | None = None,
+) -> int:
+    """
+    Set up the queue for a job, in an empty (or new) directory.
+    The units cover every multiset of values of the job's hand size; or only those given.
+    Returns the number of units (fewer than num_units, if there aren't enough multisets).
+    """
+    if job_name not in JOBS:
+        raise ValueError(f"Unknown job {job_name}; choose from {', '.join(JOBS)}")
+    if os.path.exists(os.path.join(directory, MANIFEST)):
+        raise ValueError(f"There's already a queue in {directory}")
+    job = JOBS[job_name]
+    all_values = val_multisets(job.hand_size) if values is None else values
+    num_units = max(min(num_units, len(all_values)), 1)
+
+    for sub_directory in (PENDING, CLAIMED, RESULTS):
+        os.makedirs(os.path.join(directory, sub_directory), exist_ok=True)
+    for i_unit in range(num_units):
+        unit_values = [list(vals) for vals in all_values[i_unit::num_units]]
+        _write_atomic(
+            os.path.join(directory, PENDING, f"{_unit_name(i_unit)}.json"),
+            json.dumps(unit_values).encode("utf-8"),
+        )
+    # Written last; so a queue with a manifest is complete
+    _write_atomic(
+        os.path.join(directory, MANIFEST),
+        json.dumps({"job": job_name, "units": num_units}).encode("utf-8"),
+    )
+    return num_units
+
+
+def default_worker_id() -> str:
+    """
+    Unique to this process, on this machine
+    """
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+def claim_unit(directory: str, worker_id: str) -> tuple[str, str] | None:
+    """
+    Claim one of the pending units, as (unit name, path of the claimed unit);
+    or None if there aren't any left
+    """
+    pending = os.path.join(directory, PENDING)
+    for file_name in sorted(os.listdir(pending)):
+        if not file_name.endswith(".json"):
+            continue
+        claimed_path = os.path.join(directory, CLAIMED, f"{file_name}.{worker_id}")
+        try:
+            os.rename(os.path.join(pending, file_name), claimed_path)
+        except FileNotFoundError:
+            # Another worker got there first
+            continue
+        return file_name[: -len(".json")], claimed_path
+    return None
+
+
+def work_unit(job: Job, unit_values: list[list[int]], heartbeat: Callable[[], None]) -> bytes:
+    """
+    The results of every hand of the unit, as gzipped JSON lines
+    """
+    lines = []
+    for i_vals, vals in enumerate(unit_values):
+        for key in canonical_hands_for_values(tuple(vals)):
+            result = job.compute({card_from_id(i_card) for i_card in key})
+            lines.append(json.dumps([list(key), result], separators=(",", ":")))
+            if len(lines) % HEARTBEAT_HANDS == 0:
+                heartbeat()
+        if not i_vals % 10:
+            heartbeat()
+    return gzip.compress(("\n".join(lines) + "\n").encode("utf-8"), mtime=0)
+
+
+def run_worker(directory: str, worker_id: str | None = None, max_units: int | None = None) -> int:
+    """
+    Claim and work out units until there are none left (or max_units are done).
+    Returns the number of units done.
+    """
+    job = JOBS[_read_json(os.path.join(directory, MANIFEST))["job"]]
+    worker_id = worker_id or default_worker_id()
+
+    done = 0
+    while max_units is None or done < max_units:
+        claimed = claim_unit(directory, worker_id)
+        if claimed is None:
+            break
+        unit_name, claimed_path = claimed
+
+        def heartbeat(claimed_path: str = claimed_path) -> None:
+            try:
+                os.utime(claimed_path)
+            except FileNotFoundError:
+                # Requeued; carry on, the results will be the same
+                pass
+
+        data = work_unit(job, _read_json(claimed_path), heartbeat)
+        _write_atomic(os.path.join(directory, RESULTS, f"{unit_name}.jsonl.gz"), data)
+        try:
+            os.remove(claimed_path)
+        except FileNotFoundError:
+            pass
+        done += 1
+    return done
+
+
+def queue_status(directory: str, requeue_after: float | None = None) -> dict[str, int]:
+    """
+    How many units are pending, claimed and done.
+    If requeue_after is given, claimed units not touched for that many seconds (and not done)
+    are put back in pending first.
+    """
+    manifest = _read_json(os.path.join(directory, MANIFEST))
+    done_units = _done_units(directory)
+    requeued = 0
+    claimed_dir = os.path.join(directory, CLAIMED)
+    for file_name in os.listdir(claimed_dir):
+        claimed_path = os.path.join(claimed_dir, file_name)
+        unit_file = file_name[: file_name.index(".json") + len(".json")]
+        if requeue_after is None or unit_file[: -len(".json")] in done_units:
+            continue
+        try:
+            if time.time() - os.path.getmtime(claimed_path) > requeue_after:
+                os.rename(claimed_path, os.path.join(directory, PENDING, unit_file))
+                requeued += 1
+        except FileNotFoundError:
+            # Finished (or requeued) meanwhile
+            continue
+
+    return {
+        "units": manifest["units"],
+        "pending": sum(x.endswith(".json") for x in os.listdir(os.path.join(directory, PENDING))),
+        "claimed": len(os.listdir(claimed_dir)),
+        "done": len(_done_units(directory)),
+        "requeued": requeued,
+    }
+
+
+def _done_units(directory: str) -> set[str]:
+    return {
+        file_name[: -len(".jsonl.gz")]
+        for file_name in os.listdir(os.path.join(directory, RESULTS))
+        if file_name.endswith(".jsonl.gz")
+    }
+
+
+def _read_shard(path: str) -> Iterator[tuple[CanonicalKey, Any]]:
+    with gzip.open(path, "rt", encoding="utf-8") as shard_file:
+        for line in shard_file:
+            if line.strip():
+                key, result = json.loads(line)
+                yield tuple(key), result
+
+
+def merge_results(directory: str, output_path: str) -> int:
+    """
+    Write the results of every unit as one table, sorted by card IDs.
+    Raises ValueError if any unit isn't done. Returns the number of hands.
+    """
+    num_units = _read_json(os.path.join(directory, MANIFEST))["units"]
+    done_units = _done_units(directory)
+    missing = [
+        _unit_name(i_unit) for i_unit in range(num_units) if _unit_name(i_unit) not in done_units
+    ]
+    if missing:
+        raise ValueError(f"{len(missing)} units aren't done yet, e.g. {missing[0]}")
+
+    table: dict[CanonicalKey, Any] = {}
+    for i_unit in range(num_units):
+        table.update(
+            _read_shard(os.path.join(directory, RESULTS, f"{_unit_name(i_unit)}.jsonl.gz"))
+        )
+
+    lines = "".join(
+        json.dumps([list(key), table[key]], separators=(",", ":")) + "\n" for key in sorted(table)
+    ).encode("utf-8")
+    if output_path.endswith(".gz"):
+        lines = gzip.compress(lines, mtime=0)
+    _write_atomic(output_path, lines)
+    return len(table)
+
+
+def load_table(path: str) -> dict[CanonicalKey, Any]:
+    """
+    Read a table written by merge_results; keyed by the canonical card IDs
+    (see canonical.canonical_hand)
+    """
+    opener: Callable[..., Any] = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rt", encoding="utf-8") as table_file:
+        return {
+            tuple(key): result
+            for key, result in (json.loads(line) for line in table_file if line.strip())
+        }
@@ -0,0 +1,27 @@
+"""
+Shared fixtures: the fake scorer, and an engine using it; see fakes.py.
+"""
+
+import pytest
+from fakes import FakeScorer, make_engine
+
+from cribbage import engine as engine_module
+
+
+@pytest.fixture(name="scorer")
+def fixture_scorer(monkeypatch) -> FakeScorer:
+    """
+    Use the fake scorer in the engine
+    """
+    scorer = FakeScorer()
+    monkeypatch.setattr(engine_module, "calculate_score_for_option", scorer)
+    return scorer
+
+
+@pytest.fixture(name="engine")
+def fixture_engine(scorer: FakeScorer):  # pylint: disable=unused-argument
+    """
+    An engine using the fake scorer
+    """
+    with make_engine() as engine:
+        yield engine
@@ -0,0 +1,56 @@
+"""
+Shared test helpers: a hand to analyse, and a fake scorer with an engine that can use it, so
+tests of what's built on the engine are quick. The fixtures using them are in conftest.py.
+"""
+
+import concurrent.futures
+import threading
+
+from cribbage.card import Card
+from cribbage.engine import AnalysisEngine
+from cribbage.stats import DiscardOption, ScoringStats
+
+HAND = {Card.from_str(x) for x in "5H 5S JD XC 2C 9D".split()}
+# The same, up to suits
+SWAPPED = {Card.from_str(x) for x in "5C 5D JS XH 2H 9S".split()}
+
+
+class FakeScorer:
+    """
+    Stands in for calculate_score_for_option, so the tests are quick.
+    The hand scores the total of the values kept, and the crib the total of the values
+    discarded. Counts the options started, and finished.
+    Can be held up: while release isn't set, each option waits for it, apart from the first
+    free_calls options.
+    """
+
+    def __init__(self) -> None:
+        self.calls = 0
+        self.started = 0
+        self.free_calls = 0
+        self.release = threading.Event()
+        self.release.set()
+        self._lock = threading.Lock()
+
+    def __call__(self, hand, discard, *_args) -> DiscardOption:
+        with self._lock:
+            self.started += 1
+            free = self.started <= self.free_calls
+        if not free:
+            self.release.wait(5)
+        with self._lock:
+            self.calls += 1
+        return DiscardOption(
+            hand,
+            discard,
+            ScoringStats([sum(int(x.val) for x in hand)] * 2),
+            ScoringStats([sum(int(x.val) for x in discard)] * 2),
+        )
+
+
+def make_engine(max_workers: int = 2, **kwargs) -> AnalysisEngine:
+    """
+    An engine with threads instead of processes, so it can use the fake scorer;
+    kwargs are as for AnalysisEngine
+    """
+    return AnalysisEngine(executor=concurrent.futures.ThreadPoolExecutor(max_workers), **kwargs)
@@ -0,0 +1,78 @@
+"""
+Test of the asyncio analysis API.
+"""
+
+import asyncio
+
+import pytest
+from fakes import HAND, FakeScorer, make_engine
+
+from cribbage.async_analysis import analyse_hand, iter_analysis
+from cribbage.engine import AnalysisEngine
+from cribbage.stats import DiscardOption
+
+# pragma pylint: disable=R0903
+#  Disable "too few public methods" for test cases - most test files will be classes used for
+#  grouping and then individual tests alongside these
+
+class TestAsyncAnalysis:
+    """
+    Test the async API
+    """
+
+    @staticmethod
+    def test_analyse(engine: AnalysisEngine) -> None:
+        """
+        All the options are given
+        """
+        options = asyncio.run(analyse_hand(HAND, engine))
+
+        assert len(options) == 15
+        assert len({frozenset(x.discard) for x in options}) == 15
+
+    @staticmethod
+    def test_iterate(scorer: FakeScorer) -> None:
+        """
+        Options come as they finish; stopping early cancels the rest
+        """
+        scorer.release.clear()
+        scorer.free_calls = 1
+
+        async def first_option(engine: AnalysisEngine) -> DiscardOption:
+            results = iter_analysis(HAND, engine)
+            option = await anext(results)
+            await results.aclose()
+            scorer.release.set()
+            # Give the worker time to start anything that wasn't cancelled
+            await asyncio.sleep(0.1)
+            return option
+
+        with make_engine(1) as engine:
+            option = asyncio.run(first_option(engine))
+
+        assert len(option.hand) == 4
+        # The first, and the one running when it was closed (if it had started)
+        assert scorer.started <= 2
+
+    @staticmethod
+    def test_cancel(scorer: FakeScorer) -> None:
+        """
+        Cancelling the task cancels the options that haven't started
+        """
+        scorer.release.clear()
+
+        async def cancel_analysis(engine: AnalysisEngine) -> None:
+            task = asyncio.create_task(analyse_hand(HAND, engine))
+            while scorer.started < 2:
+                await asyncio.sleep(0.01)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+            scorer.release.set()
+            await asyncio.sleep(0.1)
+
+        with make_engine() as engine:
+            asyncio.run(cancel_analysis(engine))
+
+        # Only the two already running were worked out
+        assert scorer.started == 2
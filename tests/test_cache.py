@@ -0,0 +1,189 @@
+"""
+Test of the in-process caches.
+"""
+
+from itertools import combinations
+
+import pytest
+from fakes import HAND, SWAPPED, FakeScorer
+
+from cribbage import cache as cache_module
+from cribbage.cache import AnalysisCache, LRUCache
+from cribbage.card import Card
+from cribbage.opponent import GreedyDiscardModel, UniformDiscardModel
+
+# pragma pylint: disable=R0903
+#  Disable "too few public methods" for test cases - most test files will be classes used for
+#  grouping and then individual tests alongside these
+
+
+class TestLRUCache:
+    """
+    Test the LRU cache
+    """
+
+    @staticmethod
+    def test_entries() -> None:
+        """
+        The least recently used is evicted
+        """
+        lru: LRUCache[str, int] = LRUCache(max_entries=2)
+        lru.put("a", 1)
+        lru.put("b", 2)
+        assert lru.get("a") == 1
+        lru.put("c", 3)
+
+        assert "b" not in lru
+        assert lru.get("b") is None
+        assert lru.stats() == {"hits": 1, "misses": 1, "evictions": 1, "entries": 2, "bytes": 0}
+
+    @staticmethod
+    def test_bytes() -> None:
+        """
+        Evicts until under the byte budget; values too big on their own aren't kept
+        """
+        lru: LRUCache[str, str] = LRUCache(max_entries=None, max_bytes=10, sizeof=len)
+        lru.put("a", "xxxx")
+        lru.put("b", "xxxx")
+        lru.put("c", "xxxx")
+        assert len(lru) == 2
+        assert lru.current_bytes == 8
+
+        lru.put("d", "x" * 11)
+        assert "d" not in lru
+
+        lru.put("c", "x")
+        assert lru.current_bytes == 5
+        assert lru.evictions == 1
+
+    @staticmethod
+    def test_pickled_size() -> None:
+        """
+        By default, sizes are how big the value is pickled
+        """
+        lru: LRUCache[str, list[int]] = LRUCache(max_bytes=1000)
+        lru.put("a", list(range(10)))
+        assert 0 < lru.current_bytes < 100
+
+
+def fake_analysis(scorer: FakeScorer):
+    """
+    Stands in for calculate_cribbage_eu; every option from the scorer
+    """
+
+    def analyse(initial_hand, num_discard, _joint, opponent_ev, *_args, **_kwargs):
+        for discard in combinations(initial_hand, num_discard):
+            option = scorer(initial_hand - set(discard), set(discard))
+            option.opponent_hand_ev = 4.5 if opponent_ev else None
+            yield option
+
+    return analyse
+
+
+@pytest.fixture(name="fake")
+def fixture_fake(monkeypatch, scorer: FakeScorer) -> FakeScorer:
+    """
+    Use the fake scorer in the cache
+    """
+    monkeypatch.setattr(cache_module, "calculate_cribbage_eu", fake_analysis(scorer))
+    monkeypatch.setattr(cache_module, "calculate_score_for_option", scorer)
+    monkeypatch.setattr(cache_module, "estimate_opponent_hand_ev", lambda cards: 4.5)
+    return scorer
+
+
+class TestAnalysisCache:
+    """
+    Test caching analyses
+    """
+
+    @staticmethod
+    def test_suit_swaps(fake: FakeScorer) -> None:
+        """
+        Hands only differing by suit share an entry; the results are in the suits asked for
+        """
+        analyses = AnalysisCache()
+        first = analyses.calculate_cribbage_eu(HAND)
+        second = analyses.calculate_cribbage_eu(SWAPPED)
+
+        assert fake.calls == 15
+        assert analyses.stats()["hands"]["hits"] == 1
+        assert all(x.hand | x.discard == HAND for x in first)
+        assert all(x.hand | x.discard == SWAPPED for x in second)
+        assert all(
+            x.hand_scores.possible_scores == [sum(int(y.val) for y in x.hand)] * 2 for x in second
+        )
+
+    @staticmethod
+    def test_copies(fake: FakeScorer) -> None:  # pylint: disable=unused-argument
+        """
+        Changing the results doesn't change the cache
+        """
+        analyses = AnalysisCache(option_cache=True)
+        first = analyses.calculate_cribbage_eu(HAND)[0]
+        first.opponent_hand_ev = 100
+        first.hand_scores.possible_scores.append(100)
+
+        second = analyses.calculate_cribbage_eu(HAND)[0]
+        assert second.opponent_hand_ev is None
+        assert 100 not in second.hand_scores.possible_scores
+        option = analyses.calculate_score_for_option(first.hand, first.discard)
+        option.crib_scores.possible_scores.append(100)
+        assert 100 not in analyses.calculate_score_for_option(
+            first.hand, first.discard
+        ).crib_scores.possible_scores
+
+    @staticmethod
+    def test_discard_model_key(fake: FakeScorer) -> None:
+        """
+        Equal discard models share entries; different ones don't
+        """
+        analyses = AnalysisCache()
+        analyses.calculate_cribbage_eu(HAND, discard_model=GreedyDiscardModel())
+        analyses.calculate_cribbage_eu(HAND, discard_model=GreedyDiscardModel())
+        assert fake.calls == 15
+
+        analyses.calculate_cribbage_eu(HAND, discard_model=GreedyDiscardModel(True))
+        analyses.calculate_cribbage_eu(HAND, discard_model=UniformDiscardModel())
+        assert fake.calls == 45
+
+    @staticmethod
+    def test_option_reuse(fake: FakeScorer) -> None:
+        """
+        Options are reused by analyses that only differ in the opponent's hand
+        """
+        analyses = AnalysisCache(option_cache=True)
+        analyses.calculate_cribbage_eu(HAND)
+        with_ev = analyses.calculate_cribbage_eu(SWAPPED, opponent_ev=True)
+
+        assert fake.calls == 15
+        assert all(x.opponent_hand_ev == 4.5 for x in with_ev)
+        assert {frozenset(x.discard) for x in with_ev} == {
+            frozenset(x) for x in combinations(SWAPPED, 2)
+        }
+        assert analyses.stats()["options"]["hits"] == 15
+
+    @staticmethod
+    def test_single_option(fake: FakeScorer) -> None:
+        """
+        Single options are cached, up to suits
+        """
+        analyses = AnalysisCache(option_cache=True)
+        hand = {Card.from_str(x) for x in "5H 5S JD XC".split()}
+        discard = {Card.from_str(x) for x in "2C 9D".split()}
+        swapped_hand = {Card.from_str(x) for x in "5C 5D JS XH".split()}
+        swapped_discard = {Card.from_str(x) for x in "2H 9S".split()}
+
+        first = analyses.calculate_score_for_option(hand, discard)
+        second = analyses.calculate_score_for_option(swapped_hand, swapped_discard)
+
+        assert fake.calls == 1
+        assert (first.hand, first.discard) == (hand, discard)
+        assert (second.hand, second.discard) == (swapped_hand, swapped_discard)
+
+    @staticmethod
+    def test_no_option_cache() -> None:
+        """
+        Single options need the option cache
+        """
+        with pytest.raises(ValueError):
+            AnalysisCache().calculate_score_for_option(HAND, set())
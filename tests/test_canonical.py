@@ -0,0 +1,89 @@
+"""
+Test of the canonical forms of hands.
+"""
+
+import pytest
+
+from cribbage.canonical import (
+    canonical_hand,
+    card_from_id,
+    card_id,
+    relabel_cards,
+    relabel_option,
+)
+from cribbage.card import Card, all_possible_cards
+from cribbage.cribbage_eu import calculate_score_for_option
+
+# pragma pylint: disable=R0903
+#  Disable "too few public methods" for test cases - most test files will be classes used for
+#  grouping and then individual tests alongside these
+
+
+def cards(text: str) -> set[Card]:
+    """
+    Cards from a space separated string
+    """
+    return {Card.from_str(x) for x in text.split()}
+
+
+class TestCardId:
+    """
+    Test the card IDs
+    """
+
+    @staticmethod
+    def test_round_trip() -> None:
+        """
+        Every card has a different ID, 0-51, in sorted order
+        """
+        all_cards = sorted(all_possible_cards())
+        assert [card_id(x) for x in all_cards] == list(range(52))
+        assert [card_from_id(i) for i in range(52)] == all_cards
+
+
+class TestCanonicalHand:
+    """
+    Test the canonical form
+    """
+
+    @staticmethod
+    def test_suit_swaps() -> None:
+        """
+        Hands that only differ by suit have the same form
+        """
+        key, _ = canonical_hand(cards("5H 5S JD XC 2C 9D"))
+        assert canonical_hand(cards("5C 5D JS XH 2H 9S"))[0] == key
+        assert canonical_hand(cards("5H 5S JD XC 2C 9C"))[0] != key
+
+    @staticmethod
+    def test_back_to_original() -> None:
+        """
+        Relabelling the canonical form gives the hand back
+        """
+        hand = cards("5H 5S JD XC 2C 9D")
+        key, suit_map = canonical_hand(hand)
+
+        assert relabel_cards({card_from_id(i) for i in key}, suit_map) == hand
+
+    @staticmethod
+    def test_relabel_option() -> None:
+        """
+        The relabelled result of the canonical hand is the result of the hand
+        """
+        hand = cards("5H 5S JD XC")
+        discard = cards("2C 9D")
+        key, suit_map = canonical_hand(hand | discard)
+        inverse = {new: old for old, new in suit_map.items()}
+
+        canonical = calculate_score_for_option(
+            relabel_cards(hand, inverse), relabel_cards(discard, inverse)
+        )
+        assert {card_from_id(i) for i in key} == canonical.hand | canonical.discard
+
+        relabelled = relabel_option(canonical, suit_map)
+        direct = calculate_score_for_option(hand, discard)
+        assert relabelled.hand == hand
+        assert relabelled.discard == discard
+        assert relabelled.hand_scores.mean == pytest.approx(direct.hand_scores.mean)
+        assert relabelled.crib_scores.mean == pytest.approx(direct.crib_scores.mean)
+        assert canonical.hand != hand
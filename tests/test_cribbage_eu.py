@@ -0,0 +1,189 @@
+"""
+Test of the cribbage_eu file - the enumeration of hand and crib scores.
+"""
+
+from collections import Counter
+
+import pytest
+
+from cribbage.card import Card
+from cribbage import progress as progress_module
+from cribbage.cribbage_eu import (
+    calculate_crib_weights,
+    calculate_cribbage_eu,
+    calculate_joint_score_for_option,
+    calculate_joint_scores,
+    calculate_score_for_option,
+    calculate_scores_from_crib,
+    calculate_scores_from_hand,
+)
+from cribbage.opponent import GreedyDiscardModel
+from cribbage.profiling import PhaseProfile
+from cribbage.progress import ProgressReport
+from cribbage.scorecalc import SCORE_CATEGORIES
+from cribbage.variants import FOUR_PLAYER
+
+# pragma pylint: disable=R0903
+#  Disable "too few public methods" for test cases - most test files will be classes used for
+#  grouping and then individual tests alongside these
+
+HAND = {Card.from_str("5H"), Card.from_str("5S"), Card.from_str("JD"), Card.from_str("XC")}
+DISCARD = {Card.from_str("2C"), Card.from_str("9D")}
+
+
+class TestJointScores:
+    """
+    Test the joint hand and crib enumeration
+    """
+
+    @staticmethod
+    def test_joint_matches_separate() -> None:
+        """
+        The joint pass must give the same hand and crib distributions as the separate passes
+        """
+        hand_scores, joint_scores = calculate_joint_scores(HAND, DISCARD)
+
+        assert hand_scores == calculate_scores_from_hand(HAND, DISCARD)
+        assert Counter(crib for _, crib in joint_scores) == Counter(
+            calculate_scores_from_crib(HAND, DISCARD)
+        )
+
+        # 46 starters, each with C(45, 2) possible opponent discards
+        assert len(joint_scores) == 46 * 990
+        assert Counter(hand for hand, _ in joint_scores) == Counter(
+            {score: count * 990 for score, count in Counter(hand_scores).items()}
+        )
+
+    @staticmethod
+    def test_joint_option_stats() -> None:
+        """
+        The net distributions are the sum and difference of the hand and crib
+        """
+        option = calculate_joint_score_for_option(HAND, DISCARD)
+        assert option.joint_scores is not None
+
+        assert option.joint_scores.dealer_scores.mean == pytest.approx(
+            option.hand_scores.mean + option.crib_scores.mean
+        )
+        assert option.joint_scores.pone_scores.mean == pytest.approx(
+            option.hand_scores.mean - option.crib_scores.mean
+        )
+        assert option.joint_scores.dealer_scores.min >= option.hand_scores.min
+
+
+class TestCribWeights:
+    """
+    Test weighting the crib by a model of the opponent's discard
+    """
+
+    @staticmethod
+    def test_crib_weights() -> None:
+        """
+        One weight per crib deal; an opponent throwing bad cards lowers your crib,
+        and the joint stats are weighted the same way as the crib stats.
+        """
+        model = GreedyDiscardModel(opponent_is_dealer=False)
+        weights = calculate_crib_weights(HAND, DISCARD, model)
+        assert len(weights) == 46 * 990
+
+        option = calculate_joint_score_for_option(HAND, DISCARD, model)
+        unweighted = calculate_joint_score_for_option(HAND, DISCARD)
+        assert option.joint_scores is not None
+
+        assert option.crib_scores.mean < unweighted.crib_scores.mean
+        assert option.hand_scores.mean == unweighted.hand_scores.mean
+        assert option.joint_scores.dealer_scores.mean == pytest.approx(
+            sum(
+                weight * (hand + crib)
+                for weight, (hand, crib) in zip(weights, option.joint_scores.possible_scores)
+            )
+            / sum(weights)
+        )
+
+
+class TestBreakdown:
+    """
+    Test splitting the scores up by scoring route, in the same pass
+    """
+
+    @staticmethod
+    def test_breakdown_adds_up() -> None:
+        """
+        The routes add up to the scores, for both the separate and joint passes
+        """
+        hand_breakdown: dict[str, list[int]] = {}
+        crib_breakdown: dict[str, list[int]] = {}
+        hand_scores, joint_scores = calculate_joint_scores(
+            HAND, DISCARD, hand_breakdown, crib_breakdown
+        )
+        assert [sum(points) for points in zip(*hand_breakdown.values())] == hand_scores
+        assert [sum(points) for points in zip(*crib_breakdown.values())] == [
+            crib for _, crib in joint_scores
+        ]
+
+        separate_breakdown: dict[str, list[int]] = {}
+        assert calculate_scores_from_hand(HAND, DISCARD, separate_breakdown) == hand_scores
+        assert separate_breakdown == hand_breakdown
+
+    @staticmethod
+    def test_breakdown_stats() -> None:
+        """
+        The expected points from each route add up to the expected score;
+        and the joint pass gives the same as the separate pass
+        """
+        option = calculate_joint_score_for_option(HAND, DISCARD, breakdown=True)
+        separate = calculate_score_for_option(HAND, DISCARD, breakdown=True)
+
+        for stats in (option.hand_scores, option.crib_scores):
+            assert sum(
+                stats.category_mean(category) for category in SCORE_CATEGORIES
+            ) == pytest.approx(stats.mean)
+
+        assert option.crib_scores.breakdown is not None
+        assert separate.crib_scores.breakdown is not None
+        for category in SCORE_CATEGORIES:
+            assert option.crib_scores.breakdown[category] == pytest.approx(
+                separate.crib_scores.breakdown[category]
+            )
+        assert option.crib_scores.category_mean("runs") > 0
+
+
+class TestInProcess:
+    """
+    Test working out small jobs without a pool of workers
+    """
+
+    @staticmethod
+    def test_same_as_pool() -> None:
+        """
+        The same options either way
+        """
+        hand = {Card.from_str(x) for x in ("AH", "5S", "JD", "XC", "2C")}
+        in_process = list(calculate_cribbage_eu(hand, variant=FOUR_PLAYER))
+        pooled = list(calculate_cribbage_eu(hand, variant=FOUR_PLAYER, in_process=False))
+
+        means = {str(x.discard): (x.hand_scores.mean, x.crib_scores.mean) for x in pooled}
+        assert len(in_process) == 5
+        for option in in_process:
+            assert means[str(option.discard)] == (
+                option.hand_scores.mean,
+                option.crib_scores.mean,
+            )
+
+    @staticmethod
+    def test_profile_and_progress() -> None:
+        """
+        Progress and the profile are still given, and the counter is put back afterwards
+        """
+        hand = {Card.from_str(x) for x in ("AH", "5S", "JD", "XC", "2C")}
+        profile = PhaseProfile()
+        reports: list[ProgressReport] = []
+        list(
+            calculate_cribbage_eu(
+                hand, variant=FOUR_PLAYER, profile=profile, progress=reports.append
+            )
+        )
+
+        assert profile.counters["options"] == 5
+        assert reports[-1].completed == reports[-1].total
+        assert progress_module._COUNTER is None  # pylint: disable=protected-access
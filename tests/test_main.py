@@ -0,0 +1,82 @@
+"""
+Test of the command line; its options, and that one-off runs only import what they need.
+"""
+
+import subprocess  # nosec B404 - runs this Python, with fixed arguments
+import sys
+
+import pytest
+
+from cribbage.__main__ import get_variant
+
+# pragma pylint: disable=R0903
+#  Disable "too few public methods" for test cases - most test files will be classes used for
+#  grouping and then individual tests alongside these
+
+
+def modules_after(code: str) -> set[str]:
+    """
+    The modules imported after running code in a fresh interpreter
+    """
+    result = subprocess.run(  # nosec B603
+        [sys.executable, "-c", f"{code}\nimport sys\nprint(' '.join(sys.modules))"],
+        capture_output=True,
+        check=True,
+        text=True,
+    )
+    return set(result.stdout.split())
+
+
+class TestLazyImports:
+    """
+    Test the heavy modules are only imported when they're used
+    """
+
+    @staticmethod
+    def test_cli() -> None:
+        """
+        Importing the CLI doesn't import the analysis, output or server
+        """
+        modules = modules_after("import cribbage.__main__")
+        assert "cribbage.__main__" in modules
+        for module in ("cribbage.cribbage_eu", "cribbage.output", "cribbage.server"):
+            assert module not in modules
+
+    @staticmethod
+    def test_analysis() -> None:
+        """
+        The analysis doesn't need the pool, pegging or the opponent model until they're used
+        """
+        modules = modules_after("import cribbage.cribbage_eu")
+        for module in (
+            "concurrent.futures",
+            "multiprocessing",
+            "cribbage.opponent",
+            "cribbage.pegging",
+            "cribbage.winprob",
+        ):
+            assert module not in modules
+
+
+class TestOptions:
+    """
+    Test the options are checked
+    """
+
+    @staticmethod
+    def test_variant() -> None:
+        """
+        The variant is the one named, or the first for the number of players
+        """
+        assert get_variant([]).name == "two_player"
+        assert get_variant(["--players=3"]).num_players == 3
+        assert get_variant(["--players=3", "--variant=five_card"]).name == "five_card"
+
+    @staticmethod
+    @pytest.mark.parametrize("option", ["--players=5", "--players=two", "--variant=six_card"])
+    def test_bad_variant(option: str) -> None:
+        """
+        A number of players with no variant, or an unknown variant, exits with a message
+        """
+        with pytest.raises(SystemExit, match="must be one of"):
+            get_variant([option])
@@ -0,0 +1,112 @@
+"""
+Test of the estimate of the opponent's hand.
+"""
+
+from pathlib import Path
+
+import json
+
+import pytest
+
+from cribbage.card import Card
+from cribbage.opponent import (
+    EmpiricalDiscardModel,
+    GreedyDiscardModel,
+    OpponentDiscardModel,
+    UniformDiscardModel,
+    estimate_opponent_hand_ev,
+)
+
+# pragma pylint: disable=R0903
+#  Disable "too few public methods" for test cases - most test files will be classes used for
+#  grouping and then individual tests alongside these
+
+
+def _cards(*names: str) -> set[Card]:
+    """
+    Make a set of cards from their strings
+    """
+    return set(map(Card.from_str, names))
+
+
+class TestOpponentEV:
+    """
+    Test the opponent hand EV estimate responds to the cards you hold
+    """
+
+    @staticmethod
+    def test_opponent_ev_range() -> None:
+        """
+        The opponent's hand averages a few points
+        """
+        assert 3 < estimate_opponent_hand_ev(_cards("AH", "2S", "3D", "KC", "QC", "9D")) < 6
+
+    @staticmethod
+    def test_opponent_ev_fives() -> None:
+        """
+        Holding all the fives takes points away from the opponent
+        """
+        assert estimate_opponent_hand_ev(
+            _cards("5H", "5S", "5D", "5C", "2C", "9D")
+        ) < estimate_opponent_hand_ev(_cards("AH", "AS", "AD", "AC", "2C", "9D"))
+
+    @staticmethod
+    def test_opponent_ev_nobs() -> None:
+        """
+        Holding the jacks takes nobs away from the opponent;
+        compare against holding the queens, as they score the same otherwise
+        """
+        with_jacks = estimate_opponent_hand_ev(_cards("JH", "JS", "JD", "JC", "2C", "9D"))
+        with_queens = estimate_opponent_hand_ev(_cards("QH", "QS", "QD", "QC", "2C", "9D"))
+        assert with_jacks < with_queens
+
+
+class TestDiscardModels:
+    """
+    Test the models of the opponent's discard
+    """
+
+    @staticmethod
+    def test_base_model() -> None:
+        """
+        The base model has no weights of its own
+        """
+        with pytest.raises(TypeError):
+            OpponentDiscardModel()  # pylint: disable=abstract-class-instantiated
+
+    @staticmethod
+    def test_uniform_model() -> None:
+        """
+        Every pair is equally likely
+        """
+        weights = UniformDiscardModel().pair_weights()
+        assert len(weights) == 91
+        assert set(weights.values()) == {1.0}
+
+    @staticmethod
+    def test_greedy_model() -> None:
+        """
+        Good crib cards are thrown to their own crib, bad ones to yours
+        """
+        into_yours = GreedyDiscardModel(opponent_is_dealer=False)
+        into_theirs = GreedyDiscardModel(opponent_is_dealer=True)
+
+        assert into_yours.weight(Card.from_str("5H"), Card.from_str("5S")) < 1
+        assert into_theirs.weight(Card.from_str("5H"), Card.from_str("5S")) > 1
+        assert into_yours.weight(Card.from_str("XH"), Card.from_str("KS")) > 1
+
+    @staticmethod
+    def test_empirical_model(tmp_path: Path) -> None:
+        """
+        Load counts from a file; pairs in either order are the same pair.
+        """
+        counts_path = tmp_path / "counts.json"
+        counts_path.write_text(json.dumps({"5X": 1, "X5": 1, "AK": 1}), encoding="utf-8")
+
+        model = EmpiricalDiscardModel.from_file(str(counts_path))
+
+        # 5X is twice as common as AK, and both have the same number of ways to be dealt
+        assert model.weight(Card.from_str("5H"), Card.from_str("XS")) == pytest.approx(
+            2 * model.weight(Card.from_str("AH"), Card.from_str("KS"))
+        )
+        assert model.weight(Card.from_str("5H"), Card.from_str("5S")) == 0
@@ -0,0 +1,255 @@
+"""
+Test of the output writers.
+"""
+
+import csv
+import json
+import math
+import struct
+
+import pytest
+
+from cribbage.card import Card
+from cribbage.output import (
+    HISTOGRAM_BINS,
+    STAT_COLUMNS,
+    CsvWriter,
+    JsonlWriter,
+    NpyWriter,
+    ResultWriter,
+    open_writer,
+    option_stats,
+    read_npy_header,
+    read_results,
+    score_histogram,
+)
+from cribbage.stats import DiscardOption, ScoringStats
+
+# pragma pylint: disable=R0903
+#  Disable "too few public methods" for test cases - most test files will be classes used for
+#  grouping and then individual tests alongside these
+
+
+def make_option(hand_scores: list[int]) -> DiscardOption:
+    """
+    A cheap option to write
+    """
+    return DiscardOption(
+        {Card.from_str(x) for x in ("5H", "5S", "JD", "XC")},
+        {Card.from_str(x) for x in ("2C", "9D")},
+        ScoringStats(hand_scores),
+        ScoringStats([1, 3], [1.0, 3.0]),
+        pegging_evs=(1.5, -0.5),
+    )
+
+
+OPTIONS = [make_option([10, 12]), make_option([4, 8, 9])]
+
+
+class TestHistogram:
+    """
+    Test the score histograms
+    """
+
+    @staticmethod
+    def test_weighted() -> None:
+        """
+        The chances come from the weights
+        """
+        histogram = score_histogram(ScoringStats([1, 3], [1.0, 3.0]))
+
+        assert len(histogram) == HISTOGRAM_BINS
+        assert histogram[1] == pytest.approx(0.25)
+        assert histogram[3] == pytest.approx(0.75)
+        assert sum(histogram) == pytest.approx(1)
+
+
+class TestTextWriters:
+    """
+    Test the JSONL and CSV writers
+    """
+
+    @staticmethod
+    def test_jsonl(tmp_path) -> None:
+        """
+        Each line is valid JSON; missing stats are null
+        """
+        path = tmp_path / "out.jsonl"
+        with JsonlWriter(path, histograms=True) as writer:
+            assert writer.write_all(enumerate(OPTIONS)) == 2
+
+        rows = [json.loads(line) for line in path.read_text().splitlines()]
+        assert [row["hand_idx"] for row in rows] == [0, 1]
+        assert rows[0]["keep"] == ["5H", "5S", "XC", "JD"]
+        assert rows[0]["discard"] == ["2C", "9D"]
+        assert rows[0]["hand_mean"] == 11
+        assert rows[1]["crib_mean"] == pytest.approx(2.5)
+        assert rows[0]["opponent_hand_ev"] is None
+        assert rows[0]["dealer_pegging_ev"] == 1.5
+        assert rows[0]["hand_histogram"][10] == 0.5
+
+    @staticmethod
+    def test_csv(tmp_path) -> None:
+        """
+        One header, however many times the file is written to
+        """
+        path = tmp_path / "out.csv"
+        for option in OPTIONS:
+            with CsvWriter(path) as writer:
+                writer.write(option)
+
+        with open(path, newline="", encoding="utf-8") as file:
+            rows = list(csv.DictReader(file))
+        assert len(rows) == 2
+        assert list(rows[0]) == ["hand_idx", "keep", "discard", *STAT_COLUMNS]
+        assert rows[0]["keep"] == "5H 5S XC JD"
+        assert float(rows[1]["hand_median"]) == 8
+        assert rows[0]["opponent_hand_ev"] == ""
+
+    @staticmethod
+    def test_buffered(tmp_path) -> None:
+        """
+        Nothing is written until the buffer fills, or on flush
+        """
+        path = tmp_path / "out.jsonl"
+        writer = JsonlWriter(path)
+        writer.write(OPTIONS[0])
+        assert path.read_text() == ""
+        writer.flush()
+        assert len(path.read_text().splitlines()) == 1
+        writer.close()
+
+
+def read_npy(path, histograms: bool = False) -> list[tuple]:
+    """
+    Read the records back, without NumPy
+    """
+    descr, num_rows, header_len = read_npy_header(path)
+    record = struct.Struct(
+        f"<q10s6s{len(STAT_COLUMNS)}d" + (f"{2 * HISTOGRAM_BINS}d" if histograms else "")
+    )
+    data = path.read_bytes()[header_len:]
+    assert len(descr) == 3 + len(STAT_COLUMNS) + 2 * histograms
+    assert len(data) == num_rows * record.size
+    return list(record.iter_unpack(data))
+
+
+class TestNpyWriter:
+    """
+    Test the .npy writer
+    """
+
+    @staticmethod
+    def test_records(tmp_path) -> None:
+        """
+        The records have the stats, and the header aligned to 64 bytes
+        """
+        path = tmp_path / "out.npy"
+        with NpyWriter(path, histograms=True) as writer:
+            writer.write_all(enumerate(OPTIONS))
+
+        rows = read_npy(path, histograms=True)
+        assert read_npy_header(path)[2] % 64 == 0
+        assert len(rows) == 2
+        assert rows[1][0] == 1
+        assert rows[0][1].rstrip(b"\0") == b"5H5SXCJD"
+        assert rows[0][3] == 11
+        assert math.isnan(rows[0][3 + STAT_COLUMNS.index("opponent_hand_ev")])
+        assert rows[0][3 + len(STAT_COLUMNS) + 10] == 0.5
+
+    @staticmethod
+    def test_append(tmp_path) -> None:
+        """
+        Writing again adds to the end, through several buffers
+        """
+        path = tmp_path / "out.npy"
+        with NpyWriter(path) as writer:
+            writer.write(OPTIONS[0])
+        with NpyWriter(path, buffer_size=1) as writer:
+            for _ in range(5):
+                writer.write(OPTIONS[1], 7)
+
+        rows = read_npy(path)
+        assert len(rows) == 6
+        assert [row[0] for row in rows] == [0, 7, 7, 7, 7, 7]
+
+    @staticmethod
+    def test_append_mismatch(tmp_path) -> None:
+        """
+        Can't add records with different columns
+        """
+        path = tmp_path / "out.npy"
+        with NpyWriter(path) as writer:
+            writer.write(OPTIONS[0])
+        with pytest.raises(ValueError):
+            NpyWriter(path, histograms=True)
+
+    @staticmethod
+    def test_numpy(tmp_path) -> None:
+        """
+        NumPy can load it, if it's there
+        """
+        numpy = pytest.importorskip("numpy")
+        path = tmp_path / "out.npy"
+        with open_writer(path) as writer:
+            writer.write_all(enumerate(OPTIONS))
+
+        array = numpy.load(path, mmap_mode="r")
+        assert array.shape == (2,)
+        assert list(array["hand_mean"]) == [11, 7]
+
+
+class TestOpenWriter:
+    """
+    Test picking the writer
+    """
+
+    @staticmethod
+    def test_unknown(tmp_path) -> None:
+        """
+        Only known extensions
+        """
+        assert isinstance(open_writer(tmp_path / "a.CSV"), CsvWriter)
+        with pytest.raises(ValueError):
+            open_writer(tmp_path / "a.txt")
+
+    @staticmethod
+    def test_base(tmp_path) -> None:
+        """
+        The base writer doesn't know how to write
+        """
+        with pytest.raises(TypeError):
+            ResultWriter(tmp_path / "a.out")  # pylint: disable=abstract-class-instantiated
+
+
+class TestReadResults:
+    """
+    Test reading the rows back
+    """
+
+    @staticmethod
+    @pytest.mark.parametrize("suffix", [".jsonl", ".csv", ".npy"])
+    @pytest.mark.parametrize("histograms", [False, True])
+    def test_round_trip(tmp_path, suffix: str, histograms: bool) -> None:
+        """
+        The same rows from every format; stats not calculated are NaN
+        """
+        path = tmp_path / f"out{suffix}"
+        with open_writer(path, histograms) as writer:
+            writer.write_all(enumerate(OPTIONS))
+
+        rows = list(read_results(path))
+        assert [(x[0], x[1], x[2]) for x in rows] == [
+            (0, ["5H", "5S", "XC", "JD"], ["2C", "9D"]),
+            (1, ["5H", "5S", "XC", "JD"], ["2C", "9D"]),
+        ]
+        assert rows[1][3] == pytest.approx(option_stats(OPTIONS[1]), nan_ok=True)
+        assert math.isnan(rows[0][3][STAT_COLUMNS.index("opponent_hand_ev")])
+
+    @staticmethod
+    def test_unknown(tmp_path) -> None:
+        """
+        Only known extensions
+        """
+        with pytest.raises(ValueError):
+            read_results(tmp_path / "a.txt")
@@ -0,0 +1,53 @@
+"""
+Test of running chunks of work in parallel.
+"""
+
+from cribbage.parallel import run_chunks
+
+# pragma pylint: disable=R0903
+#  Disable "too few public methods" for test cases - most test files will be classes used for
+#  grouping and then individual tests alongside these
+
+
+class TestRunChunks:
+    """
+    Test the chunks are run, in this process or on the pool
+    """
+
+    @staticmethod
+    def test_in_process() -> None:
+        """
+        One chunk, or one worker, is run here; in order, with progress after each
+        """
+        progress = []
+        results = run_chunks(lambda x, y: x * y, [(2, 3)], on_progress=lambda: progress.append(1))
+        assert list(results) == [(0, 6)]
+        assert progress == [1]
+
+        results = list(run_chunks(lambda x: -x, [(1,), (2,), (3,)], max_workers=1))
+        assert results == [(0, -1), (1, -2), (2, -3)]
+
+    @staticmethod
+    def test_pool() -> None:
+        """
+        Every chunk is run on the pool, each given with the index of its arguments
+        """
+        results = dict(run_chunks(pow, [(2, x) for x in range(6)], max_workers=2))
+        assert results == {x: 2**x for x in range(6)}
+
+    @staticmethod
+    def test_pool_progress() -> None:
+        """
+        Progress is reported while waiting on the pool
+        """
+        progress = []
+        results = list(
+            run_chunks(
+                pow,
+                [(3, 2), (2, 3)],
+                on_progress=lambda: progress.append(1),
+                progress_interval=0.01,
+            )
+        )
+        assert sorted(results) == [(0, 9), (1, 8)]
+        assert progress
@@ -0,0 +1,233 @@
+"""
+Test of the pegging search.
+"""
+
+import pytest
+
+from cribbage.card import Card
+from cribbage.opponent import GreedyDiscardModel, UniformDiscardModel
+from cribbage.pegging import (
+    PeggingEngine,
+    expected_best_reply,
+    hand_engine,
+    possible_opponent_hands,
+    relevant_tail,
+    reply_levels,
+    score_play,
+    weighted_opponent_hands,
+)
+
+# pragma pylint: disable=R0903
+#  Disable "too few public methods" for test cases - most test files will be classes used for
+#  grouping and then individual tests alongside these
+
+
+class TestScorePlay:
+    """
+    Test scoring a single card played
+    """
+
+    @staticmethod
+    def test_score_play_fifteen() -> None:
+        """
+        Count of 15 scores 2
+        """
+        assert score_play((5, 10), 15) == 2
+
+    @staticmethod
+    def test_score_play_thirtyone() -> None:
+        """
+        Count of 31 scores 2, as well as the pair
+        """
+        assert score_play((10, 10, 11, 1), 31) == 2
+        assert score_play((10, 5, 8, 4, 4), 31) == 4
+
+    @staticmethod
+    def test_score_play_pairs() -> None:
+        """
+        Pairs, three and four of a kind
+        """
+        assert score_play((3, 3), 6) == 2
+        assert score_play((3, 3, 3), 9) == 6
+        assert score_play((2, 2, 2, 2), 8) == 12
+        assert score_play((3, 4, 3), 10) == 0
+
+    @staticmethod
+    def test_score_play_runs() -> None:
+        """
+        Runs in any order, broken by a repeat
+        """
+        assert score_play((3, 1, 2), 6) == 3
+        assert score_play((1, 4, 3, 2), 10) == 4
+        assert score_play((3, 2, 3, 4), 12) == 3
+        assert score_play((4, 2, 1), 7) == 0
+
+    @staticmethod
+    def test_relevant_tail() -> None:
+        """
+        Only the tail that can still score is kept
+        """
+        assert relevant_tail((1, 2, 3, 7, 7)) == (7, 7)
+        assert relevant_tail((4, 2, 4, 3)) == (2, 4, 3)
+        assert relevant_tail(()) == ()
+
+
+class TestPeggingEngine:
+    """
+    Test the search of the play
+    """
+
+    @staticmethod
+    def test_play_value_simple() -> None:
+        """
+        One card each; the second card takes the 15 (or pair) and the last card
+        """
+        engine = PeggingEngine()
+        assert engine.play_value((5,), [((10,), 1.0)], True) == -3
+        assert engine.play_value((4,), [((4,), 1.0)], True) == -3
+        assert engine.play_value((4,), [((4,), 1.0)], False) == 3
+
+    @staticmethod
+    def test_play_value_go() -> None:
+        """
+        I lead a 10, and the opponent pairs it; I play another 10 for 30,
+        and nobody can play; I take the go.
+        Me: 6 for three of a kind + 1 go. Opponent: 2 for the pair.
+        """
+        engine = PeggingEngine()
+        assert engine.play_value((10, 10), [((10,), 1.0)], True) == 5
+
+    @staticmethod
+    def test_table_shared() -> None:
+        """
+        Reusing the tables of positions and the opponent's plays gives the same values as a
+        fresh engine, with fewer positions searched
+        """
+        shared = PeggingEngine()
+        hands = [
+            ((1, 2, 3, 4), [((5, 5, 10, 11), 1.0)]),
+            ((5, 5, 10, 11), [((1, 2, 3, 4), 1.0), ((6, 7, 8, 9), 2.0)]),
+            ((3, 4, 4, 12), [((2, 6, 7, 13), 1.0)]),
+        ]
+        for my_hand, opponent_hands in hands * 2:
+            for i_lead in (True, False):
+                fresh = PeggingEngine().play_value(my_hand, opponent_hands, i_lead)
+                assert shared.play_value(my_hand, opponent_hands, i_lead) == fresh
+        nodes = shared.nodes
+        shared.play_value((1, 2, 3, 4), [((5, 5, 10, 11), 1.0)], True)
+        assert shared.nodes == nodes
+        shared.clear()
+        shared.play_value((1, 2, 3, 4), [((5, 5, 10, 11), 1.0)], True)
+        assert shared.nodes > nodes
+
+    @staticmethod
+    def test_hand_engine() -> None:
+        """
+        The options of a hand share an engine; another hand gets a new one
+        """
+        hand = {Card.from_str(x) for x in "5H 5S JD XC 2C 9D".split()}
+        engine = hand_engine(hand)
+        assert hand_engine(set(hand)) is engine
+        assert hand_engine(hand - {Card.from_str("9D")} | {Card.from_str("9S")}) is not engine
+
+    @staticmethod
+    def test_no_strategy_fusion() -> None:
+        """
+        Not knowing the opponent's hand is worth less than knowing it.
+        With 5 10 against A 10 or 5 6: knowing, lead the card they can't pair;
+        not knowing, either lead can be paired.
+        """
+        engine = PeggingEngine()
+        opponent_hands = [((1, 10), 1.0), ((5, 6), 1.0)]
+        known = [engine.play_value((5, 10), [x], True) for x in opponent_hands]
+        assert known == [-1, -1]
+        assert engine.play_value((5, 10), opponent_hands, True) == -2
+
+    @staticmethod
+    def test_expected_value() -> None:
+        """
+        Expected pegging is over the opponent's hands, weighted; and no better than knowing them
+        """
+        keep = {Card.from_str(x) for x in ("5H", "5S", "XD", "JC")}
+        opponent_hands = [((1, 2, 3, 4), 1.0), ((6, 7, 8, 9), 3.0)]
+        engine = PeggingEngine()
+
+        known_value = (
+            engine.play_value((5, 5, 10, 11), opponent_hands[:1], False)
+            + 3 * engine.play_value((5, 5, 10, 11), opponent_hands[1:], False)
+        ) / 4
+        value = engine.expected_value(keep, set(), True, opponent_hands)
+        assert value <= known_value
+        assert value == engine.expected_value(
+            keep, set(), True, [(hand, 2 * weight) for hand, weight in opponent_hands]
+        )
+
+
+class TestOpponentPlay:
+    """
+    Test the opponent's play, against the cards it hasn't seen
+    """
+
+    @staticmethod
+    def test_expected_best_reply() -> None:
+        """
+        After a 10, a 5 makes 15 for 2; a 9 scores nothing
+        """
+        pool = (0,) * 5 + (4,) + (0,) * 8
+        assert expected_best_reply(10, (10,), pool, 1) == 2
+        assert expected_best_reply(10, (10,), pool, 0) == 0
+        pool = (0,) * 5 + (2,) + (0,) * 3 + (2,) + (0,) * 4
+        assert expected_best_reply(10, (10,), pool, 1) == pytest.approx(1)
+        assert expected_best_reply(10, (10,), pool, 2) == pytest.approx(2 * (1 - 1 / 6))
+
+    @staticmethod
+    def test_reply_levels() -> None:
+        """
+        After 5 10 a 10 pairs; after a 10, a 5 makes 15 and a 10 pairs; after 7 8, 6 and 9
+        make runs and an 8 pairs; nothing can follow 31
+        """
+        assert reply_levels(15, (5, 10)) == ((2, (10,)),)
+        assert reply_levels(10, (10,)) == ((2, (5, 10)),)
+        assert reply_levels(15, (7, 8)) == ((3, (6, 9)), (2, (8,)))
+        assert reply_levels(31, (10, 10, 11)) == ()
+
+    @staticmethod
+    def test_opponent_play() -> None:
+        """
+        The opponent takes the 15, plays what it can, or says go
+        """
+        engine = PeggingEngine()
+        seen = (0,) * 14
+        assert engine.opponent_play(10, (10,), (2, 5), seen, 4) == 5
+        assert engine.opponent_play(25, (10, 5, 10), (7, 13), seen, 4) is None
+        assert engine.opponent_play(25, (10, 5, 10), (3, 7, 13), seen, 4) == 3
+
+
+class TestOpponentHands:
+    """
+    Test the belief over the opponent's hand
+    """
+
+    @staticmethod
+    def test_uniform_model() -> None:
+        """
+        Throwing at random keeps each hand as often as dealing it
+        """
+        unseen = (0, 3, 4, 4, 4, 2, 4, 4, 4, 4, 3, 3, 4, 4)
+        dealt = dict(possible_opponent_hands(unseen))
+        kept = weighted_opponent_hands(unseen, UniformDiscardModel())
+        assert len(kept) == len(dealt)
+        ratios = [weight / dealt[hand] for hand, weight in kept]
+        assert max(ratios) == pytest.approx(min(ratios))
+
+    @staticmethod
+    def test_greedy_model() -> None:
+        """
+        A greedy opponent keeps 5s more than at random
+        """
+        unseen = (0, 3, 4, 4, 4, 2, 4, 4, 4, 4, 3, 3, 4, 4)
+        dealt = dict(possible_opponent_hands(unseen))
+        kept = dict(weighted_opponent_hands(unseen, GreedyDiscardModel()))
+        total_dealt = sum(dealt.values())
+        total_kept = sum(kept.values())
+        assert kept[(5, 5, 10, 11)] / total_kept > dealt[(5, 5, 10, 11)] / total_dealt
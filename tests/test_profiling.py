@@ -0,0 +1,65 @@
+"""
+Test of the profiling hooks.
+"""
+
+from cribbage.card import Card
+from cribbage.cribbage_eu import calculate_joint_score_for_option
+from cribbage.profiling import PhaseProfile, timed
+
+# pragma pylint: disable=R0903
+#  Disable "too few public methods" for test cases - most test files will be classes used for
+#  grouping and then individual tests alongside these
+
+
+class TestProfiling:
+    """
+    Test timing phases into a profile
+    """
+
+    @staticmethod
+    def test_disabled() -> None:
+        """
+        With no profile, the same do-nothing timer is used every time
+        """
+        assert timed(None, "a") is timed(None, "b")
+        with timed(None, "a"):
+            pass
+
+    @staticmethod
+    def test_timed_and_merged() -> None:
+        """
+        Phases are counted and timed; merging adds them up
+        """
+        profile = PhaseProfile()
+        for _ in range(3):
+            with timed(profile, "a"):
+                pass
+        profile.count("bytes", 10)
+
+        other = PhaseProfile()
+        with timed(other, "a"):
+            pass
+        with timed(other, "b"):
+            pass
+        other.count("bytes", 5)
+        profile.merge(other)
+
+        report = profile.report()
+        assert report["phases"]["a"]["count"] == 4
+        assert report["phases"]["b"]["count"] == 1
+        assert report["phases"]["a"]["seconds"] >= 0
+        assert report["counters"] == {"bytes": 15}
+        assert "a" in str(profile)
+
+    @staticmethod
+    def test_option_phases() -> None:
+        """
+        Scoring an option times each of its phases
+        """
+        profile = PhaseProfile()
+        calculate_joint_score_for_option(
+            {Card.from_str(x) for x in ("5H", "5S", "JD", "XC")},
+            {Card.from_str(x) for x in ("2C", "9D")},
+            profile=profile,
+        )
+        assert set(profile.counts) == {"joint_enumeration", "stats_construction"}
@@ -0,0 +1,77 @@
+"""
+Test of the progress reporting.
+"""
+
+from cribbage.card import Card
+from cribbage.cribbage_eu import calculate_joint_score_for_option
+from cribbage.progress import (
+    ProgressReport,
+    ProgressTracker,
+    init_worker_progress,
+    option_work_units,
+    report_progress,
+)
+
+# pragma pylint: disable=R0903
+#  Disable "too few public methods" for test cases - most test files will be classes used for
+#  grouping and then individual tests alongside these
+
+
+class TestProgress:
+    """
+    Test counting work and reporting it
+    """
+
+    @staticmethod
+    def test_report() -> None:
+        """
+        Rate and ETA from the work done so far
+        """
+        report = ProgressReport(25, 100, 5.0)
+        assert report.fraction == 0.25
+        assert report.rate == 5
+        assert report.eta == 15
+        assert ProgressReport(0, 100, 1.0).eta is None
+
+    @staticmethod
+    def test_tracker_rate_limited() -> None:
+        """
+        Only one callback per interval, except when finished
+        """
+        reports: list[ProgressReport] = []
+        tracker = ProgressTracker(10, reports.append, interval=1000)
+
+        tracker.counter.value = 1
+        tracker.update()
+        tracker.counter.value = 2
+        tracker.update()
+        tracker.counter.value = 10
+        tracker.update()
+        tracker.update()
+
+        assert [report.completed for report in reports] == [1, 10]
+
+    @staticmethod
+    def test_option_work_units() -> None:
+        """
+        Scoring an option reports all of its units of work
+        """
+        reports: list[ProgressReport] = []
+        tracker = ProgressTracker(option_work_units(), reports.append)
+
+        init_worker_progress(tracker.counter)
+        try:
+            calculate_joint_score_for_option(
+                {Card.from_str(x) for x in ("5H", "5S", "JD", "XC")},
+                {Card.from_str(x) for x in ("2C", "9D")},
+            )
+        finally:
+            init_worker_progress(None)
+        tracker.update()
+
+        assert reports[-1].completed == option_work_units()
+        assert reports[-1].fraction == 1
+
+        # Not tracking, so nothing happens
+        report_progress(5)
+        assert tracker.counter.value == option_work_units()
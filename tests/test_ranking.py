@@ -0,0 +1,138 @@
+"""
+Test of the ranking of discard options.
+"""
+
+import csv
+import io
+import json
+
+from cribbage.card import Card
+from cribbage.cribbage_eu import present_results
+from cribbage.ranking import (
+    Objective,
+    default_objectives,
+    rank_options,
+    render_csv,
+    render_json,
+    render_text,
+)
+from cribbage.stats import DiscardOption, ScoringStats
+
+# pragma pylint: disable=R0903
+#  Disable "too few public methods" for test cases - most test files will be classes used for
+#  grouping and then individual tests alongside these
+
+
+def make_option(keep: str, discard: str, hand_scores: list[int]) -> DiscardOption:
+    """
+    A cheap option; the crib always scores 2
+    """
+    return DiscardOption(
+        {Card.from_str(x) for x in keep.split()},
+        {Card.from_str(x) for x in discard.split()},
+        ScoringStats(hand_scores),
+        ScoringStats([2, 2]),
+    )
+
+
+OPTIONS = [
+    make_option("AH 2H 3H 4H", "5H 6H", [1, 3]),
+    make_option("AH 2H 3H 5H", "4H 6H", [4, 6]),
+    make_option("AH 2H 4H 5H", "3H 6H", [5, 5]),
+    make_option("AH 3H 4H 5H", "2H 6H", [0, 2]),
+]
+
+MEAN = Objective("mean", "mean", lambda x: x.hand_scores.mean)
+
+
+class TestRankOptions:
+    """
+    Test picking the top options
+    """
+
+    @staticmethod
+    def test_top_n() -> None:
+        """
+        The best options come first, and the list isn't reordered
+        """
+        options = list(OPTIONS)
+        ranking = rank_options(options, [MEAN], 2)[0]
+
+        assert [x.option for x in ranking.entries] == [OPTIONS[1], OPTIONS[2]]
+        assert [x.value for x in ranking.entries] == [5, 5]
+        assert [x.tied for x in ranking.entries] == [False, True]
+        assert options == OPTIONS
+
+    @staticmethod
+    def test_ties_kept() -> None:
+        """
+        Options tied with the last place are all given, in the order they came in
+        """
+        ranking = rank_options(OPTIONS, [MEAN], 1)[0]
+
+        assert [x.option for x in ranking.entries] == [OPTIONS[1], OPTIONS[2]]
+
+    @staticmethod
+    def test_more_than_options() -> None:
+        """
+        Asking for more than there are gives them all
+        """
+        ranking = rank_options(OPTIONS, [MEAN], 10)[0]
+
+        assert ranking.num_make == len(OPTIONS)
+        assert [x.value for x in ranking.entries] == [5, 5, 2, 1]
+
+    @staticmethod
+    def test_unavailable() -> None:
+        """
+        Objectives needing results that aren't there are left out
+        """
+        names = [x.objective.name for x in rank_options(OPTIONS, default_objectives(), 3)]
+
+        assert len(names) == 7
+        assert "pegging_dealer" not in names
+        assert "net_game_dealer" not in names
+
+
+class TestRender:
+    """
+    Test the renderers
+    """
+
+    @staticmethod
+    def test_text(capsys) -> None:
+        """
+        The text is what present_results prints
+        """
+        rankings = rank_options(OPTIONS, default_objectives(), 2)
+        present_results(list(OPTIONS), 2)
+
+        text = render_text(rankings)
+        assert capsys.readouterr().out == text + "\n"
+        assert text.startswith("Top 2 highest EU options (mean)\n")
+        assert "\n\nTop 2 MOST crib EU (mean)\n" in text
+        assert "5.00=" in text
+        assert not text.endswith("\n")
+
+    @staticmethod
+    def test_json() -> None:
+        """
+        The JSON has every objective and option
+        """
+        data = json.loads(render_json(rank_options(OPTIONS, [MEAN], 2)))
+
+        assert data[0]["objective"] == "mean"
+        assert [x["value"] for x in data[0]["results"]] == [5, 5]
+        assert data[0]["results"][1]["tied"]
+        assert sorted(data[0]["results"][0]["keep"]) == ["2H", "3H", "5H", "AH"]
+
+    @staticmethod
+    def test_csv() -> None:
+        """
+        A row per option per objective
+        """
+        rows = list(csv.DictReader(io.StringIO(render_csv(rank_options(OPTIONS, [MEAN], 2)))))
+
+        assert [x["rank"] for x in rows] == ["1", "2"]
+        assert rows[0]["objective"] == "mean"
+        assert rows[1]["tied"] == "True"
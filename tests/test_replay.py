@@ -0,0 +1,183 @@
+"""
+Test of reviewing the discards in game logs.
+"""
+
+import pytest
+from fakes import HAND
+
+from cribbage import replay as replay_module
+from cribbage.card import Card
+from cribbage.engine import AnalysisEngine
+from cribbage.replay import (
+    Decision,
+    DecisionReview,
+    ReplayError,
+    parse_log,
+    review_decisions,
+    summarise,
+)
+
+# pragma pylint: disable=R0903
+#  Disable "too few public methods" for test cases - most test files will be classes used for
+#  grouping and then individual tests alongside these
+
+LOG = """
+# Two games
+game 17
+hand alice 5C
+alice: 5H 5S JD XC 2C 9D / 2C 9D
+bob: AH 2H 3H 4H KS QD / 4H KS
+
+game 18
+hand bob
+alice: 5D 5C JS XH 2H 9S / 5D JS
+bob: AC 2D 3S 7H KD QC / KD QC
+"""
+
+
+def cards(text: str) -> set[Card]:
+    """
+    Cards from a space separated string
+    """
+    return {Card.from_str(x) for x in text.split()}
+
+
+class TestParseLog:
+    """
+    Test reading the log format
+    """
+
+    @staticmethod
+    def test_parse() -> None:
+        """
+        Each player's discard, with the game, hand and dealer
+        """
+        decisions = parse_log(LOG.splitlines())
+
+        assert [(x.game, x.hand_number, x.player, x.dealer) for x in decisions] == [
+            ("17", 1, "alice", True),
+            ("17", 1, "bob", False),
+            ("18", 1, "alice", False),
+            ("18", 1, "bob", True),
+        ]
+        assert decisions[0].cards == HAND
+        assert decisions[0].discard == cards("2C 9D")
+        assert decisions[0].starter == Card.from_str("5C")
+        assert decisions[2].starter is None
+
+    @staticmethod
+    @pytest.mark.parametrize(
+        "log, line_number",
+        [
+            ("hand alice\nalice: 5H 5S JD XC 2C 9D / 2C 9D", 1),
+            ("game 1\nalice: 5H 5S JD XC 2C 9D / 2C 9D", 2),
+            ("game 1\nhand alice\nalice: 5H 5S JD XC 2C / 2C 9D", 3),
+            ("game 1\nhand alice\nalice: 5H 5S JD XC 2C 9D / 2C AH", 3),
+            ("game 1\nhand alice\nalice: 5H 5S JD XC 2C ZZ / 2C 5H", 3),
+            ("game 1\nhand alice\nalice 5H 5S JD XC 2C 9D 2C 9D", 3),
+            ("game 1\nhand bob\nalice: 5H 5S JD XC 2C 9D / 2C 9D", 2),
+            ("game 1\nhand alice\ngame 2", 2),
+            ("game 1\nhand alice 5H\nalice: 5H 5S JD XC 2C 9D / 2C 9D", 3),
+            (
+                "game 1\nhand alice\nalice: 5H 5S JD XC 2C 9D / 2C 9D\n"
+                "bob: AH 2H 3H 4H KS 9D / 4H KS",
+                4,
+            ),
+        ],
+    )
+    def test_errors(log: str, line_number: int) -> None:
+        """
+        Anything that doesn't fit is an error, for the line it's on
+        """
+        with pytest.raises(ReplayError) as exc_info:
+            parse_log(log.splitlines())
+        assert exc_info.value.line_number == line_number
+
+
+class TestReview:
+    """
+    Test reviewing decisions against the best option
+    """
+
+    @staticmethod
+    def test_review(engine: AnalysisEngine) -> None:
+        """
+        The EU is the hand plus the crib for the dealer, and less it for the pone
+        """
+        reviews = list(review_decisions(parse_log(LOG.splitlines()), engine, 2))
+
+        assert [x.decision.player for x in reviews] == ["alice", "bob", "alice", "bob"]
+        # The dealer gets the crib too, so it doesn't matter which cards go where
+        assert reviews[0].loss == 0
+        # The pone keeps the highest cards
+        assert reviews[1].best_discard == cards("AH 2H")
+        assert reviews[1].loss == pytest.approx(2 * (4 + 13 - 1 - 2))
+        assert reviews[2].best_discard in (cards("2H 5D"), cards("2H 5C"))
+        # Suit-equivalent hands come from the cache
+        assert engine.stats()["hits"] == 1
+
+    @staticmethod
+    def test_hand_points(engine: AnalysisEngine) -> None:
+        """
+        With a starter, the points the kept cards scored, and were expected to;
+        added up for each player
+        """
+        decision = Decision("1", 1, "alice", True, HAND, cards("2C 9D"), Card.from_str("5C"))
+        (review,) = review_decisions([decision], engine)
+        assert review.hand_points == 20
+        # The fake scorer's hand mean; the total of the values kept
+        assert review.expected_hand_points == 5 + 5 + 11 + 10
+        assert "hand scored 20 (31.00 expected)" in str(review)
+
+        no_starter = Decision("1", 2, "alice", False, HAND, cards("2C 9D"))
+        summaries, _ = summarise(review_decisions([decision, no_starter, decision], engine))
+        assert summaries["alice"].scored_hands == 2
+        assert summaries["alice"].hand_points == 40
+        assert "hands scored 40 against 62.00 expected, over 2 hands" in str(summaries["alice"])
+
+
+class TestSummarise:
+    """
+    Test adding up the EV lost by each player
+    """
+
+    @staticmethod
+    def test_summarise() -> None:
+        """
+        Totals per player, and the worst decisions
+        """
+        alice = Decision("1", 1, "alice", True, set(), set())
+        bob = Decision("1", 1, "bob", False, set(), set())
+        reviews = [
+            DecisionReview(alice, 5.0, 5.0, set()),
+            DecisionReview(bob, 3.0, 4.5, set()),
+            DecisionReview(alice, 1.0, 3.0, set()),
+            DecisionReview(bob, 2.0, 2.25, set()),
+        ]
+        summaries, worst = summarise(reviews, 2)
+
+        assert list(summaries) == ["alice", "bob"]
+        assert summaries["alice"].decisions == 2
+        assert summaries["alice"].best_decisions == 1
+        assert summaries["alice"].total_loss == pytest.approx(2.0)
+        assert summaries["bob"].mean_loss == pytest.approx(0.875)
+        assert summaries["bob"].worst_loss == pytest.approx(1.5)
+        assert [x.loss for x in worst] == [2.0, 1.5]
+
+    @staticmethod
+    def test_replay(engine: AnalysisEngine, monkeypatch, tmp_path, capsys) -> None:
+        """
+        Review a log file, and print the summary
+        """
+        monkeypatch.setattr(replay_module, "AnalysisEngine", lambda *_args, **_kwargs: engine)
+        log_path = tmp_path / "games.log"
+        log_path.write_text(LOG, encoding="utf-8")
+
+        replay_module.replay(str(log_path), num_worst=1)
+
+        output = capsys.readouterr().out
+        assert "Reviewing 4 discards" in output
+        assert "bob: 2 discards" in output
+        assert "Worst 1 discards" in output
+        # Only game 17 has a starter
+        assert "over 1 hands with a starter" in output
@@ -0,0 +1,215 @@
+"""
+Test of the indexes over stored results.
+"""
+
+import math
+import sys
+
+import pytest
+
+from cribbage.__main__ import main
+from cribbage.card import Card
+from cribbage.output import open_writer
+from cribbage.resultindex import ResultIndex, StoredOption
+from cribbage.stats import DiscardOption, ScoringStats
+
+# pragma pylint: disable=R0903
+#  Disable "too few public methods" for test cases - most test files will be classes used for
+#  grouping and then individual tests alongside these
+
+# (cards, {discard: (hand mean, crib mean)}); other discards aren't stored
+HANDS = [
+    (
+        "5H 5S JD XC 2C 9D",
+        {"2C 9D": (8.0, 4.0), "5H 5S": (2.0, 9.0), "5H 2C": (6.0, 5.0)},
+    ),
+    (
+        "AH 2H 3H 4H KS QD",
+        {"KS QD": (9.0, 3.0), "AH KS": (7.0, 2.0), "4H QD": (6.0, 1.0)},
+    ),
+    (
+        "5D 6C 7S 8H 9C KD",
+        {"5D KD": (8.0, 7.5), "9C KD": (7.0, 1.5), "5D 6C": (4.0, 8.5)},
+    ),
+]
+
+
+def cards(text: str) -> set[Card]:
+    """
+    Cards from a space separated string
+    """
+    return {Card.from_str(x) for x in text.split()}
+
+
+def make_options() -> list[tuple[int, DiscardOption]]:
+    """
+    The options of HANDS, with the hand and crib scores giving the means
+    """
+    return [
+        (
+            hand_idx,
+            DiscardOption(
+                cards(hand) - cards(discard),
+                cards(discard),
+                ScoringStats([hand_mean - 1, hand_mean + 1]),
+                ScoringStats([crib_mean - 1, crib_mean + 1]),
+            ),
+        )
+        for hand_idx, (hand, discards) in enumerate(HANDS)
+        for discard, (hand_mean, crib_mean) in discards.items()
+    ]
+
+
+@pytest.fixture(name="index")
+def fixture_index() -> ResultIndex:
+    """
+    An index of the options of HANDS
+    """
+    index = ResultIndex()
+    for hand_idx, option in make_options():
+        index.add_option(option, hand_idx)
+    return index
+
+
+def discards(options: list[StoredOption]) -> list[set[Card]]:
+    """
+    The discards of the options, in order
+    """
+    return [set(x.discard) for x in options]
+
+
+class TestQuery:
+    """
+    Test each kind of condition, and combining them
+    """
+
+    @staticmethod
+    def test_ranks(index: ResultIndex) -> None:
+        """
+        Options with (at least) the ranks asked for
+        """
+        assert discards(index.query(discard_ranks=[5])) == [
+            cards("5H 5S"),
+            cards("5H 2C"),
+            cards("5D KD"),
+            cards("5D 6C"),
+        ]
+        assert discards(index.query(discard_ranks=[5, 5])) == [cards("5H 5S")]
+        assert discards(index.query(keep_ranks=[1, 4], discard_ranks=[13])) == [cards("KS QD")]
+        assert not index.query(discard_ranks=[8])
+
+    @staticmethod
+    def test_patterns(index: ResultIndex) -> None:
+        """
+        Options with exactly the ranks asked for
+        """
+        assert discards(index.query(discard_pattern=[13, 5])) == [cards("5D KD")]
+        assert discards(index.query(keep_pattern=[5, 5, 10, 11])) == [cards("2C 9D")]
+        assert not index.query(discard_pattern=[5])
+
+    @staticmethod
+    def test_best(index: ResultIndex) -> None:
+        """
+        The best option of each hand; discarding a 5 is best as the dealer in one hand
+        """
+        assert discards(index.query(best_for="hand_minus_crib")) == [
+            cards("2C 9D"),
+            cards("KS QD"),
+            cards("9C KD"),
+        ]
+        assert discards(index.query(discard_ranks=[5], best_for="hand_plus_crib")) == [
+            cards("5D KD")
+        ]
+        assert discards(index.query(best_for="hand_plus_crib"))[0] == cards("2C 9D")
+
+    @staticmethod
+    def test_ranges(index: ResultIndex) -> None:
+        """
+        Options with values in the range; hands whose best crib is over 8
+        """
+        best_cribs = index.query(best_for="most_crib", ranges={"most_crib": (8, None)})
+        assert discards(best_cribs) == [cards("5H 5S"), cards("5D 6C")]
+        assert [x.value("most_crib") for x in best_cribs] == [9.0, 8.5]
+        assert len(index.query(ranges={"hand_mean": (6, 7)})) == 4
+        assert len(index.query(ranges={"hand_mean": (None, 4)})) == 2
+
+    @staticmethod
+    def test_missing_stats(index: ResultIndex) -> None:
+        """
+        Options without the stats an objective needs aren't indexed for it
+        """
+        assert math.isnan(index.options[0].value("pegging_dealer"))
+        assert not index.query(best_for="pegging_dealer")
+        assert not index.query(ranges={"net_game_pone": (None, None)})
+
+    @staticmethod
+    def test_unknown_objective(index: ResultIndex) -> None:
+        """
+        Only objectives that can be worked out from the stats
+        """
+        with pytest.raises(ValueError):
+            index.query(best_for="win_probability")
+
+    @staticmethod
+    def test_add_after_query(index: ResultIndex) -> None:
+        """
+        Options added (or replaced) after a query are found by the next
+        """
+        assert len(index.query(best_for="hand_mean")) == 3
+        option = DiscardOption(
+            cards("5H 5S JD XC"), cards("2C 9D"), ScoringStats([1, 3]), ScoringStats([0, 2])
+        )
+        assert index.add_option(option) == 0
+        assert index.num_hands == 3
+        assert discards(index.query(best_for="hand_mean"))[0] == cards("5H 2C")
+
+
+class TestFromFile:
+    """
+    Test indexing the results written by output.py
+    """
+
+    @staticmethod
+    @pytest.mark.parametrize("suffix", [".jsonl", ".csv", ".npy"])
+    def test_formats(index: ResultIndex, tmp_path, suffix: str) -> None:
+        """
+        The same answers from every format
+        """
+        path = tmp_path / f"results{suffix}"
+        with open_writer(path) as writer:
+            writer.write_all(make_options())
+        stored = ResultIndex.from_file(path)
+
+        assert stored.num_hands == 3
+        for conditions in (
+            {"discard_ranks": [5], "best_for": "hand_plus_crib"},
+            {"best_for": "most_crib", "ranges": {"most_crib": (8, None)}},
+        ):
+            assert [str(x) for x in stored.query(**conditions)] == [
+                str(x) for x in index.query(**conditions)
+            ]
+        assert stored.query(discard_ranks=[1])[0].hand_idx == 1
+
+    @staticmethod
+    def test_cli(tmp_path, monkeypatch, capsys) -> None:
+        """
+        cribbage query prints the options found
+        """
+        path = tmp_path / "results.jsonl"
+        with open_writer(path) as writer:
+            writer.write_all(make_options())
+        monkeypatch.setattr(
+            sys,
+            "argv",
+            ["cribbage", "query", "--discard=5", "--best=hand_minus_crib", str(path)],
+        )
+        main()
+        assert "0 of 9 options match, from 3 hands" in capsys.readouterr().out
+
+        monkeypatch.setattr(
+            sys, "argv", ["cribbage", "query", "--best=most_crib", "--min=most_crib:8", str(path)]
+        )
+        main()
+        output = capsys.readouterr().out
+        assert "2 of 9 options match" in output
+        assert "hand 2: keep 7S 8H 9C KD, discard 5D 6C (most_crib 8.50)" in output
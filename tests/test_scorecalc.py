@@ -12,7 +12,14 @@ from cribbage.scorecalc import (
     calculate_score_3_pairs,
     calculate_score_4_flush,
     calculate_score_5_nobs,
+    calculate_score_breakdown,
+    calculate_score_shared,
+    histogram_score_15s,
+    histogram_score_pairs,
+    histogram_score_runs,
+    val_histogram,
 )
+from cribbage.tables import val_multisets
 
 # pragma pylint: disable=R0903
 #  Disable "too few public methods" for test cases - most test files will be classes used for
@@ -100,6 +107,78 @@ class TestScoreOverall:
         )
 
 
+class TestScoreBreakdown:
+    """
+    Test of the score split up by scoring route
+    """
+
+    @staticmethod
+    def test_score_breakdown() -> None:
+        """
+        Test hand: 4 15s, 1 pair, nobs.
+        """
+        assert calculate_score_breakdown(
+            {
+                Card.from_str("JS"),
+                Card.from_str("5H"),
+                Card.from_str("XC"),
+                Card.from_str("5S"),
+            },
+            Card.from_str("4S"),
+        ) == {"fifteen": 8, "runs": 0, "pairs": 2, "flush": 0, "nobs": 1}
+
+
+class TestScoreShared:
+    """
+    Test of the starter-independent part of the score
+    """
+
+    @staticmethod
+    def test_score_shared() -> None:
+        """
+        Test hand: 2 15s, 1 pair, 2 runs of 4
+        Same as the overall score, as there's no flush or nobs
+        2*2 + 2 + 2*4 = 14
+        """
+        assert (
+            calculate_score_shared(
+                [
+                    CardVal.from_str("4"),
+                    CardVal.from_str("5"),
+                    CardVal.from_str("5"),
+                    CardVal.from_str("6"),
+                    CardVal.from_str("7"),
+                ]
+            )
+            == 14
+        )
+
+
+class TestHistogramScore:
+    """
+    Test the histogram scoring against the original scoring functions
+    """
+
+    @staticmethod
+    def test_histogram_every_hand() -> None:
+        """
+        15s, runs and pairs only depend on the values; so check every multiset of 5 values
+        """
+        for vals in val_multisets(5):
+            full_set_vals = [CardVal(val) for val in vals]
+            counts = val_histogram(vals)
+            assert histogram_score_15s(counts) == calculate_score_1_15s(full_set_vals)
+            assert histogram_score_runs(counts) == calculate_score_2_runs(full_set_vals)
+            assert histogram_score_pairs(counts) == calculate_score_3_pairs(full_set_vals)
+
+    @staticmethod
+    def test_histogram_run_to_king() -> None:
+        """
+        Runs finishing on the King
+        """
+        assert histogram_score_runs(val_histogram([11, 12, 13, 13, 2])) == 6
+
+
 class TestScore1:
     """
     Tests for calculating score 1
@@ -0,0 +1,186 @@
+"""
+Test of the analysis engine, and the HTTP service on top of it.
+"""
+
+import concurrent.futures
+import json
+import threading
+import urllib.error
+import urllib.request
+
+import pytest
+
+from fakes import HAND, SWAPPED, FakeScorer, make_engine
+
+from cribbage.card import Card
+from cribbage.server import AnalysisServer, LatencyStats
+
+# pragma pylint: disable=R0903
+#  Disable "too few public methods" for test cases - most test files will be classes used for
+#  grouping and then individual tests alongside these
+
+class TestEngine:
+    """
+    Test caching and coalescing in the engine
+    """
+
+    @staticmethod
+    def test_cache(scorer: FakeScorer) -> None:
+        """
+        Suit-equivalent hands are only worked out once, but given in their own suits
+        """
+        with make_engine(4, cache_size=2) as engine:
+            first = engine.analyse(HAND)
+            second = engine.analyse(SWAPPED)
+
+            assert scorer.calls == 15
+            assert engine.stats()["hits"] == 1
+            assert {frozenset(x.hand) for x in first} == {
+                frozenset(x) for x in _keeps(HAND)
+            }
+            assert {frozenset(x.hand) for x in second} == {
+                frozenset(x) for x in _keeps(SWAPPED)
+            }
+
+    @staticmethod
+    def test_copies(scorer: FakeScorer) -> None:  # pylint: disable=unused-argument
+        """
+        Changing the results doesn't change the cache
+        """
+        with make_engine(4) as engine:
+            first = engine.analyse(HAND)[0]
+            first.hand_scores.possible_scores.append(100)
+            first.crib_scores.possible_scores.append(100)
+
+            second = engine.analyse(HAND)[0]
+            assert 100 not in second.hand_scores.possible_scores
+            assert 100 not in second.crib_scores.possible_scores
+
+    @staticmethod
+    def test_eviction(scorer: FakeScorer) -> None:
+        """
+        Only the most recent hands are kept
+        """
+        hands = [
+            {Card.from_str(x) for x in f"{val}H 5S JD XC 2C 9D".split()} for val in "A34"
+        ]
+        with make_engine(4, cache_size=2) as engine:
+            for hand in hands:
+                engine.analyse(hand)
+            engine.analyse(hands[0])
+
+            assert scorer.calls == 4 * 15
+            assert engine.stats()["entries"] == 2
+
+    @staticmethod
+    def test_coalesce(scorer: FakeScorer) -> None:
+        """
+        Requests while the hand is being worked out wait for that result
+        """
+        scorer.release.clear()
+        with make_engine(4, cache_size=2) as engine:
+            with concurrent.futures.ThreadPoolExecutor(3) as requests:
+                futures = [requests.submit(engine.analyse, x) for x in (HAND, SWAPPED, HAND)]
+                while engine.stats()["coalesced"] < 2:
+                    threading.Event().wait(0.01)
+                scorer.release.set()
+                results = [x.result() for x in futures]
+
+            assert scorer.calls == 15
+            assert all(len(x) == 15 for x in results)
+            assert engine.stats()["computed"] == 1
+
+
+def _keeps(hand: set[Card]) -> list[set[Card]]:
+    sorted_hand = sorted(hand)
+    return [
+        set(sorted_hand) - {first, second}
+        for i_first, first in enumerate(sorted_hand)
+        for second in sorted_hand[i_first + 1 :]
+    ]
+
+
+class TestLatencyStats:
+    """
+    Test the latency percentiles
+    """
+
+    @staticmethod
+    def test_percentiles() -> None:
+        """
+        Nearest rank, in ms
+        """
+        latencies = LatencyStats()
+        assert latencies.percentiles()["p50"] is None
+        for i_request in range(1, 101):
+            latencies.record(i_request / 1000)
+
+        assert latencies.percentiles() == pytest.approx(
+            {"p50": 50, "p90": 90, "p99": 99, "p100": 100}
+        )
+
+
+@pytest.fixture(name="server_url")
+def fixture_server_url(scorer: FakeScorer):  # pylint: disable=unused-argument
+    """
+    A server on a free port, in a thread
+    """
+    server = AnalysisServer(("127.0.0.1", 0), make_engine(4, cache_size=2))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def get_json(url: str, data: dict | None = None) -> dict:
+    """
+    Make a request, and read the JSON response
+    """
+    body = None if data is None else json.dumps(data).encode("utf-8")
+    with urllib.request.urlopen(url, body, timeout=10) as response:  # nosec B310
+        return json.loads(response.read())
+
+
+class TestServer:
+    """
+    Test the HTTP service
+    """
+
+    @staticmethod
+    def test_analyse(server_url: str) -> None:
+        """
+        GET and POST give the same options; the second is from the cache
+        """
+        first = get_json(f"{server_url}/analyse?cards=5H,5S,JD,XC,2C,9D&top=2")
+        second = get_json(
+            f"{server_url}/analyse", {"cards": ["5C", "5D", "JS", "XH", "2H", "9S"]}
+        )
+
+        assert len(first["options"]) == 15
+        assert first["rankings"][0]["objective"] == "hand_mean"
+        # Highest total of values kept; either 5 will do
+        best = first["rankings"][0]["results"][0]
+        assert best["keep"][1:] == ["9D", "XC", "JD"]
+        assert best["keep"][0] in ("5H", "5S")
+        assert sorted(second["rankings"][0]["results"][0]["keep"]) == sorted(
+            x[0] + {"H": "C", "S": "D", "D": "S", "C": "H"}[x[1]] for x in best["keep"]
+        )
+
+        stats = get_json(f"{server_url}/stats")
+        assert stats["requests"] == 2
+        assert stats["engine"]["hits"] == 1
+        assert stats["latency_ms"]["p50"] >= 0
+
+    @staticmethod
+    def test_bad_request(server_url: str) -> None:
+        """
+        Bad cards are a 400, unknown paths a 404
+        """
+        with pytest.raises(urllib.error.HTTPError) as info:
+            get_json(f"{server_url}/analyse?cards=5H,5S")
+        assert info.value.code == 400
+
+        with pytest.raises(urllib.error.HTTPError) as info:
+            get_json(f"{server_url}/nothing")
+        assert info.value.code == 404
@@ -0,0 +1,161 @@
+"""
+Test of the self-play simulator of discard policies.
+"""
+
+import math
+
+import pytest
+
+from cribbage.card import Card
+from cribbage.simulate import (
+    POLICIES,
+    RunningTotals,
+    render_comparison,
+    shard_seed,
+    simulate,
+    simulate_shard,
+)
+
+# pragma pylint: disable=R0903
+#  Disable "too few public methods" for test cases - most test files will be classes used for
+#  grouping and then individual tests alongside these
+
+
+def cards(text: str) -> list[Card]:
+    """
+    Cards from a space separated string, in order
+    """
+    return [Card.from_str(x) for x in text.split()]
+
+
+class TestPolicies:
+    """
+    Test each policy picks the discard it should
+    """
+
+    @staticmethod
+    def test_hand_mean() -> None:
+        """
+        Keeps the best hand, whatever the crib
+        """
+        keep, discard = POLICIES["hand_mean"].choose(cards("5H 5S JD XC 2C 9D"), False)
+        assert keep == set(cards("5H 5S JD XC"))
+        assert discard == set(cards("2C 9D"))
+
+    @staticmethod
+    def test_crib() -> None:
+        """
+        Keeps good cards out of the opponent's crib, and puts them in your own
+        """
+        hand = cards("5H 5S 5D XC KC AD")
+        _, pone_discard = POLICIES["by_seat"].choose(hand, False)
+        _, dealer_discard = POLICIES["by_seat"].choose(hand, True)
+        assert not pone_discard & set(cards("5H 5S 5D"))
+        assert pone_discard != dealer_discard
+
+
+class TestRunningTotals:
+    """
+    Test the totals, means and confidence intervals
+    """
+
+    @staticmethod
+    def test_mean_and_interval() -> None:
+        """
+        The same as working them out from the points
+        """
+        totals = RunningTotals()
+        points = [2, 8, 12, 0, 4, 6]
+        for point in points:
+            totals.add(point)
+
+        mean = sum(points) / len(points)
+        stdev = math.sqrt(sum((x - mean) ** 2 for x in points) / (len(points) - 1))
+        assert totals.mean == pytest.approx(mean)
+        assert totals.stdev == pytest.approx(stdev)
+        low, high = totals.confidence_interval()
+        assert high - mean == pytest.approx(1.96 * stdev / math.sqrt(len(points)))
+        assert mean - low == pytest.approx(high - mean)
+
+    @staticmethod
+    def test_merge() -> None:
+        """
+        Adding up shards gives the same as one shard
+        """
+        first, second, whole = RunningTotals(), RunningTotals(), RunningTotals()
+        for point in (3, -2, 9):
+            first.add(point)
+            whole.add(point)
+        for point in (7, 0):
+            second.add(point)
+            whole.add(point)
+        first.merge(second)
+        assert (first.count, first.total, first.total_sq) == (
+            whole.count,
+            whole.total,
+            whole.total_sq,
+        )
+
+
+class TestSimulate:
+    """
+    Test the simulation is reproducible, and compares the policies on the same deals
+    """
+
+    @staticmethod
+    def test_reproducible() -> None:
+        """
+        The same seed gives the same totals, however many workers; a different seed doesn't
+        """
+        policies = ["hand_mean", "by_seat"]
+        *_, in_process = simulate(300, policies, seed=5, shard_size=100, max_workers=1)
+        *_, pooled = simulate(300, policies, seed=5, shard_size=100, max_workers=2)
+        *_, other = simulate(300, policies, seed=6, shard_size=100, max_workers=1)
+
+        assert in_process.to_dict() == pooled.to_dict()
+        assert in_process.shards == 3
+        assert in_process.points["by_seat"].count == 300
+        assert in_process.to_dict() != other.to_dict()
+
+    @staticmethod
+    def test_streaming() -> None:
+        """
+        The totals so far are given after each shard
+        """
+        counts = [
+            totals.points["hand_mean"].count
+            for totals in simulate(250, ["hand_mean"], shard_size=100, max_workers=1)
+        ]
+        assert counts == [100, 200, 250]
+
+    @staticmethod
+    def test_differences() -> None:
+        """
+        The differences are from the first policy, deal by deal
+        """
+        totals = simulate_shard(1, 0, 200, ["hand_mean", "hand_plus_crib"])
+
+        assert totals.differences["hand_mean"].total_sq == 0
+        assert totals.differences["hand_plus_crib"].total == (
+            totals.points["hand_plus_crib"].total - totals.points["hand_mean"].total
+        )
+        assert "difference from hand_mean" in render_comparison(totals)
+
+    @staticmethod
+    def test_errors() -> None:
+        """
+        Only known policies, each once
+        """
+        with pytest.raises(ValueError):
+            list(simulate(10, ["hand_mean", "best"]))
+        with pytest.raises(ValueError):
+            list(simulate(10, ["hand_mean", "hand_mean"]))
+
+    @staticmethod
+    def test_shard_seed() -> None:
+        """
+        Fixed, and different for each shard
+        """
+        assert shard_seed(0, 0) == shard_seed(0, 0)
+        assert len({shard_seed(0, shard) for shard in range(100)}) == 100
+        assert shard_seed(0, 1) != shard_seed(1, 0)
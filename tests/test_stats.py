@@ -0,0 +1,84 @@
+"""
+Test of the stats classes.
+"""
+
+import statistics
+
+import pytest
+
+from cribbage.stats import ScoringStats, weighted_median
+
+# pragma pylint: disable=R0903
+#  Disable "too few public methods" for test cases - most test files will be classes used for
+#  grouping and then individual tests alongside these
+
+SCORES = [0, 2, 2, 4, 5, 8, 12, 29]
+
+
+class TestWeightedStats:
+    """
+    Test the weighted version of the stats
+    """
+
+    @staticmethod
+    def test_equal_weights() -> None:
+        """
+        Equal weights give the same stats as no weights
+        """
+        unweighted = ScoringStats(SCORES)
+        weighted = ScoringStats(SCORES, [0.5] * len(SCORES))
+
+        assert weighted.mean == pytest.approx(unweighted.mean)
+        assert weighted.stdev == pytest.approx(unweighted.stdev)
+        assert weighted.median == unweighted.median
+        assert weighted.min == unweighted.min
+        assert weighted.max == unweighted.max
+
+    @staticmethod
+    def test_zero_weights() -> None:
+        """
+        Scores with no weight can't happen
+        """
+        weighted = ScoringStats(SCORES, [0, 1, 1, 1, 1, 1, 1, 0])
+
+        assert weighted.mean == pytest.approx(statistics.mean(SCORES[1:-1]))
+        assert weighted.min == 2
+        assert weighted.max == 12
+
+    @staticmethod
+    def test_no_weight() -> None:
+        """
+        There must be some weight
+        """
+        with pytest.raises(ValueError):
+            ScoringStats(SCORES, [0] * len(SCORES))
+
+    @staticmethod
+    def test_weighted_median() -> None:
+        """
+        The median moves towards the heavier scores
+        """
+        assert weighted_median([1, 2, 3], [1, 1, 1]) == 2
+        assert weighted_median([1, 2, 3], [1, 1, 5]) == 3
+        assert weighted_median([1, 2, 3, 4], [1, 1, 1, 1]) == 2.5
+
+
+class TestFromCounts:
+    """
+    Test stats from counts of each score
+    """
+
+    @staticmethod
+    def test_same_as_list() -> None:
+        """
+        The same as the stats of the scores repeated
+        """
+        counts = {1: 2, 3: 5, 7: 1}
+        repeated = [score for score, count in counts.items() for _ in range(count)]
+        from_counts = ScoringStats.from_counts(counts)
+        from_list = ScoringStats(repeated)
+
+        assert from_counts.mean == pytest.approx(from_list.mean)
+        assert from_counts.stdev == pytest.approx(from_list.stdev)
+        assert from_counts.median == from_list.median
+        assert (from_counts.min, from_counts.max) == (1, 7)
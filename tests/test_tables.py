@@ -0,0 +1,87 @@
+"""
+Test of the precomputed score tables.
+"""
+
+from itertools import combinations
+
+from cribbage.card import Card, all_possible_cards, convert_card_array_to_enum_array
+from cribbage.scorecalc import calculate_score_shared
+from cribbage.tables import (
+    crib_deal_indices,
+    gather,
+    keep_value_table,
+    shared_score_table,
+    val_multisets,
+)
+
+# pragma pylint: disable=R0903
+#  Disable "too few public methods" for test cases - most test files will be classes used for
+#  grouping and then individual tests alongside these
+
+
+class TestTables:
+    """
+    Test the value-only tables against the scoring functions
+    """
+
+    @staticmethod
+    def test_val_multisets_sizes() -> None:
+        """
+        Every multiset of values; no five of a kind
+        """
+        assert len(val_multisets(4)) == 1820
+        assert len(val_multisets(5)) == 6188 - 13
+
+    @staticmethod
+    def test_shared_score_table() -> None:
+        """
+        Spot check the 5 value table
+        """
+        table = shared_score_table()
+        assert table[(4, 5, 5, 6, 7)] == 14
+        assert table[(5, 5, 5, 5, 11)] == 28
+        assert table[(1, 3, 7, 9, 11)] == 0
+
+    @staticmethod
+    def test_keep_value_table() -> None:
+        """
+        The expected value of a keep matches scoring against every possible starter
+        """
+        hand = {Card.from_str("5H"), Card.from_str("5S"), Card.from_str("JD"), Card.from_str("XC")}
+        scores = []
+        for starter in all_possible_cards():
+            if starter in hand:
+                continue
+            vals, _ = convert_card_array_to_enum_array(hand | {starter})
+            scores.append(calculate_score_shared(vals))
+
+        assert keep_value_table()[(5, 5, 10, 11)] == sum(scores) / len(scores)
+
+
+class TestCribDealIndices:
+    """
+    Test the table of crib deals, and looking up the cards
+    """
+
+    @staticmethod
+    def test_same_order_as_combinations() -> None:
+        """
+        Each combination of 3, with each card the starter in turn
+        """
+        expected = [
+            (starter, *(x for x in combo if x != starter))
+            for combo in combinations(range(10), 3)
+            for starter in combo
+        ]
+        assert list(zip(*crib_deal_indices(10))) == expected
+        assert len(crib_deal_indices(46)[0]) == 45540
+        assert crib_deal_indices(46) is crib_deal_indices(46)
+
+    @staticmethod
+    def test_gather() -> None:
+        """
+        The items at the indices, for any number of indices
+        """
+        assert gather("abcd", [3, 0, 3]) == ("d", "a", "d")
+        assert gather("abcd", [2]) == ("c",)
+        assert gather("abcd", []) == ()
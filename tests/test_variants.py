@@ -0,0 +1,171 @@
+"""
+Test of the variants for more players, and their crib model.
+"""
+
+from collections import Counter
+from itertools import combinations
+
+import pytest
+
+from cribbage.card import Card
+from cribbage.cribbage_eu import calculate_cribbage_eu, calculate_variant_score_for_option
+from cribbage.scorecalc import calculate_score
+from cribbage.variants import (
+    FIVE_CARD,
+    FOUR_PLAYER,
+    THREE_PLAYER,
+    TWO_PLAYER,
+    crib_score_counts,
+    score_variant_hand,
+    variant_hand_scores,
+)
+
+# pragma pylint: disable=R0903
+#  Disable "too few public methods" for test cases - most test files will be classes used for
+#  grouping and then individual tests alongside these
+
+
+def cards(text: str) -> set[Card]:
+    """
+    Cards from a space separated string
+    """
+    return {Card.from_str(x) for x in text.split()}
+
+
+def brute_force_counts(discard: set[Card], unseen: set[Card], num_unknown: int) -> Counter:
+    """
+    Score every deal of the crib, one at a time
+    """
+    counts: Counter = Counter()
+    for dealt in combinations(unseen, num_unknown + 1):
+        for starter in dealt:
+            counts[calculate_score(discard | (set(dealt) - {starter}), starter)] += 1
+    return counts
+
+
+# A few of each value, with plenty of jacks and hearts; for flushes and nobs
+UNSEEN = cards("AH 2H 3H 4H 5C 5D JH JS JC QH KD XH 9H 4S")
+
+
+class TestCribScoreCounts:
+    """
+    Test the crib model against scoring every deal
+    """
+
+    @staticmethod
+    @pytest.mark.parametrize("discard", ["6H", "JD", "2S", "KH"])
+    def test_one_discard(discard: str) -> None:
+        """
+        3 unknown crib cards, as with 3 or 4 players
+        """
+        discarded = cards(discard)
+        assert crib_score_counts(discarded, UNSEEN, 3) == brute_force_counts(
+            discarded, UNSEEN, 3
+        )
+
+    @staticmethod
+    @pytest.mark.parametrize("discard", ["5H 6H", "JD 5S", "QD QS", "7C 8D"])
+    def test_two_discards(discard: str) -> None:
+        """
+        2 unknown crib cards, as with 2 players
+        """
+        discarded = cards(discard)
+        assert crib_score_counts(discarded, UNSEEN, 2) == brute_force_counts(
+            discarded, UNSEEN, 2
+        )
+
+
+class TestVariantOption:
+    """
+    Test the options for more players
+    """
+
+    @staticmethod
+    def test_three_player() -> None:
+        """
+        Every deal of the crib is counted; 47 starters and 46 choose 3 other crib cards
+        """
+        option = calculate_variant_score_for_option(
+            cards("5H 5S JD XC"), cards("2C"), variant=THREE_PLAYER
+        )
+
+        assert len(option.hand_scores.possible_scores) == 47
+        assert sum(option.crib_scores.weights or []) == 47 * 15180
+        assert 0 < option.crib_scores.mean < 29
+
+    @staticmethod
+    def test_needs_two_players() -> None:
+        """
+        Pegging is only modelled for two players
+        """
+        with pytest.raises(ValueError):
+            list(calculate_cribbage_eu(cards("5H 5S JD XC 2C"), pegging=True, variant=FOUR_PLAYER))
+
+    @staticmethod
+    def test_hand_size() -> None:
+        """
+        The hand must be the right size for the variant
+        """
+        with pytest.raises(ValueError):
+            list(calculate_cribbage_eu(cards("5H 5S JD XC 2C"), variant=TWO_PLAYER))
+
+
+class TestFiveCard:
+    """
+    Test five-card cribbage; 3 card hands, and crib flushes needing the starter
+    """
+
+    @staticmethod
+    def test_hand_scores() -> None:
+        """
+        The table scores are the same as scoring each hand
+        """
+        for hand in (cards("5H 5S XC"), cards("2H 3H 4H"), cards("JD 4D 6D")):
+            assert variant_hand_scores(hand, UNSEEN, FIVE_CARD) == [
+                score_variant_hand(hand, starter, FIVE_CARD) for starter in UNSEEN
+            ]
+
+    @staticmethod
+    def test_three_card_flush() -> None:
+        """
+        A point per card, and one for the starter
+        """
+        hand = cards("2H 4H 8H")
+        assert score_variant_hand(hand, Card.from_str("KS"), FIVE_CARD) == 3
+        assert score_variant_hand(hand, Card.from_str("KH"), FIVE_CARD) == 4
+
+    @staticmethod
+    def test_crib_flush() -> None:
+        """
+        A crib flush only counts with the starter
+        """
+        crib = cards("2H 4H 8H QH")
+        assert score_variant_hand(crib, Card.from_str("KS"), FIVE_CARD, is_crib=True) == 0
+        assert score_variant_hand(crib, Card.from_str("KH"), FIVE_CARD, is_crib=True) == 5
+        assert score_variant_hand(crib, Card.from_str("KS"), TWO_PLAYER, is_crib=True) == 4
+
+    @staticmethod
+    @pytest.mark.parametrize("discard", ["5H 6H", "JD 2D", "7C 8D"])
+    def test_crib_counts(discard: str) -> None:
+        """
+        The crib model scores flushes the same way
+        """
+        discarded = cards(discard)
+        brute_force: Counter = Counter()
+        for dealt in combinations(UNSEEN, 3):
+            for starter in dealt:
+                crib = discarded | (set(dealt) - {starter})
+                brute_force[score_variant_hand(crib, starter, FIVE_CARD, is_crib=True)] += 1
+
+        assert crib_score_counts(discarded, UNSEEN, 2, flush_needs_starter=True) == brute_force
+
+    @staticmethod
+    def test_options() -> None:
+        """
+        All 10 ways of keeping 3 of 5 cards
+        """
+        options = list(calculate_cribbage_eu(cards("5H 5S XC JD 2C"), variant=FIVE_CARD))
+
+        assert len(options) == 10
+        assert all(len(x.hand) == 3 for x in options)
+        assert all(len(x.hand_scores.possible_scores) == 47 for x in options)
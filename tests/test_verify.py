@@ -0,0 +1,113 @@
+"""
+Test of the exhaustive check of the fast scoring paths.
+"""
+
+from collections import Counter
+
+import pytest
+
+from cribbage import verify as verify_module
+from cribbage.verify import (
+    KNOWN_SCORE_FREQUENCIES,
+    NUM_HANDS,
+    VerifyTotals,
+    chunk_bounds,
+    render_report,
+    shared_table_scores,
+    verify,
+)
+
+# pragma pylint: disable=R0903
+#  Disable "too few public methods" for test cases - most test files will be classes used for
+#  grouping and then individual tests alongside these
+
+
+class TestChunks:
+    """
+    Test the hands are split into chunks
+    """
+
+    @staticmethod
+    @pytest.mark.parametrize("num_chunks", [1, 7, 64])
+    def test_bounds(num_chunks: int) -> None:
+        """
+        Every hand is in one chunk
+        """
+        bounds = chunk_bounds(num_chunks)
+        assert len(bounds) == num_chunks
+        assert bounds[0][0] == 0
+        assert bounds[-1][1] == NUM_HANDS
+        assert all(first[1] == second[0] for first, second in zip(bounds, bounds[1:]))
+
+
+class TestVerify:
+    """
+    Test the paths are checked against the per-combination scorers
+    """
+
+    @staticmethod
+    def test_paths_agree() -> None:
+        """
+        Every path agrees on a few chunks; by default, every path is checked
+        """
+        *_, totals = verify(None, 500, max_workers=1, only_chunks=[0, 250, 499])
+        assert totals.paths == list(verify_module.FAST_PATHS)
+        assert totals.chunks == 3
+        assert totals.scores == 48 * totals.hands
+        assert not any(totals.mismatch_counts.values())
+        assert totals.passed
+        assert "not every hand was checked" in render_report(totals)
+
+    @staticmethod
+    def test_mismatch(monkeypatch) -> None:
+        """
+        A broken path is caught, and the mismatches shown
+        """
+
+        def broken(hand, starters):
+            return [score + (score == 2) for score in shared_table_scores(hand, starters)]
+
+        monkeypatch.setitem(verify_module.FAST_PATHS, "broken", broken)
+        *_, totals = verify(["shared_table", "broken"], 1000, max_workers=1, only_chunks=[3])
+
+        assert totals.mismatch_counts["shared_table"] == 0
+        assert totals.mismatch_counts["broken"] == totals.frequencies[2] > 0
+        assert not totals.passed
+        assert "scored 3, expected 2" in render_report(totals)
+
+    @staticmethod
+    def test_unknown_path() -> None:
+        """
+        Only known paths
+        """
+        with pytest.raises(ValueError):
+            list(verify(["fastest"]))
+
+
+class TestFrequencies:
+    """
+    Test the check of the score frequencies, once every hand is checked
+    """
+
+    @staticmethod
+    def test_known() -> None:
+        """
+        The known frequencies add up to every hand and starter
+        """
+        assert sum(KNOWN_SCORE_FREQUENCIES.values()) == NUM_HANDS * 48
+
+    @staticmethod
+    def test_frequency_errors() -> None:
+        """
+        Any score with a different frequency fails
+        """
+        totals = VerifyTotals(["shared_table"])
+        totals.hands = NUM_HANDS
+        totals.frequencies = Counter(KNOWN_SCORE_FREQUENCIES)
+        assert totals.passed
+        assert "match the known distribution" in render_report(totals)
+
+        totals.frequencies[29] -= 1
+        totals.frequencies[19] += 1
+        assert totals.frequency_errors() == {19: (0, 1), 29: (4, 3)}
+        assert not totals.passed
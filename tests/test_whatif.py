@@ -0,0 +1,157 @@
+"""
+Test of re-analysing a hand when one card changes, against working it out from scratch.
+"""
+
+import pytest
+from fakes import make_engine
+
+from cribbage.card import Card
+from cribbage.cribbage_eu import (
+    calculate_cribbage_eu,
+    calculate_joint_score_for_option,
+    calculate_score_for_option,
+)
+from cribbage.opponent import GreedyDiscardModel
+from cribbage.variants import FOUR_PLAYER
+from cribbage.whatif import substitute_card, substitute_option
+
+# pragma pylint: disable=R0903
+#  Disable "too few public methods" for test cases - most test files will be classes used for
+#  grouping and then individual tests alongside these
+
+
+def cards(text: str) -> set[Card]:
+    """
+    Cards from a space separated string
+    """
+    return {Card.from_str(x) for x in text.split()}
+
+
+class TestSubstituteOption:
+    """
+    Test one option, with the old card in the hand or the discard
+    """
+
+    @staticmethod
+    @pytest.mark.parametrize(
+        "old_card, new_card",
+        [("5S", "5D"), ("JD", "4H"), ("9D", "2H"), ("2C", "JH")],
+    )
+    def test_same_as_fresh(old_card: str, new_card: str) -> None:
+        """
+        The scores are exactly those of a fresh analysis, in the same order
+        """
+        option = calculate_score_for_option(cards("5H 5S JD XC"), cards("2C 9D"))
+        result = substitute_option(option, Card.from_str(old_card), Card.from_str(new_card))
+        fresh = calculate_score_for_option(result.hand, result.discard)
+
+        assert result.hand == fresh.hand
+        assert result.discard == fresh.discard
+        assert result.hand_scores.possible_scores == fresh.hand_scores.possible_scores
+        assert result.crib_scores.possible_scores == fresh.crib_scores.possible_scores
+        assert result.crib_scores.weights is None
+
+    @staticmethod
+    def test_discard_model() -> None:
+        """
+        The crib weights are kept and added to, in the same order
+        """
+        model = GreedyDiscardModel()
+        option = calculate_score_for_option(cards("AH 2H 3H 4H"), cards("KS QS"), model)
+        result = substitute_option(option, Card.from_str("2H"), Card.from_str("KD"), model)
+        fresh = calculate_score_for_option(result.hand, result.discard, model)
+
+        assert result.crib_scores.possible_scores == fresh.crib_scores.possible_scores
+        assert result.crib_scores.weights == fresh.crib_scores.weights
+        assert result.crib_scores.mean == pytest.approx(fresh.crib_scores.mean)
+
+    @staticmethod
+    def test_joint() -> None:
+        """
+        Joint options are worked out again in full
+        """
+        option = calculate_joint_score_for_option(cards("5H 5S JD XC"), cards("2C 9D"))
+        result = substitute_option(option, Card.from_str("2C"), Card.from_str("5D"))
+
+        assert result.joint_scores is not None
+        assert result.discard == cards("5D 9D")
+
+    @staticmethod
+    def test_errors() -> None:
+        """
+        The cards must make sense, and the discard model must match
+        """
+        option = calculate_score_for_option(cards("5H 5S JD XC"), cards("2C 9D"))
+        with pytest.raises(ValueError):
+            substitute_option(option, Card.from_str("AH"), Card.from_str("2H"))
+        with pytest.raises(ValueError):
+            substitute_option(option, Card.from_str("5H"), Card.from_str("5S"))
+        with pytest.raises(ValueError):
+            substitute_option(
+                option, Card.from_str("5H"), Card.from_str("AH"), GreedyDiscardModel()
+            )
+
+
+class TestSubstituteCard:
+    """
+    Test re-analysing every option of a hand
+    """
+
+    @staticmethod
+    def test_variant() -> None:
+        """
+        The same options as a fresh analysis, in the order given
+        """
+        previous = list(calculate_cribbage_eu(cards("5H 5S JD XC 2C"), variant=FOUR_PLAYER))
+        results = substitute_card(
+            previous, Card.from_str("2C"), Card.from_str("4D"), variant=FOUR_PLAYER, max_workers=2
+        )
+        fresh = {
+            frozenset(option.discard): option
+            for option in calculate_cribbage_eu(cards("5H 5S JD XC 4D"), variant=FOUR_PLAYER)
+        }
+
+        assert len(results) == len(previous)
+        for before, after in zip(previous, results):
+            assert before.hand | before.discard != after.hand | after.discard
+            expected = fresh[frozenset(after.discard)]
+            assert after.hand_scores.mean == pytest.approx(expected.hand_scores.mean)
+            assert after.crib_scores.mean == pytest.approx(expected.crib_scores.mean)
+
+    @staticmethod
+    def test_engine(monkeypatch) -> None:
+        """
+        Only the option with the old card in the discard goes to the engine's pool;
+        the results are the same as without it
+        """
+        previous = [
+            calculate_score_for_option(cards("5H 5S JD XC"), cards("2C 9D")),
+            calculate_score_for_option(cards("5H 5S JD 2C"), cards("XC 9D")),
+        ]
+        old_card, new_card = Card.from_str("2C"), Card.from_str("4D")
+        with make_engine() as engine:
+            submitted = []
+            submit_call = engine.submit_call
+            monkeypatch.setattr(
+                engine, "submit_call", lambda *args: submitted.append(args) or submit_call(*args)
+            )
+            results = substitute_card(previous, old_card, new_card, engine=engine)
+
+        assert [args[1] for args in submitted] == previous[:1]
+        assert [x.discard for x in results] == [cards("4D 9D"), cards("XC 9D")]
+        in_process = substitute_card(previous, old_card, new_card, max_workers=1)
+        for result, expected in zip(results, in_process):
+            assert result.crib_scores.possible_scores == expected.crib_scores.possible_scores
+            assert result.hand_scores.possible_scores == expected.hand_scores.possible_scores
+
+    @staticmethod
+    def test_errors() -> None:
+        """
+        The old card must be in the hand, and the new card mustn't be
+        """
+        option = calculate_score_for_option(cards("5H 5S JD XC"), cards("2C 9D"))
+        assert not substitute_card([], Card.from_str("AH"), Card.from_str("2H"))
+        with pytest.raises(ValueError):
+            substitute_card([option], Card.from_str("AH"), Card.from_str("2H"))
+        with pytest.raises(ValueError):
+            substitute_card([option], Card.from_str("5H"), Card.from_str("2C"))
@@ -0,0 +1,106 @@
+"""
+Test of the win probability tables.
+"""
+
+from pathlib import Path
+
+import pytest
+
+from cribbage.winprob import (
+    WinProbabilityTable,
+    build_default_table,
+    convolve,
+    default_win_table,
+    option_win_probability,
+    scores_to_distribution,
+)
+
+# pragma pylint: disable=R0903
+#  Disable "too few public methods" for test cases - most test files will be classes used for
+#  grouping and then individual tests alongside these
+
+
+class TestWinProbabilityTable:
+    """
+    Test building, storing and using the table
+    """
+
+    @staticmethod
+    def test_symmetric() -> None:
+        """
+        My chance of winning and my opponent's add up to 1
+        """
+        table = default_win_table()
+        for my_score, opp_score in ((0, 0), (60, 90), (118, 115), (120, 120)):
+            for dealer in (True, False):
+                assert table.win_probability(my_score, opp_score, dealer) + table.win_probability(
+                    opp_score, my_score, not dealer
+                ) == pytest.approx(1, abs=1e-4)
+
+    @staticmethod
+    def test_ordering() -> None:
+        """
+        More points is better; and at the start the dealer has the edge
+        """
+        table = default_win_table()
+        assert table.win_probability(100, 80, False) > table.win_probability(80, 80, False)
+        assert table.win_probability(0, 0, True) > 0.5
+        # At the end, counting first is what matters
+        assert table.win_probability(117, 117, False) > 0.5
+
+    @staticmethod
+    def test_shipped_table() -> None:
+        """
+        The table shipped with the package is the default table
+        """
+        assert build_default_table().to_bytes() == default_win_table().to_bytes()
+
+    @staticmethod
+    def test_save_load(tmp_path: Path) -> None:
+        """
+        Tables survive a round trip to disk
+        """
+        table_path = str(tmp_path / "table.bin")
+        default_win_table().save(table_path)
+        assert WinProbabilityTable.load(table_path).to_bytes() == default_win_table().to_bytes()
+
+    @staticmethod
+    def test_build_certain() -> None:
+        """
+        If the pone always scores 121, the pone always wins
+        """
+        table = WinProbabilityTable.build({121: 1.0}, {0: 1.0})
+        assert table.win_probability(0, 0, False) == 1
+        assert table.win_probability(0, 0, True) == 0
+
+
+class TestOptionWinProbability:
+    """
+    Test the chance of winning for a single option
+    """
+
+    @staticmethod
+    def test_pone_counts_out() -> None:
+        """
+        As pone, a hand that always scores enough wins before the dealer counts
+        """
+        assert option_win_probability({4: 1.0}, {20: 1.0}, 118, 120, False) == 1
+
+    @staticmethod
+    def test_better_hand_wins_more() -> None:
+        """
+        A better hand is more likely to win
+        """
+        crib = scores_to_distribution([0, 2, 4, 6])
+        assert option_win_probability({12: 1.0}, crib, 100, 105, True) > option_win_probability(
+            {2: 1.0}, crib, 100, 105, True
+        )
+
+    @staticmethod
+    def test_distributions() -> None:
+        """
+        Helpers to build distributions
+        """
+        assert scores_to_distribution([1, 1, 2, 4]) == {1: 0.5, 2: 0.25, 4: 0.25}
+        assert scores_to_distribution([1, 2], [3, 1]) == {1: 0.75, 2: 0.25}
+        assert convolve({0: 0.5, 1: 0.5}, {0: 0.5, 1: 0.5}) == {0: 0.25, 1: 0.5, 2: 0.25}
@@ -0,0 +1,147 @@
+"""
+Test of the work queue on a shared directory.
+"""
+
+import multiprocessing
+import os
+import time
+from itertools import combinations
+
+import pytest
+
+from cribbage.canonical import canonical_hand, card_from_id
+from cribbage.card import all_possible_cards
+from cribbage.tables import val_multisets
+from cribbage.workqueue import (
+    CLAIMED,
+    PENDING,
+    canonical_hands_for_values,
+    claim_unit,
+    create_queue,
+    keep_scores,
+    load_table,
+    merge_results,
+    queue_status,
+    run_worker,
+)
+
+# pragma pylint: disable=R0903
+#  Disable "too few public methods" for test cases - most test files will be classes used for
+#  grouping and then individual tests alongside these
+
+VALUES = [(1, 2, 3, 4), (5, 5, 5, 5), (5, 5, 10, 11), (1, 1, 2, 2), (6, 7, 8, 13)]
+
+
+class TestCanonicalHands:
+    """
+    Test every canonical hand is made, once
+    """
+
+    @staticmethod
+    @pytest.mark.parametrize("size", [2, 3])
+    def test_all_hands(size: int) -> None:
+        """
+        The same as the canonical forms of every hand
+        """
+        made = [key for vals in val_multisets(size) for key in canonical_hands_for_values(vals)]
+        expected = {canonical_hand(x)[0] for x in combinations(all_possible_cards(), size)}
+        assert len(made) == len(set(made))
+        assert set(made) == expected
+
+    @staticmethod
+    def test_values() -> None:
+        """
+        Only hands with the values given
+        """
+        # Four of a kind can only be one hand; two pairs share both suits, one or none
+        assert len(canonical_hands_for_values((5, 5, 5, 5))) == 1
+        assert len(canonical_hands_for_values((1, 1, 2, 2))) == 3
+        for key in canonical_hands_for_values((6, 7, 8, 13)):
+            assert sorted(int(card_from_id(x).val) for x in key) == [6, 7, 8, 13]
+
+
+class TestQueue:
+    """
+    Test claiming units, and merging the results
+    """
+
+    @staticmethod
+    def test_claim(tmp_path) -> None:
+        """
+        Each unit is claimed once
+        """
+        assert create_queue(str(tmp_path), "keep_scores", 3, VALUES) == 3
+        claims = [claim_unit(str(tmp_path), f"worker{i}") for i in range(4)]
+
+        assert [x[0] for x in claims[:3] if x] == ["unit-00000", "unit-00001", "unit-00002"]
+        assert claims[3] is None
+        assert not os.listdir(tmp_path / PENDING)
+        assert sorted(os.listdir(tmp_path / CLAIMED))[0] == "unit-00000.json.worker0"
+
+    @staticmethod
+    def test_workers(tmp_path) -> None:
+        """
+        Several worker processes share the units; the table is every hand, worked out once
+        """
+        directory = str(tmp_path / "queue")
+        create_queue(directory, "keep_scores", 4, VALUES)
+        workers = [
+            multiprocessing.Process(target=run_worker, args=(directory, f"node{i}"))
+            for i in range(3)
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        assert queue_status(directory) == {
+            "units": 4,
+            "pending": 0,
+            "claimed": 0,
+            "done": 4,
+            "requeued": 0,
+        }
+
+        output = str(tmp_path / "table.jsonl.gz")
+        num_hands = merge_results(directory, output)
+        table = load_table(output)
+
+        keys = [key for vals in VALUES for key in canonical_hands_for_values(vals)]
+        assert num_hands == len(table) == len(keys)
+        for key in keys[::5]:
+            assert table[key] == pytest.approx(keep_scores({card_from_id(x) for x in key}))
+
+    @staticmethod
+    def test_unfinished(tmp_path) -> None:
+        """
+        Can't merge until every unit is done
+        """
+        create_queue(str(tmp_path), "keep_scores", 2, VALUES)
+        run_worker(str(tmp_path), "node", max_units=1)
+        with pytest.raises(ValueError):
+            merge_results(str(tmp_path), str(tmp_path / "table.jsonl"))
+
+    @staticmethod
+    def test_requeue(tmp_path) -> None:
+        """
+        Units claimed by a worker that stopped go back to pending
+        """
+        create_queue(str(tmp_path), "keep_scores", 2, VALUES)
+        _, dead_path = claim_unit(str(tmp_path), "dead")
+        claim_unit(str(tmp_path), "alive")
+        stale = time.time() - 120
+        os.utime(dead_path, (stale, stale))
+
+        status = queue_status(str(tmp_path), requeue_after=60)
+        assert (status["pending"], status["claimed"], status["requeued"]) == (1, 1, 1)
+        assert os.listdir(tmp_path / PENDING) == ["unit-00000.json"]
+
+    @staticmethod
+    def test_errors(tmp_path) -> None:
+        """
+        Only known jobs, and only one queue per directory
+        """
+        with pytest.raises(ValueError):
+            create_queue(str(tmp_path), "best_hands")
+        create_queue(str(tmp_path), "keep_scores", 2, VALUES)
+        with pytest.raises(ValueError):
+            create_queue(str(tmp_path), "keep_scores", 2, VALUES)